@@ -54,23 +54,19 @@ class Assembly4_WorkBench(Workbench):
 
 
     def Initialize(self):
-        import newModelCmd       # creates a new App::Part container called 'Model'
-        import newSketchCmd      # creates a new Sketch in 'Model'
-        import newLCSCmd         # creates a new LCS in 'Model'
-        import newPointCmd       # creates a new LCS in 'Model'
-        import newPlaneCmd       # creates a new LCS in 'Model'
-        import newPartCmd        # creates a new App::Part container called 'Model'
-        import newBodyCmd        # creates a new Body in 'Model
-        import insertLinkCmd     # inserts an App::Link to a 'Model' in another file
-        import placeLinkCmd      # places a linked part by snapping LCS (in the Part and in the Assembly)
-        import placeDatumCmd     # places an LCS relative to an external file (creates a local attached copy)
-        import importDatumCmd    # creates an LCS in assembly and attaches it to an LCS relative to an external file
-        import updateAssemblyCmd # updates all parts and constraints in the assembly
-        self.listCmd =           [ "newModelCmd",   "newBodyCmd", "newPartCmd", "newSketchCmd", "newLCSCmd", "newPlaneCmd", "newPointCmd", "insertLinkCmd", "placeLinkCmd", "importDatumCmd", "placeDatumCmd", "updateAssemblyCmd" ] # A list of command names created in the line above
-        self.itemsMenu =         [ "newModelCmd",   "newBodyCmd", "newPartCmd", "newSketchCmd", "newLCSCmd", "newPlaneCmd", "newPointCmd", "insertLinkCmd", "placeLinkCmd", "importDatumCmd", "placeDatumCmd", "updateAssemblyCmd" ] # A list of command names created in the line above
-        self.itemsToolbar =      [ "newModelCmd",   "newBodyCmd", "newPartCmd", "newSketchCmd", "newLCSCmd", "newPlaneCmd", "newPointCmd", "insertLinkCmd", "placeLinkCmd", "importDatumCmd", "placeDatumCmd", "updateAssemblyCmd" ] # A list of command names created in the line above
-        self.itemsContextMenu =  [ "insertLinkCmd", "placeLinkCmd",  "placeDatumCmd" ] # A list of command names created in the line above
-        self.itemsCreateMenu =   [ "newSketchCmd",  "newBodyCmd",    "newLCSCmd",  "newPlaneCmd", "newPointCmd"] # A list of command names created in the line above
+        # the commands are proxies, their modules are imported when they're first used
+        import asm4Commands
+        asm4Commands.addCommands()
+        import libObserver       # watches the documents to keep the index and the solver up-to-date
+        libObserver.startObserver()
+        self.listCmd =           [ "loadPartCmd", "newModelCmd",   "newBodyCmd", "newPartCmd", "newSketchCmd", "newLCSCmd", "newPlaneCmd", "newPointCmd", "insertLinkCmd", "placeLinkCmd", "placeLinksCmd", "importDatumCmd", "importDatumsCmd", "placeDatumCmd", "compactConstraintsCmd", "updateAssemblyCmd", "sweepCmd", "interferenceCmd", "solveStatsCmd", "profileReportCmd" ] # A list of command names created by asm4Commands
+        self.itemsMenu =         [ "loadPartCmd", "newModelCmd",   "newBodyCmd", "newPartCmd", "newSketchCmd", "newLCSCmd", "newPlaneCmd", "newPointCmd", "insertLinkCmd", "placeLinkCmd", "placeLinksCmd", "importDatumCmd", "importDatumsCmd", "placeDatumCmd", "compactConstraintsCmd", "updateAssemblyCmd", "sweepCmd", "interferenceCmd", "solveStatsCmd", "profileReportCmd" ] # A list of command names created by asm4Commands
+        self.itemsToolbar =      [ "newModelCmd",   "newBodyCmd", "newPartCmd", "newSketchCmd", "newLCSCmd", "newPlaneCmd", "newPointCmd", "insertLinkCmd", "placeLinkCmd", "placeLinksCmd", "importDatumCmd", "importDatumsCmd", "placeDatumCmd", "updateAssemblyCmd" ] # A list of command names created by asm4Commands
+        self.itemsContextMenu =  [ "insertLinkCmd", "placeLinkCmd",  "placeLinksCmd", "placeDatumCmd" ] # A list of command names created by asm4Commands
+        self.itemsCreateMenu =   [ "newSketchCmd",  "newBodyCmd",    "newLCSCmd",  "newPlaneCmd", "newPointCmd"] # A list of command names created by asm4Commands
+        # time the solver if profiling is enabled, the commands are timed once they're loaded
+        import libProfiler
+        libProfiler.instrument( self.listCmd )
         self.appendToolbar("Assembly 4",self.itemsToolbar) # leave settings off toolbar
         self.appendMenu("&Assembly",self.itemsMenu) # creates a new menu
         #self.appendMenu(["&Edit","DynamicData"],self.list) # appends a submenu to an existing menu
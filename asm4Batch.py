@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# asm4Batch.py
+#
+# solve and save or export Assembly4 assemblies without the GUI
+# this file doesn't use the GUI
+#
+# with FreeCADCmd, the workbench being installed in a Mod directory:
+#   FreeCADCmd -c "import asm4Batch; asm4Batch.main(['--jobs','8','--save','asm_1.FCStd','asm_2.FCStd'])"
+#
+# with a Python interpreter that can import FreeCAD:
+#   python3 asm4Batch.py --freecad-lib /usr/lib/freecad/lib --export step --output-dir out/ asm_*.FCStd
+
+
+import os, sys, time, argparse, multiprocessing
+
+
+
+"""
+    +-----------------------------------------------+
+    |          the command-line arguments           |
+    +-----------------------------------------------+
+"""
+def parseArguments( argv ):
+	parser = argparse.ArgumentParser( prog='asm4Batch', description='Solve Assembly4 assemblies without the GUI' )
+	parser.add_argument( 'files', nargs='+', help='the assembly files (.FCStd) to solve' )
+	parser.add_argument( '--jobs', '-j', type=int, default=1,
+						 help='number of worker processes, 0 uses all the cores (default 1)' )
+	parser.add_argument( '--save', action='store_true', help='save the solved assembly in place' )
+	parser.add_argument( '--output-dir', default='',
+						 help='save a copy, or the exported file, in this directory instead' )
+	parser.add_argument( '--export', default='', metavar='EXT',
+						 help='export the solved Model as step, iges, brep or stl' )
+	parser.add_argument( '--direct', action='store_true', help='use the direct solver instead of the ExpressionEngine' )
+	parser.add_argument( '--shape-cache', action='store_true',
+						 help='export the cached shapes of the linked parts, rebuilt only when a part file changed' )
+	parser.add_argument( '--freecad-lib', default='', help='directory containing the FreeCAD Python module' )
+	return parser.parse_args( argv )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   export the Model of a solved assembly to a  |
+    |    file, the format is given by its extension |
+    |    with the shape cache, the linked parts are |
+    |     taken from the cache of their files       |
+    +-----------------------------------------------+
+"""
+meshFormats = [ '.stl', '.obj', '.ply', '.off' ]
+
+
+def exportModel( doc, path, shapeCache=False ):
+	model = doc.getObject('Model')
+	ext = os.path.splitext( path )[1].lower()
+	if shapeCache:
+		import libShapeCache
+		if ext in meshFormats:
+			libShapeCache.getAssemblyMesh( doc ).write( path )
+		else:
+			shape = libShapeCache.getAssemblyShape( doc )
+			if ext in [ '.step', '.stp' ]:
+				shape.exportStep( path )
+			elif ext in [ '.iges', '.igs' ]:
+				shape.exportIges( path )
+			else:
+				shape.exportBrep( path )
+	elif ext in meshFormats:
+		import Mesh
+		Mesh.export( [ model ], path )
+	else:
+		import Part
+		Part.export( [ model ], path )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   open an assembly with its linked documents, |
+    |    solve the Model, and save and/or export it |
+    |   returns a dict with the result of the job   |
+    +-----------------------------------------------+
+"""
+def solveFile( job ):
+	( path, options ) = job
+	import FreeCAD as App
+	import libSolver
+	result = { 'file': path, 'status': 'ok', 'updated': 0, 'time': 0., 'message': '' }
+	start = time.time()
+	openDocs = set( App.listDocuments().keys() )
+	try:
+		# the linked documents are opened together with the assembly
+		doc = App.openDocument( os.path.abspath( path ) )
+		if not doc.getObject('Model'):
+			raise ValueError( 'no Assembly4 Model in this document' )
+		broken = [ obj.Name for obj in doc.findObjects('App::Link') if not obj.LinkedObject ]
+		if broken:
+			raise ValueError( 'unresolved links: '+', '.join( broken ) )
+		# a fresh process has no previous solve, this is a full solve,
+		# of the sub-assemblies first
+		updated = libSolver.solveHierarchy( doc, full=True, direct=options['direct'] )
+		result['updated'] = len( updated )
+		baseName = os.path.splitext( os.path.basename( path ) )[0]
+		if options['output_dir'] and not options['export']:
+			doc.saveCopy( os.path.join( options['output_dir'], os.path.basename( path ) ) )
+		elif options['save']:
+			doc.save()
+		if options['export']:
+			outDir = options['output_dir'] or os.path.dirname( os.path.abspath( path ) )
+			exportModel( doc, os.path.join( outDir, baseName+'.'+options['export'].lstrip('.') ), options['shape_cache'] )
+	except Exception as err:
+		result['status'] = 'error'
+		result['message'] = str( err )
+	finally:
+		# close the assembly and the documents it opened
+		for name in list( App.listDocuments().keys() ):
+			if name not in openDocs:
+				App.closeDocument( name )
+	result['time'] = time.time() - start
+	return result
+
+
+
+"""
+    +-----------------------------------------------+
+    |   solve a list of files with a pool of worker |
+    |     processes, one file per job, returns the  |
+    |          results in the order of the files    |
+    +-----------------------------------------------+
+"""
+def solveFiles( files, jobs=1, save=False, outputDir='', export='', direct=False, shapeCache=False ):
+	options = { 'save': save, 'output_dir': outputDir, 'export': export, 'direct': direct, 'shape_cache': shapeCache }
+	work = [ ( path, options ) for path in files ]
+	if outputDir and not os.path.isdir( outputDir ):
+		os.makedirs( outputDir )
+	if jobs == 0:
+		jobs = multiprocessing.cpu_count()
+	jobs = min( jobs, len( work ) )
+	# FreeCADCmd can't spawn new interpreters, the workers are forked
+	if jobs > 1 and 'fork' in multiprocessing.get_all_start_methods():
+		pool = multiprocessing.get_context('fork').Pool( jobs, maxtasksperchild=1 )
+		try:
+			return pool.map( solveFile, work, chunksize=1 )
+		finally:
+			pool.close()
+			pool.join()
+	return [ solveFile( job ) for job in work ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |             the command-line entry            |
+    +-----------------------------------------------+
+"""
+def main( argv=None ):
+	args = parseArguments( argv if argv is not None else sys.argv[1:] )
+	if args.freecad_lib and args.freecad_lib not in sys.path:
+		sys.path.append( args.freecad_lib )
+	# when not started from a Mod directory, find libSolver next to this file
+	here = os.path.dirname( os.path.abspath( __file__ ) )
+	if here not in sys.path:
+		sys.path.append( here )
+	results = solveFiles( args.files, args.jobs, args.save, args.output_dir, args.export, args.direct, args.shape_cache )
+	failed = 0
+	for result in results:
+		line = '%-6s %8.2fs %6d updated  %s' % ( result['status'], result['time'], result['updated'], result['file'] )
+		if result['message']:
+			line += '  ('+result['message']+')'
+		print( line )
+		if result['status'] != 'ok':
+			failed += 1
+	return failed
+
+
+
+if __name__ == '__main__':
+	sys.exit( main() )
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# asm4Benchmark.py
+#
+# time the opening, link resolution and solving of the example assemblies,
+# and of synthetic assemblies scaled up from them
+# this file doesn't use the GUI
+#
+# with FreeCADCmd, the workbench being installed in a Mod directory:
+#   FreeCADCmd -c "import asm4Benchmark; asm4Benchmark.main(['--sizes','10,100,1000','--output','bench.json'])"
+
+
+import os, sys, time, json, platform, tempfile, argparse
+
+import FreeCAD as App
+
+from libAsm4 import *
+import libIndex
+import libSolver
+import libConstraints
+import asm4Generator
+
+
+
+"""
+    +-----------------------------------------------+
+    |       the assemblies shipped in Examples      |
+    +-----------------------------------------------+
+"""
+exampleAssemblies = [ os.path.join( __dir__, 'Examples', 'Asm4_Example1', 'asm_Bielle.fcstd' ),
+					  os.path.join( __dir__, 'Examples', 'Asm4_Example2', 'asm_V4.FCStd' ),
+					  os.path.join( __dir__, 'Examples', 'Asm4_Example3', 'asm_Hypnotic.fcstd' ) ]
+
+defaultSizes = [ 10, 100, 1000, 10000 ]
+
+# distance between the copies of the template in a scaled assembly
+copySpacing = 500.
+
+
+
+"""
+    +-----------------------------------------------+
+    |                   some helpers                |
+    +-----------------------------------------------+
+"""
+def timed( func, *args, **kwargs ):
+	start = time.perf_counter()
+	result = func( *args, **kwargs )
+	return ( time.perf_counter() - start, result )
+
+
+def closeAllDocuments():
+	for name in list( App.listDocuments().keys() ):
+		App.closeDocument( name )
+
+
+# the link resolution: the attachment index and graph of the assembly
+def resolveLinks( doc ):
+	libIndex.buildIndex( doc )
+	return libSolver.buildGraph( doc )
+
+
+# the links of an assembly, parents before children
+def sortedLinks( doc ):
+	graph = resolveLinks( doc )
+	return [ name for name in libSolver.sortGraph( graph ) if graph[name].obj.isDerivedFrom('App::Link') ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |   make a synthetic assembly with a number of  |
+    |   link instances, by copying the links of a   |
+    |    template assembly onto a row of LCS, with  |
+    |       the same attachments as the template    |
+    +-----------------------------------------------+
+"""
+def makeScaledAssembly( template, instances, outDir ):
+	closeAllDocuments()
+	tmpl = App.openDocument( template )
+	tmplLinks = sortedLinks( tmpl )
+	if not tmplLinks:
+		raise ValueError( template+' has no attached links' )
+	baseName = os.path.splitext( os.path.basename( template ) )[0]
+	doc = App.newDocument( baseName+'_x'+str( instances ) )
+	model = makeModel( doc )
+	created = 0
+	copy = 0
+	while created < instances:
+		# the root LCS of this copy
+		lcs = model.newObject( 'PartDesign::CoordinateSystem', 'LCS_copy'+str( copy ) )
+		lcs.Placement = App.Placement( App.Vector( copy*copySpacing, 0, 0 ), App.Rotation() )
+		copies = {}
+		for name in tmplLinks:
+			if created == instances:
+				break
+			original = tmpl.getObject( name )
+			link = model.newObject( 'App::Link', name+'_'+str( copy ) )
+			link.LinkedObject = original.LinkedObject
+			( attachedTo, attachedToLCS, attachedByLCS, constrName ) = libIndex.getAttachment( tmpl, name )
+			parent = doc.getObject( copies.get( attachedTo, '' ) )
+			if parent:
+				attachLink( doc, link, parent.Name, parent.LinkedObject.Document.Name, attachedToLCS, attachedByLCS )
+			else:
+				# attached to the Model in the template, or to an LCS we didn't copy
+				attachLink( doc, link, 'Parent Assembly', None, lcs.Name, attachedByLCS )
+			tmplConstr = libConstraints.getConstraint( tmpl, constrName )
+			if tmplConstr:
+				libConstraints.makeConstraint( doc, link ).AttachmentOffset = tmplConstr.AttachmentOffset
+			copies[ name ] = link.Name
+			created += 1
+		copy += 1
+	libSolver.solveAssembly( doc, full=True )
+	path = os.path.join( outDir, doc.Name+'.FCStd' )
+	doc.saveAs( path )
+	closeAllDocuments()
+	return path
+
+
+
+"""
+    +-----------------------------------------------+
+    |   time one assembly: open, link resolution,   |
+    |   full, incremental, no-op, restored from the |
+    |          index and direct solve               |
+    +-----------------------------------------------+
+"""
+def benchmarkAssembly( path ):
+	timings = {}
+	closeAllDocuments()
+	libSolver.resetSolver()
+	( timings['open'], doc ) = timed( App.openDocument, path )
+	( timings['resolve'], graph ) = timed( resolveLinks, doc )
+	( timings['solve_full'], updated ) = timed( libSolver.solveAssembly, doc, full=True, direct=False )
+	( timings['solve_noop'], updated ) = timed( libSolver.solveAssembly, doc, direct=False )
+	# like after the document is opened again, with the placements saved in the index
+	libSolver.resetSolver( doc )
+	( timings['solve_restored'], updated ) = timed( libSolver.solveAssembly, doc, direct=False )
+	# move a link that nothing depends on, only it is solved again
+	children = libSolver.graphChildren( graph )
+	order = libSolver.sortGraph( graph )
+	leaves = [ name for name in order if graph[name].constr and not children[name] ]
+	if leaves:
+		constr = graph[ leaves[-1] ].constr
+		constr.AttachmentOffset = constr.AttachmentOffset.multiply( App.Placement( App.Vector(0,0,1), App.Rotation() ) )
+		( timings['solve_incremental'], updated ) = timed( libSolver.solveAssembly, doc, direct=False )
+	( timings['solve_direct'], updated ) = timed( libSolver.solveAssembly, doc, full=True, direct=True )
+	instances = len( doc.findObjects('App::Link') )
+	closeAllDocuments()
+	return ( instances, timings )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   run the benchmarks a number of times, and   |
+    |   return one record per assembly and metric   |
+    +-----------------------------------------------+
+"""
+def runBenchmarks( assemblies, repeat=3 ):
+	records = []
+	for ( kind, path ) in assemblies:
+		runs = {}
+		instances = 0
+		for i in range( repeat ):
+			( instances, timings ) = benchmarkAssembly( path )
+			for metric, seconds in timings.items():
+				runs.setdefault( metric, [] ).append( seconds )
+		for metric in sorted( runs ):
+			records.append( { 'assembly': os.path.basename( path ), 'kind': kind, 'instances': instances,
+							  'metric': metric, 'min': min( runs[metric] ),
+							  'mean': sum( runs[metric] ) / len( runs[metric] ), 'runs': len( runs[metric] ) } )
+			App.Console.PrintMessage( '%-28s %6d %-18s %10.4fs\n' % ( os.path.basename( path ), instances, metric, min( runs[metric] ) ) )
+	return records
+
+
+
+"""
+    +-----------------------------------------------+
+    |     write the results as JSON, or as CSV if   |
+    |        the file name ends with .csv           |
+    +-----------------------------------------------+
+"""
+def writeResults( records, path ):
+	if path.lower().endswith('.csv'):
+		columns = [ 'assembly', 'kind', 'instances', 'metric', 'min', 'mean', 'runs' ]
+		with open( path, 'w' ) as out:
+			out.write( ','.join( columns )+'\n' )
+			for record in records:
+				out.write( ','.join( str( record[col] ) for col in columns )+'\n' )
+	else:
+		report = { 'freecad': '.'.join( App.Version()[0:3] ),
+				   'python': platform.python_version(),
+				   'platform': platform.platform(),
+				   'date': time.strftime( '%Y-%m-%dT%H:%M:%S' ),
+				   'results': records }
+		with open( path, 'w' ) as out:
+			json.dump( report, out, indent=1 )
+
+
+
+"""
+    +-----------------------------------------------+
+    |             the command-line entry            |
+    +-----------------------------------------------+
+"""
+def main( argv=None ):
+	parser = argparse.ArgumentParser( prog='asm4Benchmark', description='Benchmark the Assembly4 examples' )
+	parser.add_argument( '--sizes', default=','.join( str( size ) for size in defaultSizes ),
+						 help='instance counts of the synthetic assemblies, 0 for none' )
+	parser.add_argument( '--template', default=exampleAssemblies[0],
+						 help='the example the synthetic assemblies are made from' )
+	parser.add_argument( '--generated', default='',
+						 help='instance counts of assemblies made by asm4Generator, like 1000,10000' )
+	parser.add_argument( '--depth', type=int, default=4, help='length of the link chains of the generated assemblies' )
+	parser.add_argument( '--assemblies', nargs='*', default=[], help='other assemblies to benchmark' )
+	parser.add_argument( '--repeat', type=int, default=3, help='runs per assembly, the best is kept' )
+	parser.add_argument( '--output', default='asm4_benchmark.json', help='results file, .json or .csv' )
+	parser.add_argument( '--work-dir', default='', help='where the synthetic assemblies are saved' )
+	args = parser.parse_args( argv if argv is not None else sys.argv[1:] )
+	assemblies = [ ( 'example', path ) for path in exampleAssemblies ]
+	workDir = args.work_dir or tempfile.mkdtemp( prefix='asm4bench_' )
+	for size in [ int( size ) for size in args.sizes.split(',') if int( size ) > 0 ]:
+		assemblies.append( ( 'synthetic', makeScaledAssembly( args.template, size, workDir ) ) )
+	for size in [ int( size ) for size in args.generated.split(',') if size ]:
+		closeAllDocuments()
+		path = asm4Generator.generateAssembly( workDir, size, args.depth, name='asm4_generated_'+str( size ) )
+		assemblies.append( ( 'generated', path ) )
+	assemblies.extend( ( 'file', path ) for path in args.assemblies )
+	records = runBenchmarks( assemblies, args.repeat )
+	writeResults( records, args.output )
+	return records
+
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# asm4Commands.py
+#
+# the commands of the workbench, registered as light proxies: the module
+# of a command is imported, and its dialog built, when it's first used
+
+
+import importlib
+
+import FreeCADGui as Gui
+import FreeCAD as App
+
+from libAsm4 import *
+
+
+
+"""
+    +-----------------------------------------------+
+    |   when a command can be used, tested without  |
+    |   importing its module. Once it's imported,   |
+    |   the command's own IsActive() is used        |
+    +-----------------------------------------------+
+"""
+def hasDocument():
+	return App.ActiveDocument is not None
+
+
+def hasModel():
+	return bool( App.ActiveDocument and App.ActiveDocument.getObject('Model') )
+
+
+def hasConstraints():
+	return bool( App.ActiveDocument and App.ActiveDocument.getObject('Constraints') )
+
+
+def hasPartialDocument():
+	return any( isPartial( doc ) for doc in App.listDocuments().values() )
+
+
+# an App::Part is selected, or nothing is and there is a Model
+def hasPartTarget():
+	if not App.ActiveDocument:
+		return False
+	selection = Gui.Selection.getSelection()
+	if selection:
+		return selection[0].TypeId == 'App::Part'
+	return hasModel()
+
+
+def hasSelectedLink():
+	selection = Gui.Selection.getSelection()
+	return bool( App.ActiveDocument and selection and selection[0].isDerivedFrom('App::Link') )
+
+
+def hasSelectedLinks():
+	return hasModel() and len( [ obj for obj in Gui.Selection.getSelection() if obj.isDerivedFrom('App::Link') ] ) > 1
+
+
+def hasSelectedDatum():
+	selection = Gui.Selection.getSelection()
+	return bool( App.ActiveDocument and selection and selection[0].TypeId in datumTypes )
+
+
+def always():
+	return True
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the commands: ( name, class, menu text,     |
+    |   tool-tip, icon, when it's active ), a       |
+    |   command is in the module of the same name   |
+    |   the texts are those of the commands'        |
+    |   GetResources(), the menus are built before  |
+    |   the modules are imported                    |
+    +-----------------------------------------------+
+"""
+commandTable = [
+	( 'loadPartCmd', 'loadPart', 'Load linked Part completely',
+	  'Load the whole document of the selected linked parts, or of all of them, to edit it', 'Link_Part.svg', hasPartialDocument ),
+	( 'newModelCmd', 'newModel', 'New Model',
+	  'Create a new Assembly4 Model', 'Asm4_Model.svg', hasDocument ),
+	( 'newBodyCmd', 'newBody', 'New Body',
+	  'Create a new Body in a Part', 'Asm4_Body.svg', hasPartTarget ),
+	( 'newPartCmd', 'newPart', 'New Part',
+	  'Create a new Part in the document', 'Asm4_Part.svg', hasDocument ),
+	( 'newSketchCmd', 'newSketch', 'New Sketch',
+	  'Create a new Sketch in a Part', 'Asm4_Sketch.svg', hasPartTarget ),
+	( 'newLCSCmd', 'newLCS', 'New LCS',
+	  'Create a new Coordinate System in a Part', 'Asm4_AxisCross.svg', hasPartTarget ),
+	( 'newPlaneCmd', 'newPlane', 'New Plane',
+	  'Create a new Datum Plane in a Part', 'Asm4_Plane.svg', hasPartTarget ),
+	( 'newPointCmd', 'newPoint', 'New Point',
+	  'Create a new Datum Point in a Part', 'Asm4_Point.svg', hasPartTarget ),
+	( 'insertLinkCmd', 'insertLink', 'Link an external Part',
+	  'Insert a link to external Part from another open document', 'Link_Part.svg', hasModel ),
+	( 'placeLinkCmd', 'placeLink', 'Edit Placement of a linked Part',
+	  'Move an instance of an external Part', 'Place_Link.svg', hasSelectedLink ),
+	( 'placeLinksCmd', 'placeLinks', 'Place several linked Parts',
+	  'Attach all the selected links in one go, for example on a series of LCS', 'Place_Link.svg', hasSelectedLinks ),
+	( 'importDatumCmd', 'importDatum', 'Import Datum object',
+	  'Import a Datum object from a linked Part', 'Import_Datum.svg', hasModel ),
+	( 'importDatumsCmd', 'importDatums', 'Import several Datum objects',
+	  'Import all the Datum objects, or those matching a pattern, of one or more linked Parts', 'Import_Datum.svg', hasModel ),
+	( 'placeDatumCmd', 'placeDatum', 'Edit Attachment of a Datum object',
+	  'Attach a Datum object to an external Part', 'Place_AxisCross.svg', hasSelectedDatum ),
+	( 'compactConstraintsCmd', 'compactConstraints', 'Compact constraints',
+	  'Store the constraints of the links in one table instead of one feature per link', 'Place_Link.svg', hasConstraints ),
+	( 'updateAssemblyCmd', 'updateAssembly', 'Solve and Update Assembly',
+	  'Solve all constraints and update Assembly', 'Solver.svg', hasDocument ),
+	( 'sweepCmd', 'sweep', 'Sweep the constraints',
+	  'Move the AttachmentOffset of some links across a range, and play the motion back', 'Place_Link.svg', hasModel ),
+	( 'interferenceCmd', 'interference', 'Check interferences',
+	  'Find the linked parts that intersect each other', 'Solver.svg', hasModel ),
+	( 'solveStatsCmd', 'solveStats', 'Solver statistics',
+	  'Show the time spent on each linked part and datum by the solves of the assembly', 'Solver.svg', hasModel ),
+	( 'profileReportCmd', 'profileReport', 'Profiling report',
+	  'Show where the time goes in the Assembly4 commands', 'Solver.svg', always ) ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the proxy of a command: it imports the      |
+    |   module and builds the real command when     |
+    |   it's activated the first time               |
+    +-----------------------------------------------+
+"""
+class commandProxy:
+
+	def __init__( self, moduleName, className, menuText, toolTip, icon, isActive ):
+		self.moduleName = moduleName
+		self.className = className
+		self.resources = { 'MenuText': menuText, 'ToolTip': toolTip, 'Pixmap': os.path.join( iconPath, icon ) }
+		self.isActive = isActive
+		self.command = None
+
+
+	def load( self ):
+		if self.command is None:
+			module = importlib.import_module( self.moduleName )
+			# time the command too, if profiling is enabled
+			import libProfiler
+			libProfiler.instrument( [ self.moduleName ] )
+			self.command = getattr( module, self.className )()
+		return self.command
+
+
+	def GetResources( self ):
+		return self.resources
+
+
+	def IsActive( self ):
+		if self.command is None:
+			return self.isActive()
+		return self.command.IsActive()
+
+
+	def Activated( self ):
+		command = self.load()
+		if command.IsActive():
+			command.Activated()
+
+
+
+def addCommands():
+	for ( name, className, menuText, toolTip, icon, isActive ) in commandTable:
+		Gui.addCommand( name, commandProxy( name, className, menuText, toolTip, icon, isActive ) )
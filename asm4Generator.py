@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# asm4Generator.py
+#
+# generate large, fully constrained Assembly4 assemblies for scale testing
+# this file doesn't use the GUI
+#
+# with FreeCADCmd, the workbench being installed in a Mod directory:
+#   FreeCADCmd -c "import asm4Generator; asm4Generator.main(['--instances','10000','--depth','6','--parts','20','out/'])"
+
+
+import os, sys, math, argparse
+from collections import deque
+
+import FreeCAD as App
+
+from libAsm4 import *
+import libSolver
+import libConstraints
+
+
+
+"""
+    +-----------------------------------------------+
+    |   make an external part document: a Model     |
+    |   with LCS_0 at the origin, lcsCount LCS on   |
+    |    a circle around it, and optionally a box   |
+    +-----------------------------------------------+
+"""
+def makePartDocument( name, lcsCount, outDir, shape=True, radius=50. ):
+	doc = App.newDocument( name )
+	model = makeModel( doc )
+	for i in range( lcsCount ):
+		angle = 360. * i / lcsCount
+		lcs = model.newObject( 'PartDesign::CoordinateSystem', 'LCS_'+str( i+1 ) )
+		position = App.Vector( radius*math.cos( math.radians( angle ) ), radius*math.sin( math.radians( angle ) ), 0 )
+		lcs.Placement = App.Placement( position, App.Rotation( App.Vector(0,0,1), angle ) )
+	if shape:
+		box = model.newObject( 'Part::Box', 'Box' )
+		box.Length = box.Width = box.Height = radius / 5.
+	doc.recompute()
+	# links can only point to documents saved to disk
+	doc.saveAs( os.path.join( outDir, name+'.FCStd' ) )
+	return doc
+
+
+
+"""
+    +-----------------------------------------------+
+    |   generate an assembly:                       |
+    |   instances : number of App::Link in total    |
+    |   depth     : length of the link chains       |
+    |   lcsCount  : LCS per part to attach to       |
+    |   fanOut    : links attached to each LCS      |
+    |   parts     : number of external documents    |
+    |                                               |
+    |   the chains start on a row of LCS in the     |
+    |   Model and grow breadth-first, every link    |
+    |   being attached by its LCS_0, with a         |
+    |   constraint and an expression, the           |
+    |   constraints are rows of the ConstraintTable |
+    |   if compact                                  |
+    |          returns the assembly's path          |
+    +-----------------------------------------------+
+"""
+def generateAssembly( outDir, instances=100, depth=3, lcsCount=3, fanOut=1, parts=5, shape=True, name='asm4_generated', spacing=500., compact=False ):
+	if not os.path.isdir( outDir ):
+		os.makedirs( outDir )
+	partDocs = [ makePartDocument( name+'_part'+str( i ), lcsCount, outDir, shape ) for i in range( max( parts, 1 ) ) ]
+	doc = App.newDocument( name )
+	model = makeModel( doc )
+	created = 0
+	roots = 0
+	# ( link, its depth in the chain )
+	pending = deque()
+	while created < instances:
+		part = partDocs[ created % len( partDocs ) ].getObject('Model')
+		# start a new chain on the Model
+		if not pending:
+			lcs = model.newObject( 'PartDesign::CoordinateSystem', 'LCS_root'+str( roots ) )
+			lcs.Placement = App.Placement( App.Vector( roots*spacing, 0, 0 ), App.Rotation() )
+			link = makeLink( doc, part, 'Instance_'+str( created ) )
+			attachLink( doc, link, 'Parent Assembly', None, lcs.Name, 'LCS_0', compact )
+			pending.append( ( link, 1 ) )
+			roots += 1
+			created += 1
+			continue
+		( parent, level ) = pending.popleft()
+		if level >= depth:
+			continue
+		# fanOut links on each LCS of the parent, shifted along Z
+		for i in range( lcsCount ):
+			for j in range( fanOut ):
+				if created == instances:
+					break
+				part = partDocs[ created % len( partDocs ) ].getObject('Model')
+				link = makeLink( doc, part, 'Instance_'+str( created ) )
+				attachLink( doc, link, parent.Name, parent.LinkedObject.Document.Name, 'LCS_'+str( i+1 ), 'LCS_0', compact )
+				libConstraints.getLinkConstraint( doc, link ).AttachmentOffset = App.Placement( App.Vector( 0, 0, 10.*j ), App.Rotation() )
+				pending.append( ( link, level+1 ) )
+				created += 1
+	libSolver.solveAssembly( doc, full=True )
+	path = os.path.join( outDir, name+'.FCStd' )
+	doc.saveAs( path )
+	return path
+
+
+
+"""
+    +-----------------------------------------------+
+    |             the command-line entry            |
+    +-----------------------------------------------+
+"""
+def main( argv=None ):
+	parser = argparse.ArgumentParser( prog='asm4Generator', description='Generate a large Assembly4 assembly' )
+	parser.add_argument( 'outDir', help='where the assembly and its parts are saved' )
+	parser.add_argument( '--instances', type=int, default=100, help='number of link instances' )
+	parser.add_argument( '--depth', type=int, default=3, help='length of the link chains' )
+	parser.add_argument( '--lcs', type=int, default=3, help='LCS per part that links are attached to' )
+	parser.add_argument( '--fan-out', type=int, default=1, help='links attached to each LCS' )
+	parser.add_argument( '--parts', type=int, default=5, help='number of external part documents' )
+	parser.add_argument( '--no-shape', action='store_true', help="don't put a box in the parts" )
+	parser.add_argument( '--name', default='asm4_generated', help='name of the assembly document' )
+	parser.add_argument( '--compact', action='store_true', help='store the constraints in a ConstraintTable' )
+	args = parser.parse_args( argv if argv is not None else sys.argv[1:] )
+	path = generateAssembly( args.outDir, args.instances, args.depth, args.lcs, args.fan_out,
+							 args.parts, not args.no_shape, args.name, compact=args.compact )
+	App.Console.PrintMessage( 'Generated '+path+'\n' )
+	return path
+
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# compactConstraintsCmd.py
+#
+# store the constraints of the links in one ConstraintTable, or in
+# one constr_* feature per link
+
+
+from PySide import QtGui, QtCore
+import FreeCAD as App
+
+from libAsm4 import *
+import libIndex
+import libSolver
+import libConstraints
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class compactConstraints( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(compactConstraints,self).__init__()
+
+
+	def GetResources(self):
+		return {"MenuText": "Compact constraints",
+				"ToolTip": "Store the constraints of the links in one table instead of one feature per link",
+				"Pixmap" : os.path.join( iconPath , 'Place_Link.svg')
+				}
+
+
+	def IsActive(self):
+		if App.ActiveDocument and App.ActiveDocument.getObject('Constraints'):
+			return(True)
+		return(False)
+
+
+	def Activated(self):
+		# get the current active document to avoid errors if user changes tab
+		self.activeDoc = App.activeDocument()
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+		self.compactCheck.setChecked( libConstraints.isCompact() )
+		self.onRefresh()
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   count the links using each kind of storage  |
+    +-----------------------------------------------+
+	"""
+	def onRefresh(self):
+		features = 0
+		rows = 0
+		for link in libIndex.getLinkedParts( self.activeDoc ):
+			attachment = libIndex.getAttachment( self.activeDoc, link.Name )
+			if not attachment or not attachment[3]:
+				continue
+			if constraintRow.match( attachment[3] ):
+				rows += 1
+			else:
+				features += 1
+		self.status.setText( str( features )+' links with a constr_* feature\n'
+							 + str( rows )+' links in the ConstraintTable' )
+
+
+	def onCompact( self, state ):
+		App.ParamGet( paramPath ).SetBool( 'CompactConstraints', self.compactCheck.isChecked() )
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   move the constraints, in one undo step      |
+    +-----------------------------------------------+
+	"""
+	def moveConstraints( self, name, function ):
+		self.activeDoc.openTransaction( name )
+		try:
+			moved = function( self.activeDoc )
+			# the expressions changed, not the placements
+			libSolver.solveAssembly( self.activeDoc )
+		except Exception:
+			# don't leave the expressions half moved
+			self.activeDoc.abortTransaction()
+			raise
+		self.activeDoc.commitTransaction()
+		self.onRefresh()
+		return moved
+
+
+	def onToTable(self):
+		moved = self.moveConstraints( 'Move constraints to table', libConstraints.moveToTable )
+		self.message.setText( str( moved )+' constraints moved to the table' )
+
+
+	def onToFeatures(self):
+		moved = self.moveConstraints( 'Move constraints to features', libConstraints.moveToFeatures )
+		self.message.setText( str( moved )+' constraints moved to features' )
+
+
+	def onPurge(self):
+		freed = self.moveConstraints( 'Purge constraint table', libConstraints.purgeTable )
+		self.message.setText( str( freed )+' unused rows freed' )
+
+
+	def onClose(self):
+		self.close()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Compact constraints')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(440, 240)
+		self.resize(440,240)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# the mode for the new links, it's remembered in the preferences
+		self.compactCheck = QtGui.QCheckBox( 'Use the ConstraintTable for new links', self )
+		self.compactCheck.move(10,10)
+		self.compactCheck.setToolTip('New links get a row in the table instead of a constr_* feature')
+
+		# where the constraints are now
+		self.status = QtGui.QLabel(self)
+		self.status.setMinimumSize(420, 40)
+		self.status.move(10,45)
+
+		# messages
+		self.message = QtGui.QLabel(self)
+		self.message.setMinimumSize(420, 20)
+		self.message.move(10,160)
+
+		# Buttons
+		self.toTableButton = QtGui.QPushButton('To table', self)
+		self.toTableButton.setToolTip('Move the constr_* features of all the links into the table')
+		self.toTableButton.move(10, 110)
+		self.toFeaturesButton = QtGui.QPushButton('To features', self)
+		self.toFeaturesButton.setToolTip('Move the rows of the table back into constr_* features')
+		self.toFeaturesButton.move(120, 110)
+		self.purgeButton = QtGui.QPushButton('Purge', self)
+		self.purgeButton.setToolTip('Free the rows of the links that were deleted')
+		self.purgeButton.move(230, 110)
+		self.closeButton = QtGui.QPushButton('Close', self)
+		self.closeButton.setDefault(True)
+		self.closeButton.move(340, 200)
+
+		# Actions
+		self.compactCheck.stateChanged.connect(self.onCompact)
+		self.toTableButton.clicked.connect(self.onToTable)
+		self.toFeaturesButton.clicked.connect(self.onToFeatures)
+		self.purgeButton.clicked.connect(self.onPurge)
+		self.closeButton.clicked.connect(self.onClose)
@@ -10,6 +10,8 @@ import FreeCAD as App
 import Part, math, re
 
 from libAsm4 import *
+import libIndex
+import libGui
 
 
 
@@ -25,6 +27,7 @@ class importDatum( QtGui.QDialog ):
 	def __init__(self):
 		super(importDatum,self).__init__()
 		self.datumTable = [ ]
+		self.session = None
 
 
 	def GetResources(self):
@@ -58,20 +61,17 @@ class importDatum( QtGui.QDialog ):
 		self.drawUI()
 
 
-		# We get all the App::Link parts in the assembly 
-		self.asmParts = []
-		# the first item is "Select linked Part" therefore we add an empty object
-		self.asmParts.append( [] )
-		# find all the linked parts in the assembly
-		for obj in self.activeDoc.findObjects("App::Link"):
-			if obj.LinkedObject.isDerivedFrom('App::Part'):
-				# add it to our tree table if it's a link to an App::Part ...
-				self.asmParts.append( obj )
-				# ... and add to the drop-down combo box with the assembly tree's parts
-				objIcon = obj.LinkedObject.ViewObject.Icon
-				self.parentList.addItem( objIcon, obj.Name, obj)
+		# We get all the App::Link parts in the assembly, after "Please select ..."
+		# the combo-box gets its rows when they're shown
+		self.parentList.blockSignals( True )
+		self.parentList.model().setObjects( libIndex.getLinkedParts( self.activeDoc ),
+			[ ( 'Please select ...', None, None, None ) ] )
 		# Set the list to the first element
 		self.parentList.setCurrentIndex( 0 )
+		self.parentList.blockSignals( False )
+
+		# all the datums imported until OK or Cancel are one undo step
+		self.session = libGui.editSession( self.activeDoc, 'Import Datums' )
 
 
 		# Now we can show the UI
@@ -94,8 +94,8 @@ class importDatum( QtGui.QDialog ):
 		# get the name of the part to attach to:
 		# it's either the top level part name ('Model')
 		# or the provided link's name.
-		if self.parentList.currentIndex() > 0:
-			parent = self.asmParts[ self.parentList.currentIndex() ]
+		parent = libGui.selectedData( self.parentList )
+		if parent:
 			linkName = parent.Name
 			linkedPart = parent.LinkedObject.Document.Name
 		else:
@@ -103,10 +103,7 @@ class importDatum( QtGui.QDialog ):
 			linkedPart = None
 
 		# check that something is selected in the datum list
-		if self.datumList.selectedItems():
-			datum = self.datumTable[ self.datumList.currentRow() ]
-		else:
-			datum = None
+		datum = libGui.selectedData( self.datumList )
 
 		# the name of the datum in the assembly, as per the dialog box
 		setDatumName = self.datumName.text()
@@ -116,21 +113,17 @@ class importDatum( QtGui.QDialog ):
 			self.datumName.setText( 'Please select a Datum object' )
 		else:
 			# create the Datum
-			if datum.TypeId == 'PartDesign::CoordinateSystem' or datum.TypeId == 'PartDesign::Point':
-				#createdLink = self.activeDoc.getObject('Model').newObject( 'App::Link', linkName )
-				createdDatum = App.activeDocument().getObject('Model').newObject( datum.TypeId, setDatumName )
-				self.datumName.setText( '=> ' +createdDatum.Name )
-			else:
+			if datum.TypeId not in datumTypes:
 				self.datumName.setText( 'unsupported Datum::Type' )
 				return
-			# build the expression to the linked datum (not the datumName in the assembly !)
-			expr = makeExpressionDatum( linkName, linkedPart, datum.Name )
-			# load the built expression into the Expression field of the datum created in the assembly
-			self.activeDoc.getObject( createdDatum.Name ).setExpression( 'Placement', expr )
-			# recompute the object to apply the placement:
-			createdDatum.recompute()
+			# with the expression to the linked datum (not the datumName in the assembly !)
+			# and its entry in the assembly's index
+			createdDatum = makeImportedDatum( self.activeDoc, parent, datum, setDatumName )
+			self.datumName.setText( '=> ' +createdDatum.Name )
+			# recompute the object to apply the placement, once the UI is idle
+			self.session.touch( createdDatum )
 			# clear the selection in the datum list
-			self.datumList.setCurrentRow( -1 )
+			libGui.selectRow( self.datumList, -1 )
 		return
 
 
@@ -142,15 +135,7 @@ class importDatum( QtGui.QDialog ):
     +-----------------------------------------------+
 	"""
 	def getLinkDatums( self, link ):
-		linkDatums = [ ]
-		# parse all objects in the part (they return strings)
-		for objName in link.getSubObjects():
-			# get the proper objects
-			# all object names end with a "." , this needs to be removed
-			obj = link.getObject( objName[0:-1] )
-			if obj.TypeId == 'PartDesign::CoordinateSystem' or obj.TypeId == 'PartDesign::Point':
-				linkDatums.append( obj )
-		return linkDatums
+		return getPartDatums( link )
 
 
 
@@ -160,28 +145,23 @@ class importDatum( QtGui.QDialog ):
     +------------------------------------------------+
 	"""
 	def onParentList(self):
-		# clear the LCS list
-		self.datumList.clear()
+		self.datumTable = []
 		self.datumName.setText( '' )
 		# clear the selection in the GUI window
 		Gui.Selection.clearSelection()
 		# if something is selected in the linked parts list
-		if self.parentList.currentIndex() > 0:
-			parent = self.asmParts[ self.parentList.currentIndex() ]
+		parent = libGui.selectedData( self.parentList )
+		if parent:
 			# we get all the datum objects from the linked part
-			self.datumTable = self.getLinkDatums( parent.LinkedObject )
+			self.datumTable = self.getLinkDatums( loadLinkedPart( parent ) )
 			self.parentDoc.setText( parent.LinkedObject.Document.Name )
 			# highlight the selected part:
 			Gui.Selection.addSelection( parent.Document.Name, 'Model', parent.Name+'.' )
-		# build the datum objects names list
-			for datum in self.datumTable:
-				newItem = QtGui.QListWidgetItem()
-				if datum.Name == datum.Label:
-					newItem.setText( datum.Name )
-				else:
-					newItem.setText( datum.Label + ' (' +datum.Name+ ')' )
-				newItem.setIcon( datum.ViewObject.Icon )
-				self.datumList.addItem( newItem )
+		# build the datum objects names list, which is cleared with its search field
+		self.datumSearch.blockSignals( True )
+		self.datumSearch.clear()
+		self.datumSearch.blockSignals( False )
+		self.datumList.model().setObjects( self.datumTable )
 		return
 
 
@@ -195,10 +175,11 @@ class importDatum( QtGui.QDialog ):
 	"""
 	def onDatumClicked( self ):
 		# LCS in the parent
-		datum = self.datumTable[ self.datumList.currentRow() ]
+		datum = libGui.selectedData( self.datumList )
 		#a_LCS = self.datumList.selectedItems()[0].text()
 		# pre-fill the Datum name with the Label of the selected Datum
-		self.datumName.setText( datum.Label )
+		if datum:
+			self.datumName.setText( datum.Label )
 		return
 
 
@@ -206,10 +187,11 @@ class importDatum( QtGui.QDialog ):
 	"""
     +-----------------------------------------------+
     |                     Cancel                    |
-    |           restores the previous values        |
+    |      removes the datums imported so far       |
     +-----------------------------------------------+
 	"""
 	def onCancel(self):
+		self.session.abort()
 		self.close()
 
 
@@ -221,9 +203,22 @@ class importDatum( QtGui.QDialog ):
 	"""
 	def onOK(self):
 		self.onApply()
+		self.session.commit()
 		self.close()
 
 
+
+	"""
+    +-----------------------------------------------+
+    |   closing the window keeps the changes made   |
+    +-----------------------------------------------+
+	"""
+	def closeEvent( self, event ):
+		if self.session:
+			self.session.commit()
+		super(importDatum,self).closeEvent( event )
+
+
 	"""
     +-----------------------------------------------+
     |     defines the UI, only static elements      |
@@ -244,30 +239,36 @@ class importDatum( QtGui.QDialog ):
 		self.linkLabel.setText("Select a linked Part:")
 		self.linkLabel.move(10,20)
 		# combobox showing all available App::Link 
-		self.parentList = QtGui.QComboBox(self)
-		self.parentList.move(10,55)
+		self.parentList = libGui.makeComboBox(self)
+		self.parentList.move(10,78)
 		self.parentList.setMinimumSize(380, 1)
-		# initialize with an explanation
-		self.parentList.addItem( 'Please select ...' )
+		# search the linked parts by label or name
+		self.parentSearch = libGui.makeSearchField( self, self.parentList, self.onParentList )
+		self.parentSearch.setMinimumSize(380, 1)
+		self.parentSearch.move(10,45)
 
 		# label
 		self.parentLabel = QtGui.QLabel(self)
 		self.parentLabel.setText("Parent Document (for info):")
-		self.parentLabel.move(10,100)
+		self.parentLabel.move(10,112)
 		# the document containing the linked object
 		self.parentDoc = QtGui.QLineEdit(self)
 		self.parentDoc.setReadOnly(True)
 		self.parentDoc.setMinimumSize(330, 1)
-		self.parentDoc.move(30,130)
+		self.parentDoc.move(30,137)
 		# label
 		self.labelRight = QtGui.QLabel(self)
 		self.labelRight.setText("Select Datum object to import :")
-		self.labelRight.move(10,180)
-		# The list of all attachment LCS in the assembly is a QListWidget
+		self.labelRight.move(10,175)
+		# The list of all the datums of the linked part
 		# it is populated only when the parent combo-box is activated
-		self.datumList = QtGui.QListWidget(self)
-		self.datumList.move(10,220)
-		self.datumList.setMinimumSize(380, 220)
+		self.datumList = libGui.makeListView(self)
+		self.datumList.move(10,235)
+		self.datumList.setMinimumSize(380, 205)
+		# search the datums by label or name
+		self.datumSearch = libGui.makeSearchField( self, self.datumList )
+		self.datumSearch.setMinimumSize(380, 1)
+		self.datumSearch.move(10,202)
 
 		# imported Link name
 		self.datumLabel = QtGui.QLabel(self)
@@ -302,13 +303,4 @@ class importDatum( QtGui.QDialog ):
 		self.ApplyButton.clicked.connect(self.onApply)
 		#self.OKButton.clicked.connect(self.onOK)
 		self.parentList.currentIndexChanged.connect( self.onParentList )
-		self.datumList.itemClicked.connect( self.onDatumClicked )
-
-
-
-"""
-    +-----------------------------------------------+
-    |       add the command to the workbench        |
-    +-----------------------------------------------+
-"""
-Gui.addCommand( 'importDatumCmd', importDatum() )
+		self.datumList.clicked.connect( self.onDatumClicked )
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# importDatumsCmd.py
+#
+# import many datums of one or more linked parts at once, like the
+# LCS of a skeleton
+
+
+from PySide import QtGui, QtCore
+import FreeCADGui as Gui
+import FreeCAD as App
+import re
+
+from libAsm4 import *
+import libIndex
+import libSolver
+import libGui
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the columns of the table, one row per datum |
+    +-----------------------------------------------+
+"""
+columns = [ 'Link', 'Datum', 'Imported name' ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class importDatums( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(importDatums,self).__init__()
+		self.rows = []
+
+
+	def GetResources(self):
+		return {"MenuText": "Import several Datum objects",
+				"ToolTip": "Import all the Datum objects, or those matching a pattern, of one or more linked Parts",
+				"Pixmap" : os.path.join( iconPath , 'Import_Datum.svg')
+				}
+
+
+	def IsActive(self):
+		# is there an active document with an Asm4 Model ?
+		if App.ActiveDocument and App.ActiveDocument.getObject('Model'):
+			return True
+		return False
+
+
+	"""
+    +-----------------------------------------------+
+    |                 the real stuff                |
+    +-----------------------------------------------+
+	"""
+	def Activated(self):
+		# get the current active document to avoid errors if user changes tab
+		self.activeDoc = App.activeDocument()
+		self.links = libIndex.getLinkedParts( self.activeDoc )
+		self.rows = []
+
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+
+		# the linked parts, those selected in the 3D view are selected here too,
+		# the list gets its rows when they're shown
+		self.partList.model().setObjects( self.links )
+		selected = Gui.Selection.getSelection()
+		libGui.selectDataList( self.partList, [ link for link in self.links if link in selected ] )
+
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   the datums of the selected links that match |
+    |   the pattern, by name or by label, and that  |
+    |            were not imported already          |
+    +-----------------------------------------------+
+	"""
+	def onFill( self ):
+		try:
+			regex = re.compile( self.patternInput.text() )
+		except re.error as err:
+			self.message.setText( 'Invalid pattern : '+str( err ) )
+			return
+		# what's already imported, as ( link, datum in the linked part )
+		index = libIndex.getIndex( self.activeDoc, create=False )
+		imported = set()
+		if index:
+			( attachedTo, attachedToLCS ) = ( index.AttachedTo, index.AttachedToLCS )
+			imported = set( ( attachedTo[ name ], attachedToLCS.get( name, '' ) ) for name in index.Datums if name in attachedTo )
+		selected = libGui.selectedDataList( self.partList )
+		prefix = self.prefixCheck.isChecked()
+		self.rows = []
+		skipped = 0
+		for link in selected:
+			datums = getPartDatums( loadLinkedPart( link ) )
+			for datum in sorted( datums, key=lambda datum: naturalKey( datum.Name ) ):
+				if not ( regex.fullmatch( datum.Name ) or regex.fullmatch( datum.Label ) ):
+					continue
+				if ( link.Name, datum.Name ) in imported:
+					skipped += 1
+					continue
+				name = link.Name+'_'+datum.Label if prefix else datum.Label
+				self.rows.append( ( link, datum, name ) )
+		self.datumTable.setRowCount( len( self.rows ) )
+		for row, ( link, datum, name ) in enumerate( self.rows ):
+			for col, text in enumerate( [ link.Name, datum.Name, name ] ):
+				item = QtGui.QTableWidgetItem( text )
+				# only the name can be changed
+				if col < 2:
+					item.setFlags( item.flags() & ~QtCore.Qt.ItemIsEditable )
+				self.datumTable.setItem( row, col, item )
+		message = str( len( self.rows ) )+' datums to import from '+str( len( selected ) )+' parts'
+		if skipped:
+			message += ', '+str( skipped )+' already imported'
+		self.message.setText( message )
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   import all the datums of the table in one   |
+    |   transaction, and recompute them only once   |
+    +-----------------------------------------------+
+	"""
+	def onApply( self ):
+		if not self.rows:
+			self.message.setText( 'Nothing to import, fill the table first' )
+			return False
+		self.activeDoc.openTransaction( 'Import '+str( len( self.rows ) )+' datums' )
+		try:
+			for row, ( link, datum, name ) in enumerate( self.rows ):
+				makeImportedDatum( self.activeDoc, link, datum, self.datumTable.item( row, 2 ).text().strip() or datum.Label )
+			libSolver.solveAssembly( self.activeDoc )
+		except Exception:
+			# remove the datums imported so far, the next edits aren't part of it
+			self.activeDoc.abortTransaction()
+			raise
+		self.activeDoc.commitTransaction()
+		self.message.setText( str( len( self.rows ) )+' datums imported' )
+		self.rows = []
+		self.datumTable.setRowCount( 0 )
+		return True
+
+
+
+	"""
+    +-----------------------------------------------+
+    |                 OK and Cancel                 |
+    +-----------------------------------------------+
+	"""
+	def onOK(self):
+		if self.onApply():
+			self.close()
+
+
+	def onCancel(self):
+		self.close()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Import Datum objects')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(600, 640)
+		self.resize(600,640)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# the linked parts to import from
+		self.partLabel = QtGui.QLabel(self)
+		self.partLabel.setText("Linked Parts :")
+		self.partLabel.move(10,20)
+		self.partList = libGui.makeListView(self)
+		self.partList.setSelectionMode( QtGui.QAbstractItemView.ExtendedSelection )
+		self.partList.move(10,45)
+		self.partList.setMinimumSize(200, 270)
+		self.partList.setToolTip('The linked parts whose datums are imported')
+
+		# which datums
+		self.patternLabel = QtGui.QLabel(self)
+		self.patternLabel.setText("Datum pattern :")
+		self.patternLabel.move(230,50)
+		self.patternInput = QtGui.QLineEdit(self)
+		self.patternInput.setText('.*')
+		self.patternInput.setMinimumSize(240, 1)
+		self.patternInput.move(350,45)
+		self.patternInput.setToolTip('A regular expression matching the names or the labels of the datums to import')
+
+		self.prefixCheck = QtGui.QCheckBox( "Prefix the names with the link's name", self )
+		self.prefixCheck.move(230,90)
+		self.prefixCheck.setToolTip('Give unique names to the datums of parts that have the same ones')
+
+		self.fillButton = QtGui.QPushButton('Fill table', self)
+		self.fillButton.setAutoDefault(False)
+		self.fillButton.move(230, 130)
+
+		# the datums to import
+		self.datumTable = QtGui.QTableWidget( 0, len( columns ), self )
+		self.datumTable.setHorizontalHeaderLabels( columns )
+		self.datumTable.horizontalHeader().setStretchLastSection( True )
+		self.datumTable.move(10,330)
+		self.datumTable.setMinimumSize(580, 200)
+		self.datumTable.setToolTip('The datums to import, their names can be edited')
+
+		# messages
+		self.message = QtGui.QLabel(self)
+		self.message.setMinimumSize(580, 40)
+		self.message.setAlignment( QtCore.Qt.AlignTop )
+		self.message.move(10,545)
+
+		# Buttons
+		self.CancelButton = QtGui.QPushButton('Cancel', self)
+		self.CancelButton.setAutoDefault(False)
+		self.CancelButton.move(10, 600)
+
+		self.ApplyButton = QtGui.QPushButton('Apply', self)
+		self.ApplyButton.setAutoDefault(False)
+		self.ApplyButton.move(400, 600)
+
+		self.OKButton = QtGui.QPushButton('OK', self)
+		self.OKButton.setAutoDefault(True)
+		self.OKButton.move(500, 600)
+		self.OKButton.setDefault(True)
+
+		# Actions
+		self.fillButton.clicked.connect(self.onFill)
+		self.CancelButton.clicked.connect(self.onCancel)
+		self.ApplyButton.clicked.connect(self.onApply)
+		self.OKButton.clicked.connect(self.onOK)
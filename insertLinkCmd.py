@@ -10,6 +10,8 @@ import FreeCAD as App
 import Part, math, re
 
 from libAsm4 import *
+import libCatalog
+import libGui
 
 
 """
@@ -53,31 +55,77 @@ class insertLink( QtGui.QDialog ):
 		self.drawUI()
 		
 		# Search for all App::Parts in all open documents
-		self.allParts = []
+		self.openParts = []
 		for doc in App.listDocuments().values():
 			# except this document: we don't want to link to itself
 			if doc != self.activeDoc:
 				parts = doc.findObjects("App::Part")
 				# there might be more than 1 App::Part per document
 				for obj in parts:
-					self.allParts.append( obj )
-		
+					self.openParts.append( obj )
+
+		# and the parts in the library, as they were last scanned
+		self.catalog = libCatalog.loadCatalog()
+
 		# build the list
-		for part in self.allParts:
-			newItem = QtGui.QListWidgetItem()
-			if part.Name == part.Label:
-				partText = part.Name 
-			else:
-				partText = part.Label + ' (' +part.Name+ ')' 
-			newItem.setText( part.Document.Name +"#"+ partText )
-			newItem.setIcon(part.ViewObject.Icon)
-			self.partList.addItem(newItem)
+		self.fillPartList()
 
 		# show the UI
 		self.show()
 
 
 
+	"""
+    +-----------------------------------------------+
+    |   fill the list with the open parts, and the  |
+    |   library parts in files that are not open,   |
+    |   the search text filters them in the list    |
+    +-----------------------------------------------+
+	"""
+	def fillPartList( self ):
+		# the list holds App::Parts and ( path, name ) of library parts
+		rows = []
+		openFiles = []
+		for part in self.openParts:
+			if part.Document.FileName:
+				openFiles.append( os.path.abspath( part.Document.FileName ) )
+			rows.append( ( part.Document.Name +"#"+ libGui.objectText( part ), part, part, None ) )
+		libraryIcon = QtGui.QIcon( os.path.join( iconPath , 'Asm4_Model.svg' ) )
+		for ( path, name, label ) in libCatalog.searchCatalog( self.catalog ):
+			if os.path.abspath( path ) in openFiles:
+				continue
+			if name == label:
+				partText = name
+			else:
+				partText = label + ' (' +name+ ')'
+			rows.append( ( os.path.basename( path ) +"#"+ partText, ( path, name ), libraryIcon, path ) )
+		self.partList.model().setRows( rows )
+		libGui.filterView( self.partList, self.searchInput.text() )
+
+
+
+	"""
+    +-----------------------------------------------+
+    |  scan the library directories for new files   |
+    +-----------------------------------------------+
+	"""
+	def onScanLibrary( self ):
+		paths = libCatalog.getLibraryPaths()
+		if not paths:
+			libPath = QtGui.QFileDialog.getExistingDirectory( self, 'Select the parts library directory' )
+			if not libPath:
+				return
+			paths = [ libPath ]
+			libCatalog.setLibraryPaths( paths )
+		QtGui.QApplication.setOverrideCursor( QtCore.Qt.WaitCursor )
+		try:
+			self.catalog = libCatalog.scanCatalog( paths, self.catalog )
+		finally:
+			QtGui.QApplication.restoreOverrideCursor()
+		self.fillPartList()
+
+
+
 	"""
     +-----------------------------------------------+
     |         the real stuff happens here           |
@@ -86,18 +134,19 @@ class insertLink( QtGui.QDialog ):
 	def onCreateLink(self):
 		# parse the selected items 
 		# TODO : there should only be 1
-		model = []
-		for selected in self.partList.selectedIndexes():
-			# get the selected part
-			model = self.allParts[ selected.row() ]
+		model = libGui.selectedData( self.partList )
 		# get the name of the link (as it should appear in the tree)
 		linkName = self.linkNameInput.text()
 		# only create link if there is a Part object and a name
+		# a part from the library, only its document is opened
+		if model and not hasattr( model, 'Document' ):
+			( path, name ) = model
+			model = libCatalog.openPartFile( path ).getObject( name )
+			# opening a document makes it the active one
+			App.setActiveDocument( self.activeDoc.Name )
 		if model and linkName:
-			# create the App::Link with the user-provided name
-			createdLink = self.activeDoc.getObject('Model').newObject( 'App::Link', linkName )
-			# assigne the user-selected model to it
-			createdLink.LinkedObject = model
+			# create the App::Link with the user-provided name to the user-selected model
+			createdLink = makeLink( self.activeDoc, model, linkName )
 			# update the link
 			createdLink.recompute()
 			
@@ -115,17 +164,23 @@ class insertLink( QtGui.QDialog ):
 
 
 	def onItemClicked( self, item ):
-		for selected in self.partList.selectedIndexes():
-			# get the selected part
-			part = self.allParts[ selected.row() ]
-			# if the App::Part has been renamed by the user, we suppose it's important
-			# thus we append the Label to the link's name
-			# this might happen if there are multiple App::Parts in a document
-			appendLabel = ''
-			if part.Name != part.Label:
-				appendLabel = '_'+part.Label
-            # set the text of the link to be made to the document where the part is in
-			self.linkNameInput.setText(part.Document.Name+appendLabel)
+		# get the selected part
+		part = libGui.selectedData( self.partList )
+		if not part:
+			return
+		# a part from the library, not open
+		if not hasattr( part, 'Document' ):
+			( path, name ) = part
+			self.linkNameInput.setText( os.path.splitext( os.path.basename( path ) )[0] )
+			return
+		# if the App::Part has been renamed by the user, we suppose it's important
+		# thus we append the Label to the link's name
+		# this might happen if there are multiple App::Parts in a document
+		appendLabel = ''
+		if part.Name != part.Label:
+			appendLabel = '_'+part.Label
+		# set the text of the link to be made to the document where the part is in
+		self.linkNameInput.setText(part.Document.Name+appendLabel)
 
 
 
@@ -175,16 +230,29 @@ class insertLink( QtGui.QDialog ):
 		self.linkNameInput.setMinimumSize(380, 0)
 		self.linkNameInput.move(10, 400)
 	
-		# The part list is a QListWidget
-		self.partList = QtGui.QListWidget(self)
-		self.partList.move(10,50)
-		self.partList.setMinimumSize(380, 280)
+		# search the parts by name
+		self.searchInput = QtGui.QLineEdit(self)
+		self.searchInput.setMinimumSize(380, 0)
+		self.searchInput.move(10, 50)
+		self.searchInput.setPlaceholderText('Search')
+		self.searchInput.setToolTip('Only list the parts whose file, name or label contain these words')
+
+		# The part list, filled when it's shown
+		self.partList = libGui.makeListView(self)
+		self.partList.move(10,85)
+		self.partList.setMinimumSize(380, 245)
 
 		# Cancel button
 		self.CancelButton = QtGui.QPushButton('Cancel', self)
 		self.CancelButton.setAutoDefault(False)
 		self.CancelButton.move(10, 460)
 
+		# scan the library button
+		self.scanButton = QtGui.QPushButton('Scan library', self)
+		self.scanButton.setAutoDefault(False)
+		self.scanButton.setToolTip('Look for new and modified parts in the library directories')
+		self.scanButton.move(140, 460)
+
 		# create Link button
 		self.createLinkButton = QtGui.QPushButton('Insert part', self)
 		self.createLinkButton.move(285, 460)
@@ -193,13 +261,6 @@ class insertLink( QtGui.QDialog ):
 		# Actions
 		self.CancelButton.clicked.connect(self.onCancel)
 		self.createLinkButton.clicked.connect(self.onCreateLink)
-		self.partList.itemClicked.connect( self.onItemClicked)
-
-
-"""
-    +-----------------------------------------------+
-    |       add the command to the workbench        |
-    +-----------------------------------------------+
-"""
-Gui.addCommand( 'insertLinkCmd', insertLink() )
-
+		self.partList.clicked.connect( self.onItemClicked)
+		self.searchInput.textChanged.connect( lambda text: libGui.filterView( self.partList, text ) )
+		self.scanButton.clicked.connect( self.onScanLibrary )
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# interferenceCmd.py
+#
+# find the linked parts of the assembly that intersect each other
+
+
+from PySide import QtGui, QtCore
+import FreeCADGui as Gui
+import FreeCAD as App
+
+from libAsm4 import *
+import libInterference
+
+
+
+"""
+    +-----------------------------------------------+
+    |         the columns of the table              |
+    +-----------------------------------------------+
+"""
+columns = [ 'Link', 'Link', 'Volume (mm3)' ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class interference( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(interference,self).__init__()
+
+
+	def GetResources(self):
+		return {"MenuText": "Check interferences",
+				"ToolTip": "Find the linked parts that intersect each other",
+				"Pixmap" : os.path.join( iconPath , 'Solver.svg')
+				}
+
+
+	def IsActive(self):
+		if App.ActiveDocument and App.ActiveDocument.getObject('Model'):
+			return(True)
+		return(False)
+
+
+	def Activated(self):
+		# get the current active document to avoid errors if user changes tab
+		self.activeDoc = App.activeDocument()
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   check the assembly, only what moved since   |
+    |   the last check if asked to                  |
+    +-----------------------------------------------+
+	"""
+	def onCheck(self):
+		QtGui.QApplication.setOverrideCursor( QtCore.Qt.WaitCursor )
+		try:
+			result = libInterference.checkAssembly( self.activeDoc, self.incrementalCheck.isChecked() )
+		finally:
+			QtGui.QApplication.restoreOverrideCursor()
+		self.table.setSortingEnabled( False )
+		self.table.setRowCount( len( result.clashes ) )
+		for row, clash in enumerate( result.clashes ):
+			for col, value in enumerate( clash ):
+				item = QtGui.QTableWidgetItem()
+				if col == 2 and value < 0:
+					# the boolean failed, the parts may still intersect
+					item.setData( QtCore.Qt.DisplayRole, 'failed' )
+				elif col == 2:
+					item.setData( QtCore.Qt.DisplayRole, round( value, 3 ) )
+				else:
+					item.setData( QtCore.Qt.DisplayRole, value )
+				item.setFlags( item.flags() & ~QtCore.Qt.ItemIsEditable )
+				self.table.setItem( row, col, item )
+		self.table.setSortingEnabled( True )
+		self.table.resizeColumnsToContents()
+		self.message.setText( str( len( result.clashes ) )+' interferences between '+str( result.links )+' links, '
+							  +str( result.touched )+' changed, '+str( result.candidates )+' pairs of boxes overlapping, '
+							  +str( result.tested )+' tested in '+str( round( result.elapsed, 2 ) )+' s' )
+
+
+	# select the links of the selected rows, to see them in the 3D view
+	def onSelect(self):
+		Gui.Selection.clearSelection()
+		for row in set( index.row() for index in self.table.selectedIndexes() ):
+			for col in range( 2 ):
+				obj = self.activeDoc.getObject( self.table.item( row, col ).text() )
+				if obj:
+					Gui.Selection.addSelection( obj )
+
+
+	def onReset(self):
+		libInterference.resetChecks( self.activeDoc )
+		self.table.setRowCount( 0 )
+		self.message.setText( 'The next check tests all the links' )
+
+
+	def onClose(self):
+		self.close()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Assembly4 interferences')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(600, 480)
+		self.resize(600,480)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# options
+		self.incrementalCheck = QtGui.QCheckBox( 'Only test the links changed since the last check', self )
+		self.incrementalCheck.setChecked( True )
+		self.incrementalCheck.move(10,10)
+
+		# the interferences
+		self.table = QtGui.QTableWidget( 0, len( columns ), self )
+		self.table.setHorizontalHeaderLabels( columns )
+		self.table.setSelectionBehavior( QtGui.QAbstractItemView.SelectRows )
+		self.table.horizontalHeader().setStretchLastSection( True )
+		self.table.move(10,40)
+		self.table.setMinimumSize(580, 340)
+
+		# messages
+		self.message = QtGui.QLabel(self)
+		self.message.setMinimumSize(580, 40)
+		self.message.setWordWrap( True )
+		self.message.move(10,385)
+
+		# Buttons
+		self.checkButton = QtGui.QPushButton('Check', self)
+		self.checkButton.setDefault(True)
+		self.checkButton.move(10, 440)
+		self.selectButton = QtGui.QPushButton('Select', self)
+		self.selectButton.setToolTip('Select the links of the selected rows')
+		self.selectButton.move(120, 440)
+		self.resetButton = QtGui.QPushButton('Reset', self)
+		self.resetButton.setToolTip('Forget the last check, the next one tests all the links')
+		self.resetButton.move(230, 440)
+		self.closeButton = QtGui.QPushButton('Close', self)
+		self.closeButton.move(490, 440)
+
+		# Actions
+		self.checkButton.clicked.connect(self.onCheck)
+		self.selectButton.clicked.connect(self.onSelect)
+		self.resetButton.clicked.connect(self.onReset)
+		self.closeButton.clicked.connect(self.onClose)
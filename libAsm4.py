@@ -10,8 +10,14 @@
     +-----------------------------------------------+
 """
 constraintPrefix = 'constr_'
+constraintTable = 'ConstraintTable'
+paramPath = 'User parameter:BaseApp/Preferences/Mod/Assembly4'
+datumTypes = [ 'PartDesign::CoordinateSystem', 'PartDesign::Point' ]
 
-import os
+import os, re, zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple, OrderedDict
+from functools import lru_cache
 __dir__ = os.path.dirname(__file__)
 iconPath = os.path.join( __dir__, 'Resources/icons' )
 
@@ -33,7 +39,8 @@ def makeExpressionPart( attLink, attPart, attLCS, constrName, linkedPart, linkLC
 		# https://forum.freecadweb.org/viewtopic.php?f=17&t=38974&p=337784#p337784
 		# expr = ParentLink.Placement * ParentPart#LCS.Placement * constr_LinkName.AttachmentOffset * LinkedPart#LCS.Placement ^ -1
 		# expr = LCS_in_the_assembly.Placement * constr_LinkName.AttachmentOffset * LinkedPart#LCS.Placement ^ -1
-		expr = attLCS+'.Placement * '+constrName+'.AttachmentOffset * '+linkedPart+'#'+linkLCS+'.Placement ^ -1'
+		# the constraint's AttachmentOffset can also be a row of the ConstraintTable
+		expr = attLCS+'.Placement * '+constraintOffset( constrName )+' * '+linkedPart+'#'+linkLCS+'.Placement ^ -1'
 		# if we're attached to another sister part (and not the Parent Assembly)
 		# we need to take into account the Placement of that Part.
 		if attPart:
@@ -45,6 +52,130 @@ def makeExpressionPart( attLink, attPart, attLCS, constrName, linkedPart, linkLC
 
 
 
+"""
+    +-----------------------------------------------+
+    |     the decoded Placement expressions of a    |
+    |      linked App::Part and of a Datum object   |
+    +-----------------------------------------------+
+"""
+partExpression  = namedtuple( 'partExpression',  'attLink attPart attLCS constraint linkedPart linkLCS' )
+datumExpression = namedtuple( 'datumExpression', 'attLink attPart attLCS' )
+
+# how many decoded expressions are remembered
+expressionCacheSize = 4096
+
+# an object's name, possibly quoted as <<name>>
+exprName = r'(?:<<[^<>]*>>|[A-Za-z_][A-Za-z0-9_]*)'
+# one factor of the product, like Doc#LCS.Placement, Link.<<LCS.>>.Placement,
+# constr_Name.AttachmentOffset, ConstraintTable.AttachmentOffsets[12],
+# followed by an optional inversion
+exprFactor = re.compile( r'(?:(?P<doc>'+exprName+r')#)?(?P<obj>'+exprName+r')?'
+						 r'(?P<sub>(?:\.<<[^<>]*>>)*)\.(?P<prop>Placement|AttachmentOffsets\[\d+\]|AttachmentOffset)'
+						 r'(?P<inv>\s*\^\s*-1|\.inverse\(\s*\))?' )
+# what's left once the factors are replaced by F:
+# FreeCAD v0.19 : F * F * F
+# FreeCAD v0.18 : F.multiply(F).multiply(F)
+exprProduct = re.compile( r'^F(?:\*F)*$|^F(?:\.multiply\(F\))*$' )
+
+# a constraint is a constr_* feature, or a row of the compact table: ConstraintTable[12]
+constraintRow = re.compile( r'^(?P<table>'+exprName+r')\[(?P<row>\d+)\]$' )
+
+
+
+"""
+    +-----------------------------------------------+
+    |  the AttachmentOffset of a constraint, as it  |
+    |          is written in the expressions        |
+    +-----------------------------------------------+
+"""
+def constraintOffset( constrName ):
+	match = constraintRow.match( constrName )
+	if match:
+		return match.group('table')+'.AttachmentOffsets['+match.group('row')+']'
+	return constrName+'.AttachmentOffset'
+
+
+
+"""
+    +-----------------------------------------------+
+    |   split an expression into its factors, as    |
+    |    ( doc, object, LCS, property, inverted,    |
+    |    sub-object ), returns None if it's not a   |
+    |                   product                     |
+    +-----------------------------------------------+
+"""
+def unquote( name ):
+	if name.startswith('<<') and name.endswith('>>'):
+		name = name[2:-2]
+	# sub-objects end with a '.'
+	return name.rstrip('.')
+
+
+@lru_cache( maxsize=expressionCacheSize )
+def tokenizeExpression( expr ):
+	factors = []
+	for match in exprFactor.finditer( expr ):
+		doc = unquote( match.group('doc') or '' )
+		obj = unquote( match.group('obj') or '' )
+		# Link.<<LCS.>> : the LCS is a sub-object of the link
+		subs = match.group('sub').split('.<<')
+		lcs = unquote( '<<'+subs[-1] ) if len(subs) > 1 else obj
+		factors.append( ( doc, obj, lcs, match.group('prop'), bool( match.group('inv') ), len(subs) > 1 ) )
+	rest = re.sub( r'\s', '', exprFactor.sub( 'F', expr ) )
+	if not factors or not exprProduct.match( rest ):
+		return None
+	return tuple( factors )
+
+
+
+"""
+    +-----------------------------------------------+
+    |  decode the ExpressionEngine of a linked part |
+    |   returns a partExpression, or None if the    |
+    |     expression can't be decoded. The parent   |
+    |     Assembly has attLink 'Parent Assembly'    |
+    +-----------------------------------------------+
+"""
+@lru_cache( maxsize=expressionCacheSize )
+def parseExpressionPart( expr ):
+	factors = tokenizeExpression( expr )
+	if not factors:
+		return None
+	# Link.<<LCS.>>.Placement doesn't name the document of the LCS, it
+	# couldn't be written back: it's not decoded, and never taken for an
+	# LCS of the parent assembly
+	if any( factor[5] for factor in factors ):
+		return None
+	offsets = [ i for i, factor in enumerate( factors ) if factor[3].startswith('AttachmentOffset') ]
+	if len( offsets ) != 1:
+		return None
+	before = factors[ :offsets[0] ]
+	constraint = factors[ offsets[0] ]
+	after = factors[ offsets[0]+1: ]
+	# the LCS of the linked part, inverted
+	if len( after ) != 1 or not after[0][4] or after[0][3] != 'Placement':
+		return None
+	( linkedPart, obj, linkLCS, prop, inv, sub ) = after[0]
+	if not linkedPart or any( factor[4] for factor in before ) or constraint[4]:
+		return None
+	if len( before ) == 1 and not before[0][0]:
+		# expr = LCS_in_the_assembly.Placement * constr_Name.AttachmentOffset * LinkedPart#LCS.Placement ^ -1
+		attLink = 'Parent Assembly'
+		attPart = ''
+		attLCS = before[0][2]
+	elif len( before ) == 2 and not before[0][0] and before[1][0]:
+		# expr = ParentLink.Placement * ParentPart#LCS.Placement * constr_Name.AttachmentOffset * LinkedPart#LCS.Placement ^ -1
+		attLink = before[0][1]
+		attPart = before[1][0]
+		attLCS = before[1][2]
+	else:
+		return None
+	# AttachmentOffsets[12] of the ConstraintTable is the constraint ConstraintTable[12]
+	constrName = constraint[1] + constraint[3][ len('AttachmentOffsets'): ]
+	return partExpression( attLink, attPart, attLCS, constrName, linkedPart, linkLCS )
+
+
+
 """
     +-----------------------------------------------+
     |  split the ExpressionEngine of a linked part  |
@@ -53,42 +184,18 @@ def makeExpressionPart( attLink, attPart, attLCS, constrName, linkedPart, linkLC
     |   and the old target LCS in the linked Part   |
     +-----------------------------------------------+
 """
-def splitExpressionPart( expr, parent ):
-		# expr = ParentLink.Placement * ParentPart#LCS.Placement * constr_LinkName.AttachmentOffset * LinkedPart#LCS.Placement ^ -1'			
+def splitExpressionPart( expr, parent=None ):
+	# the parent isn't needed anymore to decode the expression, it's kept for compatibility
 	bad_EE = ( '', 'None', 'None', 'None', 'None', 'None')
 	if not expr:
 		return ( 'Empty expression x1', 'None', 'None', 'None', 'None', 'None')
-	if parent == 'Parent Assembly':
-		# we're attached to an LCS in the parent assembly
-		# expr = LCS_in_the_assembly.Placement * constr_Name.AttachmentOffset * LinkedPart#LCS.Placement ^ -1'			
-		( attLCS, separator, rest1 ) = expr.partition('.Placement * ')
-		( constrName, separator, rest2 ) = rest1.partition('.AttachmentOffset * ')
-		( linkedPart, separator, rest3 ) = rest2.partition('#')
-		( linkLCS, separator, rest4 ) = rest3.partition('.Placement ^ ')
-		restFinal = rest4[0:2]
-		attLink = parent
-		attPart = 'None'
-		#return ( restFinal, 'None', 'None', 'None', 'None', 'None')
-	else:
-		# we're attached to an LCS in a sister part
-		# expr = ParentLink.Placement * ParentPart#LCS.Placement * constr_Name.AttachmentOffset * LinkedPart#LCS.Placement ^ -1'			
-		( attLink,    separator, rest1 ) = expr.partition('.Placement * ')
-		( attPart,    separator, rest2 ) = rest1.partition('#')
-		( attLCS,     separator, rest3 ) = rest2.partition('.Placement * ')
-		( constrName, separator, rest4 ) = rest3.partition('.AttachmentOffset * ')
-		( linkedPart, separator, rest5 ) = rest4.partition('#')
-		( linkLCS,    separator, rest6 ) = rest5.partition('.Placement ^ ')
-		restFinal = rest6[0:2]
-		#return ( restFinal, 'None', 'None', 'None', 'None', 'None')
-	if restFinal=='-1':
-		# wow, everything went according to plan
-		# retval = ( expr, attPart, attLCS, constrLink, partLCS )
-		retval = ( attLink, attPart, attLCS, constrName, linkedPart, linkLCS)
-	else:
+	parsed = parseExpressionPart( expr )
+	if not parsed:
 		# rats ! Didn't succeed in decoding the ExpressionEngine.
-		# But still, if the decode is unsuccessful, put some text
-		retval = bad_EE
-	return retval
+		return bad_EE
+	# wow, everything went according to plan
+	( attLink, attPart, attLCS, constrName, linkedPart, linkLCS ) = parsed
+	return ( attLink, attPart or 'None', attLCS, constrName, linkedPart, linkLCS )
 
 
 
@@ -110,6 +217,27 @@ def makeExpressionDatum( attLink, attPart, attLCS ):
 
 
 
+"""
+    +-----------------------------------------------+
+    | decode the ExpressionEngine of a Datum object |
+    |   returns a datumExpression, or None if the   |
+    |        expression can't be decoded            |
+    +-----------------------------------------------+
+"""
+@lru_cache( maxsize=expressionCacheSize )
+def parseExpressionDatum( expr ):
+	factors = tokenizeExpression( expr )
+	# expr = Link.Placement * LinkedPart#LCS.Placement
+	if not factors or len( factors ) != 2:
+		return None
+	if any( factor[3] != 'Placement' or factor[4] or factor[5] for factor in factors ):
+		return None
+	if factors[0][0] or not factors[1][0]:
+		return None
+	return datumExpression( factors[0][1], factors[1][0], factors[1][2] )
+
+
+
 """
     +-----------------------------------------------+
     |           split the ExpressionEngine          |
@@ -118,18 +246,371 @@ def makeExpressionDatum( attLink, attPart, attLCS ):
     +-----------------------------------------------+
 """
 def splitExpressionDatum( expr ):
-	# expr = Link.Placement * LinkedPart#LCS.Placement
-	( attLink, separator, rest1 ) = expr.partition('.Placement * ')
-	( attPart, separator, rest2 ) = rest1.partition('#')
-	( attLCS,  separator, rest3 ) = rest2.partition('.')
-	restFinal = rest3[0:9]
-	if restFinal=='Placement':
+	parsed = parseExpressionDatum( expr ) if expr else None
+	if parsed:
 		# wow, everything went according to plan
-		retval = ( attLink, attPart, attLCS )
-		#self.expression.setText( attPart +'***'+ attLCS )
+		retval = ( parsed.attLink, parsed.attPart or 'None', parsed.attLCS )
 	else:
 		# rats ! But still, if the decode is unsuccessful, put some text
-		retval = ( restFinal, 'None', 'None' )
+		retval = ( '', 'None', 'None' )
 	return retval
 
 
+
+"""
+    +-----------------------------------------------+
+    |   get the expression driving the Placement    |
+    |      of an object, or '' if there is none     |
+    +-----------------------------------------------+
+"""
+def getPlacementExpression( obj ):
+	# the ExpressionEngine is a list of ( path, expression ) tuples
+	for ( path, expr ) in obj.ExpressionEngine:
+		if path == 'Placement' or path == '.Placement':
+			return expr
+	return ''
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the datums found in an App::Part, cached    |
+    |   per part until its document changes, so     |
+    |   that browsing the parents in the dialogs    |
+    |   doesn't walk large parts again and again    |
+    +-----------------------------------------------+
+"""
+# all the datum types the dialogs can list
+datumListTypes = datumTypes + [ 'PartDesign::Plane' ]
+
+# ( document name, part name ) : [ ( object name, TypeId ) ]
+datumCache = {}
+datumObserver = None
+
+
+# the datums of types in a part, in the order of the part's tree
+def getPartDatums( part, types=datumTypes ):
+	watchDatums()
+	key = ( part.Document.Name, part.Name )
+	datums = datumCache.get( key )
+	if datums is None:
+		datums = []
+		# parse all objects in the part (they return strings)
+		for objName in part.getSubObjects():
+			# all object names end with a "." , this needs to be removed
+			obj = part.getObject( objName[0:-1] )
+			if obj and obj.TypeId in datumListTypes:
+				datums.append( ( obj.Name, obj.TypeId ) )
+		datumCache[ key ] = datums
+	doc = part.Document
+	return [ doc.getObject( name ) for ( name, typeId ) in datums if typeId in types and doc.getObject( name ) ]
+
+
+# forget the cached datums of a document, or of all documents
+def clearDatumCache( docName=None ):
+	if docName is None:
+		datumCache.clear()
+		return
+	for key in [ key for key in datumCache if key[0] == docName ]:
+		del datumCache[ key ]
+
+
+# any change to the objects or the tree of a document invalidates its parts
+class datumCacheObserver():
+	def slotCreatedObject( self, obj ):
+		clearDatumCache( obj.Document.Name )
+
+	def slotDeletedObject( self, obj ):
+		clearDatumCache( obj.Document.Name )
+
+	def slotChangedObject( self, obj, prop ):
+		# the labels are read from the objects, only the tree matters
+		if prop == 'Group':
+			clearDatumCache( obj.Document.Name )
+
+	def slotUndoDocument( self, doc ):
+		clearDatumCache( doc.Name )
+
+	def slotRedoDocument( self, doc ):
+		clearDatumCache( doc.Name )
+
+	def slotDeletedDocument( self, doc ):
+		clearDatumCache( doc.Name )
+
+	def slotRelabelDocument( self, doc ):
+		clearDatumCache()
+
+
+# the observer is registered the first time the cache is used
+def watchDatums():
+	global datumObserver
+	if datumObserver is None:
+		import FreeCAD as App
+		datumObserver = datumCacheObserver()
+		App.addDocumentObserver( datumObserver )
+
+
+
+
+"""
+    +-----------------------------------------------+
+    |   read the objects of an FCStd file without   |
+    |   loading it in FreeCAD: Document.xml is      |
+    |   streamed out of the archive and parsed      |
+    |   incrementally, and the reading stops as     |
+    |   soon as all the wanted objects are read     |
+    |                                               |
+    |   types : the TypeIds of the wanted objects   |
+    |   properties=False only reads the names and   |
+    |   types, which are at the top of the file     |
+    |                                               |
+    |   returns { name: fileObject } in file order  |
+    +-----------------------------------------------+
+"""
+fileObject = namedtuple( 'fileObject', 'name type label placement group' )
+
+# the objects read by default: the parts and the datums in them
+fileObjectTypes = [ 'App::Part' ] + datumListTypes
+# how much of the archive is decompressed at a time
+fileChunkSize = 65536
+
+# the attributes of a PropertyPlacement: position and quaternion
+placementAttributes = [ 'Px', 'Py', 'Pz', 'Q0', 'Q1', 'Q2', 'Q3' ]
+
+
+def readDocumentObjects( path, types=fileObjectTypes, properties=True ):
+	objects = OrderedDict()
+	parser = ET.XMLPullParser( events=( 'start', 'end' ) )
+	section = None
+	pending = set()
+	current = None
+	with zipfile.ZipFile( path ) as archive:
+		with archive.open('Document.xml') as xmlFile:
+			for chunk in iter( lambda: xmlFile.read( fileChunkSize ), b'' ):
+				parser.feed( chunk )
+				for ( event, elem ) in parser.read_events():
+					tag = elem.tag
+					if event == 'start':
+						if tag in [ 'Objects', 'ObjectData' ] and section is None:
+							section = tag
+						elif tag == 'Object' and section == 'Objects' and elem.get('type') in types:
+							objects[ elem.get('name') ] = fileObject( elem.get('name'), elem.get('type'), elem.get('name'), None, [] )
+						elif tag == 'Object' and section == 'ObjectData' and elem.get('name') in pending:
+							current = elem.get('name')
+						continue
+					# the end of an element, it's complete
+					if tag == 'Objects' and section == 'Objects':
+						section = None
+						pending = set( objects )
+						if not properties or not pending:
+							return objects
+					elif tag == 'Property' and current:
+						readFileProperty( objects, current, elem )
+					elif tag == 'Object' and section == 'ObjectData':
+						if current:
+							pending.discard( current )
+							current = None
+							if not pending:
+								return objects
+						# don't keep what's been read
+						elem.clear()
+	return objects
+
+
+# the files linked by an FCStd file, from its <XLink file="..."> elements,
+# as absolute paths
+def readLinkedFiles( path ):
+	files = []
+	parser = ET.XMLPullParser( events=( 'start', 'end' ) )
+	with zipfile.ZipFile( path ) as archive:
+		with archive.open('Document.xml') as xmlFile:
+			for chunk in iter( lambda: xmlFile.read( fileChunkSize ), b'' ):
+				parser.feed( chunk )
+				for ( event, elem ) in parser.read_events():
+					if event == 'start' and elem.tag == 'XLink' and elem.get('file'):
+						linked = os.path.normpath( os.path.join( os.path.dirname( os.path.abspath( path ) ), elem.get('file') ) )
+						if linked not in files:
+							files.append( linked )
+					elif event == 'end' and elem.tag == 'Object':
+						elem.clear()
+	return files
+
+
+# the Label, Placement and Group of an object from its <Property> element
+def readFileProperty( objects, name, prop ):
+	propName = prop.get('name')
+	if propName == 'Label':
+		value = prop.find('String')
+		if value is not None:
+			objects[ name ] = objects[ name ]._replace( label=value.get('value') )
+	elif propName == 'Placement':
+		value = prop.find('PropertyPlacement')
+		if value is not None:
+			placement = tuple( float( value.get( attr, 0 ) ) for attr in placementAttributes )
+			objects[ name ] = objects[ name ]._replace( placement=placement )
+	elif propName == 'Group':
+		objects[ name ] = objects[ name ]._replace( group=[ link.get('value') for link in prop.iter('Link') ] )
+
+
+
+
+"""
+    +-----------------------------------------------+
+    |   partial loading: by default, FreeCAD only   |
+    |   loads the objects of the linked documents   |
+    |   that the links of the assembly need, a      |
+    |   linked document is loaded completely when   |
+    |   it's going to be edited                     |
+    +-----------------------------------------------+
+"""
+def isPartial( doc ):
+	return bool( getattr( doc, 'Partial', False ) )
+
+
+# opening a partially loaded document again reloads it completely
+def loadFully( doc ):
+	import FreeCAD as App
+	if not isPartial( doc ):
+		return doc
+	return App.openDocument( doc.FileName )
+
+
+# the App::Part linked by a link, with its document completely loaded
+def loadLinkedPart( link ):
+	if link.LinkedObject and isPartial( link.LinkedObject.Document ):
+		loadFully( link.LinkedObject.Document )
+	return link.LinkedObject
+
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the building blocks of an assembly, shared  |
+    |    by the commands and the headless tools     |
+    |  libIndex needs FreeCAD, it's imported here   |
+    |     only when an assembly is being edited     |
+    +-----------------------------------------------+
+"""
+# create the Model of an Assembly4 document
+# the attachment index is only created when something is attached in it
+def makeModel( doc ):
+	doc.Tip = doc.addObject('App::Part','Model')
+	model = doc.getObject('Model')
+	model.newObject('App::DocumentObjectGroup','Constraints')
+	model.newObject('PartDesign::CoordinateSystem','LCS_0')
+	return model
+
+
+# create an App::Link to an App::Part in the Model, not yet attached
+def makeLink( doc, part, linkName ):
+	import libIndex
+	# create the App::Link with the user-provided name
+	link = doc.getObject('Model').newObject( 'App::Link', linkName )
+	# assign the selected part to it
+	link.LinkedObject = part
+	# add it, not yet attached, to the assembly's index
+	libIndex.setEntry( doc, link, '', '' )
+	return link
+
+
+# create the constr_LinkName for an App::Link object
+def makeConstrFeature( doc, link ):
+	# get the name of the App::Link
+	linkName = link.Name
+	# the name of the constraint:
+	constrName = constraintPrefix + linkName
+	constraints = doc.getObject('Constraints')
+	# if it exists, return the existing constrFeature
+	# TODO : check that it's of the correct type ?
+	if constraints.getObject( constrName ):
+		return constraints.getObject( constrName )
+	# if it didn't exist, create it ...
+	constrFeature = constraints.newObject( 'App::FeaturePython', constrName )
+	# ...and create the property fields
+	#
+	# Store the type of solver to use
+	constrFeature.addProperty( 'App::PropertyString', 'Solver' )
+	constrFeature.Solver = 'ExpressionEngine'
+	# Store the type of the constraint
+	constrFeature.addProperty( 'App::PropertyString', 'ConstraintType' )
+	constrFeature.ConstraintType = 'AttachmentByLCS'
+	# Enabled ?
+	constrFeature.addProperty( 'App::PropertyBool', 'Enabled' )
+	constrFeature.Enabled = True
+	# store the name of the inserted Part's instance
+	constrFeature.addProperty( 'App::PropertyString', 'Instance', 'Attachment' )
+	constrFeature.Instance = linkName
+	# store the name of the LCS in the assembly where the link is attached to
+	constrFeature.addProperty( 'App::PropertyString', 'AttachedByLCS', 'Attachment' )
+	# store the name of the part where the link is attached to
+	constrFeature.addProperty( 'App::PropertyString', 'AttachedTo', 'Attachment' )
+	# store the name of the LCS in the assembly where the link is attached to
+	constrFeature.addProperty( 'App::PropertyString', 'AttachedToLCS', 'Attachment' )
+	# add an App::Placement that will be the offset between attachment and link LCS
+	constrFeature.addProperty( 'App::PropertyPlacement', 'AttachmentOffset', 'Attachment' )
+	# store the name of the App::Link this constraint refers-to
+	constrFeature.addProperty( 'App::PropertyString', 'LinkName', 'Information' )
+	constrFeature.LinkName = linkName
+	# store the name of the linked document (only for information)
+	constrFeature.addProperty( 'App::PropertyString', 'LinkedPart', 'Information' )
+	constrFeature.LinkedPart = link.LinkedObject.Document.Name
+	# store the name of the linked file (only for information)
+	constrFeature.addProperty( 'App::PropertyString', 'LinkedFile', 'Information' )
+	constrFeature.LinkedFile = link.LinkedObject.Document.FileName
+	# return
+	return constrFeature
+
+
+# attach a link by its LCS l_LCS to the LCS a_LCS of the 'Parent Assembly'
+# or of the sister link a_Link whose document is a_Part.
+# Fills the constraint, the ExpressionEngine and the index, doesn't recompute.
+# The constraint is a row of the ConstraintTable if compact, by default
+# if the CompactConstraints parameter is set, and a constr_* feature otherwise
+def attachLink( doc, link, a_Link, a_Part, a_LCS, l_LCS, compact=None ):
+	import libIndex, libConstraints
+	l_Part = link.LinkedObject.Document.Name
+	if not ( a_Link and a_LCS and l_Part and l_LCS ):
+		return False
+	# fill the constraint. Create it if it doesn't exist:
+	constrFeature = libConstraints.makeConstraint( doc, link, compact )
+	c_Name = libConstraints.referenceOf( constrFeature )
+	expr = makeExpressionPart( a_Link, a_Part, a_LCS, c_Name, l_Part, l_LCS )
+	# store the part where we're attached to in the constraints object
+	constrFeature.AttachedByLCS = '#'+l_LCS
+	constrFeature.AttachedTo = a_Link
+	constrFeature.AttachedToLCS = '#'+a_LCS
+	# load the expression into the link's Expression Engine
+	link.setExpression('Placement', expr )
+	# and keep the assembly's index up-to-date
+	libIndex.setEntry( doc, link, a_Link, a_LCS, l_LCS, c_Name )
+	return expr
+
+
+# create in the Model a copy of the datum of a linked part, attached to it
+# by the expression Link.Placement * LinkedPart#Datum.Placement
+# Fills the ExpressionEngine and the index, doesn't recompute.
+def makeImportedDatum( doc, link, datum, name ):
+	import libIndex
+	createdDatum = doc.getObject('Model').newObject( datum.TypeId, name )
+	expr = makeExpressionDatum( link.Name, link.LinkedObject.Document.Name, datum.Name )
+	createdDatum.setExpression( 'Placement', expr )
+	libIndex.setEntry( doc, createdDatum, link.Name, datum.Name )
+	return createdDatum
+
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the names in a list matching a pattern, in  |
+    |   natural order: LCS_2 comes before LCS_10    |
+    +-----------------------------------------------+
+"""
+def naturalKey( name ):
+	return [ int( part ) if part.isdigit() else part for part in re.split( r'(\d+)', name ) ]
+
+
+def matchNames( names, pattern ):
+	regex = re.compile( pattern )
+	return sorted( [ name for name in names if regex.fullmatch( name ) ], key=naturalKey )
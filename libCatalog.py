@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libCatalog.py
+#
+# a catalog of the parts found in library directories, kept on disk,
+# to insert parts from files that are not open
+# this file doesn't use the GUI
+
+
+import os, json, zipfile
+import xml.etree.ElementTree as ET
+
+import FreeCAD as App
+
+from libAsm4 import *
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the library directories are in the          |
+    |   LibraryPaths parameter, separated by ;      |
+    |   the catalog is a JSON file in the user's    |
+    |   FreeCAD directory:                          |
+    |   { path: { 'mtime', 'size', 'parts':         |
+    |     [ [ name, label, [ LCS names ] ] ] } }    |
+    +-----------------------------------------------+
+"""
+catalogVersion = 1
+catalogFile = 'Assembly4_catalog.json'
+partExtensions = [ '.fcstd' ]
+
+
+def getLibraryPaths():
+	paths = App.ParamGet( paramPath ).GetString( 'LibraryPaths', '' )
+	return [ path.strip() for path in paths.split(';') if path.strip() ]
+
+
+def setLibraryPaths( paths ):
+	App.ParamGet( paramPath ).SetString( 'LibraryPaths', ';'.join( paths ) )
+
+
+def getCatalogPath():
+	return os.path.join( App.getUserAppDataDir(), catalogFile )
+
+
+
+"""
+    +-----------------------------------------------+
+    |     load and save the catalog, an outdated    |
+    |     or unreadable file is an empty catalog    |
+    +-----------------------------------------------+
+"""
+def loadCatalog( path=None ):
+	try:
+		with open( path or getCatalogPath() ) as catalogJson:
+			catalog = json.load( catalogJson )
+	except ( IOError, ValueError ):
+		return {}
+	if catalog.get( 'version' ) != catalogVersion:
+		return {}
+	return catalog.get( 'files', {} )
+
+
+def saveCatalog( catalog, path=None ):
+	path = path or getCatalogPath()
+	# write a new file and replace the old one, never leave a partial file
+	with open( path+'.tmp', 'w' ) as catalogJson:
+		json.dump( { 'version': catalogVersion, 'files': catalog }, catalogJson )
+	os.replace( path+'.tmp', path )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   read the App::Parts of an FCStd file and    |
+    |   the LCS at their root, without opening it   |
+    +-----------------------------------------------+
+"""
+def readPartFile( path ):
+	objects = readDocumentObjects( path, [ 'App::Part', 'PartDesign::CoordinateSystem' ] )
+	parts = []
+	for obj in objects.values():
+		if obj.type == 'App::Part':
+			lcs = [ child for child in obj.group if child in objects and objects[ child ].type != 'App::Part' ]
+			parts.append( [ obj.name, obj.label, lcs ] )
+	return parts
+
+
+
+"""
+    +-----------------------------------------------+
+    |   scan the library directories, only the new  |
+    |   and modified files are read, the catalog    |
+    |   is saved if anything changed                |
+    |   returns the catalog                         |
+    +-----------------------------------------------+
+"""
+def scanCatalog( paths=None, catalog=None, save=True ):
+	if paths is None:
+		paths = getLibraryPaths()
+	if catalog is None:
+		catalog = loadCatalog()
+	found = {}
+	changed = False
+	for libPath in paths:
+		for ( dirPath, dirNames, fileNames ) in os.walk( os.path.expanduser( libPath ) ):
+			for fileName in fileNames:
+				if os.path.splitext( fileName )[1].lower() not in partExtensions:
+					continue
+				filePath = os.path.abspath( os.path.join( dirPath, fileName ) )
+				try:
+					stat = os.stat( filePath )
+				except OSError:
+					continue
+				entry = catalog.get( filePath )
+				if not entry or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+					try:
+						parts = readPartFile( filePath )
+					except ( zipfile.BadZipfile, KeyError, ET.ParseError, IOError ) as err:
+						App.Console.PrintWarning( 'Assembly4 : can\'t read '+filePath+' : '+str( err )+'\n' )
+						parts = []
+					entry = { 'mtime': stat.st_mtime, 'size': stat.st_size, 'parts': parts }
+					changed = True
+				found[ filePath ] = entry
+	# files that were removed, or are no longer in the library
+	if len( found ) != len( catalog ):
+		changed = True
+	if changed and save:
+		saveCatalog( found )
+	return found
+
+
+
+"""
+    +-----------------------------------------------+
+    |   search the catalog: the words of the text   |
+    |   must all be found in the file name or in    |
+    |   the part's name or label                    |
+    |   returns [ ( path, name, label ) ]           |
+    +-----------------------------------------------+
+"""
+def searchCatalog( catalog, text='' ):
+	words = text.lower().split()
+	results = []
+	for path in sorted( catalog ):
+		fileName = os.path.basename( path ).lower()
+		for ( name, label, lcs ) in catalog[ path ]['parts']:
+			haystack = fileName+' '+name.lower()+' '+label.lower()
+			if all( word in haystack for word in words ):
+				results.append( ( path, name, label ) )
+	return results
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the document of a file, opened if needed    |
+    +-----------------------------------------------+
+"""
+def openPartFile( path ):
+	for doc in App.listDocuments().values():
+		if doc.FileName and os.path.abspath( doc.FileName ) == os.path.abspath( path ):
+			return doc
+	return App.openDocument( path )
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libConstraints.py
+#
+# the attachment constraints of the links: one constr_* feature per link,
+# or, in compact mode, one row per link in a single ConstraintTable
+# this file doesn't use the GUI
+
+
+from contextlib import contextmanager
+
+import FreeCAD as App
+
+from libAsm4 import *
+import libIndex
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the ConstraintTable is an App::Feature-     |
+    |   Python in the Constraints group, with one   |
+    |   list property per field of the constr_*     |
+    |   features, and one row per link              |
+    |                                               |
+    |   the expressions use its rows as             |
+    |   ConstraintTable.AttachmentOffsets[12]       |
+    |   and the index as ConstraintTable[12]. Rows  |
+    |   never move, a row without Instance is free  |
+    +-----------------------------------------------+
+"""
+tableColumns = [ ( 'Instances',         'App::PropertyStringList' ),
+				 ( 'AttachedByLCS',     'App::PropertyStringList' ),
+				 ( 'AttachedTo',        'App::PropertyStringList' ),
+				 ( 'AttachedToLCS',     'App::PropertyStringList' ),
+				 ( 'AttachmentOffsets', 'App::PropertyPlacementList' ),
+				 ( 'Enabled',           'App::PropertyBoolList' ),
+				 ( 'LinkedParts',       'App::PropertyStringList' ),
+				 ( 'LinkedFiles',       'App::PropertyStringList' ) ]
+
+# the table grows by this many free rows at a time
+tableBlock = 64
+
+
+# new links get a row in the table if the CompactConstraints parameter is set
+def isCompact():
+	return App.ParamGet( paramPath ).GetBool( 'CompactConstraints', False )
+
+
+def getTable( doc, create=False ):
+	table = doc.getObject( constraintTable )
+	if table or not create:
+		return table
+	return createTable( doc )
+
+
+def createTable( doc ):
+	constraints = doc.getObject('Constraints')
+	if not constraints:
+		return None
+	table = constraints.newObject( 'App::FeaturePython', constraintTable )
+	table.addProperty( 'App::PropertyString', 'Solver' )
+	table.Solver = 'ExpressionEngine'
+	table.addProperty( 'App::PropertyString', 'ConstraintType' )
+	table.ConstraintType = 'AttachmentByLCS'
+	for ( column, propType ) in tableColumns:
+		table.addProperty( propType, column, 'Attachment' )
+		# only the offsets are for the user to change
+		if column != 'AttachmentOffsets':
+			table.setEditorMode( column, 1 )
+	return table
+
+
+# the name of a row in the index, and the row of such a name
+def rowReference( table, row ):
+	return table.Name+'['+str( row )+']'
+
+
+def referenceOf( constr ):
+	if isinstance( constr, constraintView ):
+		return rowReference( constr.table, constr.row )
+	return constr.Name
+
+
+
+"""
+    +-----------------------------------------------+
+    |   during a solve the table doesn't change,    |
+    |   its columns are read once and not once per  |
+    |   link: with libConstraints.frozen( doc ):    |
+    +-----------------------------------------------+
+"""
+frozenColumns = {}
+
+
+@contextmanager
+def frozen( doc ):
+	table = getTable( doc )
+	key = ( doc.Name, table.Name ) if table else None
+	# a nested solve keeps the columns of the outer one
+	if key is None or key in frozenColumns:
+		yield
+		return
+	frozenColumns[ key ] = {}
+	try:
+		yield
+	finally:
+		frozenColumns.pop( key, None )
+
+
+def readColumn( table, column ):
+	cache = frozenColumns.get( ( table.Document.Name, table.Name ) )
+	if cache is None:
+		return getattr( table, column )
+	if column not in cache:
+		cache[ column ] = getattr( table, column )
+	return cache[ column ]
+
+
+def writeColumn( table, column, row, value ):
+	values = getattr( table, column )
+	values[ row ] = value
+	setattr( table, column, values )
+	cache = frozenColumns.get( ( table.Document.Name, table.Name ) )
+	if cache is not None:
+		cache.pop( column, None )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   a row of the table seen as a constr_*       |
+    |   feature: constr.AttachmentOffset, with the  |
+    |   Name, Document and TypeId of the table      |
+    +-----------------------------------------------+
+"""
+class constraintView(object):
+
+	# the properties of a constr_* feature, and the column they are in
+	columns = { 'Instance': 'Instances', 'LinkName': 'Instances', 'AttachedByLCS': 'AttachedByLCS',
+				'AttachedTo': 'AttachedTo', 'AttachedToLCS': 'AttachedToLCS', 'AttachmentOffset': 'AttachmentOffsets',
+				'Enabled': 'Enabled', 'LinkedPart': 'LinkedParts', 'LinkedFile': 'LinkedFiles' }
+
+	def __init__( self, table, row ):
+		self.__dict__['table'] = table
+		self.__dict__['row'] = row
+
+
+	# only called for what isn't an attribute of the view
+	def __getattr__( self, prop ):
+		column = constraintView.columns.get( prop )
+		if column:
+			return readColumn( self.table, column )[ self.row ]
+		return getattr( self.table, prop )
+
+
+	def __setattr__( self, prop, value ):
+		column = constraintView.columns.get( prop )
+		if column:
+			writeColumn( self.table, column, self.row, value )
+		else:
+			setattr( self.table, prop, value )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the constraint of a link, from its name in  |
+    |   the index: a constr_* feature or a view on  |
+    |   a row of the table, None if it's not found  |
+    +-----------------------------------------------+
+"""
+def getConstraint( doc, constrName ):
+	if not constrName:
+		return None
+	match = constraintRow.match( constrName )
+	if not match:
+		return doc.getObject( constrName )
+	table = doc.getObject( match.group('table') )
+	row = int( match.group('row') )
+	if not table or row >= len( readColumn( table, 'Instances' ) ):
+		return None
+	return constraintView( table, row )
+
+
+def getLinkConstraint( doc, link ):
+	attachment = libIndex.getAttachment( doc, link.Name )
+	if attachment and attachment[3]:
+		return getConstraint( doc, attachment[3] )
+	# a link that isn't attached yet may already have its feature
+	return doc.getObject( constraintPrefix + link.Name )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the constraint of a link, created if it     |
+    |   doesn't exist: a row in the table in        |
+    |   compact mode, a constr_* feature otherwise  |
+    +-----------------------------------------------+
+"""
+def makeConstraint( doc, link, compact=None ):
+	constr = getLinkConstraint( doc, link )
+	if constr:
+		return constr
+	if compact is None:
+		compact = isCompact()
+	table = getTable( doc, create=True ) if compact else None
+	if not table:
+		return makeConstrFeature( doc, link )
+	columns = readColumns( table )
+	row = allocateRow( columns, link )
+	writeColumns( table, columns )
+	return constraintView( table, row )
+
+
+def readColumns( table ):
+	return dict( ( column, list( getattr( table, column ) ) ) for ( column, propType ) in tableColumns )
+
+
+def writeColumns( table, columns ):
+	for ( column, propType ) in tableColumns:
+		setattr( table, column, columns[ column ] )
+	frozenColumns.pop( ( table.Document.Name, table.Name ), None )
+
+
+# the first free row, the table grows if there is none
+def allocateRow( columns, link ):
+	instances = columns['Instances']
+	if '' not in instances:
+		size = len( instances )
+		for ( column, propType ) in tableColumns:
+			del columns[ column ][ size: ]
+			columns[ column ].extend( [ emptyValue( column ) ] * tableBlock )
+	row = instances.index( '' )
+	columns['Instances'][ row ] = link.Name
+	columns['Enabled'][ row ] = True
+	columns['LinkedParts'][ row ] = link.LinkedObject.Document.Name
+	columns['LinkedFiles'][ row ] = link.LinkedObject.Document.FileName
+	return row
+
+
+def emptyValue( column ):
+	if column == 'AttachmentOffsets':
+		return App.Placement()
+	if column == 'Enabled':
+		return False
+	return ''
+
+
+def freeRow( columns, row ):
+	for ( column, propType ) in tableColumns:
+		columns[ column ][ row ] = emptyValue( column )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   move the constr_* features of the links in  |
+    |   the table, and back. The expressions and    |
+    |   the index follow, the values are kept       |
+    |          returns the number of links moved    |
+    +-----------------------------------------------+
+"""
+def moveToTable( doc ):
+	table = getTable( doc, create=True )
+	if not table:
+		return 0
+	columns = readColumns( table )
+	moved = []
+	for link in libIndex.getLinkedParts( doc ):
+		attachment = libIndex.getAttachment( doc, link.Name )
+		if not attachment or constraintRow.match( attachment[3] ):
+			continue
+		feature = doc.getObject( attachment[3] )
+		parsed = parseExpressionPart( getPlacementExpression( link ) )
+		if not feature or not parsed:
+			continue
+		row = allocateRow( columns, link )
+		for ( prop, column ) in constraintView.columns.items():
+			if column != 'Instances' and hasattr( feature, prop ):
+				columns[ column ][ row ] = getattr( feature, prop )
+		moved.append( ( link, feature, parsed, rowReference( table, row ) ) )
+	# the rows must exist before the expressions refer to them
+	writeColumns( table, columns )
+	for ( link, feature, parsed, constrName ) in moved:
+		link.setExpression( 'Placement', makeExpressionPart( parsed.attLink, parsed.attPart, parsed.attLCS,
+															  constrName, parsed.linkedPart, parsed.linkLCS ) )
+		libIndex.updateEntry( doc, link )
+		doc.removeObject( feature.Name )
+	return len( moved )
+
+
+def moveToFeatures( doc ):
+	table = getTable( doc )
+	if not table:
+		return 0
+	columns = readColumns( table )
+	moved = 0
+	for row, name in enumerate( columns['Instances'] ):
+		link = doc.getObject( name ) if name else None
+		attachment = libIndex.getAttachment( doc, name ) if link else None
+		if not attachment or attachment[3] != rowReference( table, row ):
+			continue
+		parsed = parseExpressionPart( getPlacementExpression( link ) )
+		if not parsed:
+			continue
+		feature = makeConstrFeature( doc, link )
+		for ( prop, column ) in constraintView.columns.items():
+			if column != 'Instances':
+				setattr( feature, prop, columns[ column ][ row ] )
+		link.setExpression( 'Placement', makeExpressionPart( parsed.attLink, parsed.attPart, parsed.attLCS,
+															  feature.Name, parsed.linkedPart, parsed.linkLCS ) )
+		libIndex.updateEntry( doc, link )
+		freeRow( columns, row )
+		moved += 1
+	# the table goes once no link uses it anymore
+	if not any( columns['Instances'] ):
+		doc.removeObject( table.Name )
+	else:
+		writeColumns( table, columns )
+	return moved
+
+
+
+"""
+    +-----------------------------------------------+
+    |   free the rows of the links that have been   |
+    |   deleted, or that don't use them anymore     |
+    |          returns the number of rows freed     |
+    +-----------------------------------------------+
+"""
+def purgeTable( doc ):
+	table = getTable( doc )
+	if not table:
+		return 0
+	columns = readColumns( table )
+	freed = 0
+	for row, name in enumerate( columns['Instances'] ):
+		if not name:
+			continue
+		attachment = libIndex.getAttachment( doc, name ) if doc.getObject( name ) else None
+		if not attachment or attachment[3] != rowReference( table, row ):
+			freeRow( columns, row )
+			freed += 1
+	if freed:
+		writeColumns( table, columns )
+	return freed
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libGui.py
+#
+# helpers shared by the dialogs of the workbench
+
+
+from PySide import QtGui, QtCore
+
+import libSolver
+
+
+
+"""
+    +-----------------------------------------------+
+    |   an editing session of a dialog: all its     |
+    |   changes are made in one transaction, and    |
+    |   the objects are recomputed at most once     |
+    |   per frame, when the UI is idle              |
+    |                                               |
+    |   OK commits, Cancel aborts the transaction,  |
+    |   which restores all the properties, the      |
+    |   expressions and the index entries, and      |
+    |   removes the objects created since           |
+    +-----------------------------------------------+
+"""
+# the shortest time between 2 recomputes, in ms
+recomputeDelay = 16
+
+
+class editSession():
+
+	def __init__( self, doc, name ):
+		self.doc = doc
+		# the objects to recompute, in the order they were changed
+		self.pending = []
+		# those recomputed at least once, they're recomputed again on abort
+		self.edited = []
+		self.timer = QtCore.QTimer()
+		self.timer.setSingleShot( True )
+		self.timer.timeout.connect( self.flush )
+		doc.openTransaction( name )
+		self.active = True
+
+
+	# change a property, the object will be recomputed later
+	def set( self, obj, prop, value ):
+		setattr( obj, prop, value )
+		self.touch( obj )
+
+
+	def setExpression( self, obj, path, expr ):
+		obj.setExpression( path, expr )
+		self.touch( obj )
+
+
+	# schedule the recompute of an object, several changes make one recompute
+	def touch( self, obj ):
+		if obj not in self.pending:
+			self.pending.append( obj )
+		if not self.timer.isActive():
+			self.timer.start( recomputeDelay )
+
+
+	def flush( self ):
+		self.timer.stop()
+		( pending, self.pending ) = ( self.pending, [] )
+		for obj in pending:
+			# it may have been deleted in the meantime
+			if obj.Document:
+				libSolver.recomputeObject( obj )
+				if obj not in self.edited:
+					self.edited.append( obj )
+
+
+	# keep the changes, as one undo step
+	def commit( self ):
+		if not self.active:
+			return
+		self.flush()
+		self.doc.commitTransaction()
+		self.active = False
+
+
+	# undo all the changes of the session
+	def abort( self ):
+		if not self.active:
+			return
+		self.timer.stop()
+		self.pending = []
+		self.doc.abortTransaction()
+		self.active = False
+		# the restored objects need to be recomputed
+		for obj in self.edited:
+			if obj.Document:
+				obj.recompute()
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the icons of the objects, one per TypeId:   |
+    |   getting an icon from its ViewObject is slow |
+    |   and they're the same for all the objects of |
+    |   a type. A link has its linked object's icon |
+    +-----------------------------------------------+
+"""
+iconCache = {}
+
+
+def getIcon( obj ):
+	if obj.isDerivedFrom('App::Link') and obj.LinkedObject:
+		obj = obj.LinkedObject
+	icon = iconCache.get( obj.TypeId )
+	if icon is None:
+		icon = obj.ViewObject.Icon
+		iconCache[ obj.TypeId ] = icon
+	return icon
+
+
+# if the object has been renamed, we show both the label and the (name)
+def objectText( obj ):
+	if obj.Name == obj.Label:
+		return obj.Name
+	return obj.Label + ' (' +obj.Name+ ')'
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the model of the lists and combo-boxes of   |
+    |   objects in the dialogs. Its rows are        |
+    |   ( text, data, icon, tool-tip ), the icon is |
+    |   a QIcon or an object whose icon is shown.   |
+    |   The views get the rows by batches, when     |
+    |   they're scrolled to, and only the rows with |
+    |   all the words of the filter in their text   |
+    |   are shown. The fixed rows, like "Select     |
+    |   ...", are always the first ones             |
+    +-----------------------------------------------+
+"""
+class objectModel( QtCore.QAbstractListModel ):
+	# how many rows are given to the views at a time
+	batchSize = 200
+
+	def __init__( self, parent=None ):
+		super(objectModel,self).__init__( parent )
+		self.fixed = []
+		self.setRows( [] )
+
+
+	def setRows( self, rows, fixed=None ):
+		self.beginResetModel()
+		if fixed is not None:
+			self.fixed = list( fixed )
+		self.rows = list( rows )
+		# what is searched, and the rows found for each filter typed so far
+		self.keys = [ row[0].lower() for row in self.rows ]
+		self.found = { '': list( range( len( self.rows ) ) ) }
+		self.pattern = ''
+		self.matches = self.found['']
+		self.shown = min( len( self.matches ), self.batchSize )
+		self.endResetModel()
+
+
+	def setObjects( self, objects, fixed=None ):
+		self.setRows( [ ( objectText( obj ), obj, obj, None ) for obj in objects ], fixed )
+
+
+	# a longer filter only searches the rows found by its beginning
+	def setFilter( self, pattern ):
+		pattern = pattern.lower()
+		if pattern == self.pattern:
+			return
+		start = pattern
+		while start not in self.found:
+			start = start[:-1]
+		words = pattern.split()
+		matches = [ row for row in self.found[ start ] if all( word in self.keys[ row ] for word in words ) ]
+		self.beginResetModel()
+		self.found[ pattern ] = matches
+		self.pattern = pattern
+		self.matches = matches
+		self.shown = min( len( matches ), self.batchSize )
+		self.endResetModel()
+
+
+	def rowCount( self, parent=QtCore.QModelIndex() ):
+		if parent.isValid():
+			return 0
+		return len( self.fixed ) + self.shown
+
+
+	def canFetchMore( self, parent ):
+		return not parent.isValid() and self.shown < len( self.matches )
+
+
+	def fetchMore( self, parent ):
+		self.fetchTo( self.shown + self.batchSize )
+
+
+	def fetchTo( self, count ):
+		count = min( count, len( self.matches ) )
+		if count <= self.shown:
+			return
+		first = len( self.fixed ) + self.shown
+		self.beginInsertRows( QtCore.QModelIndex(), first, first + count - self.shown - 1 )
+		self.shown = count
+		self.endInsertRows()
+
+
+	def getRow( self, row ):
+		if 0 <= row < len( self.fixed ):
+			return self.fixed[ row ]
+		if len( self.fixed ) <= row < len( self.fixed ) + self.shown:
+			return self.rows[ self.matches[ row - len( self.fixed ) ] ]
+		return None
+
+
+	def data( self, index, role=QtCore.Qt.DisplayRole ):
+		row = self.getRow( index.row() ) if index.isValid() else None
+		if row is None:
+			return None
+		( text, data, icon, toolTip ) = row
+		if role == QtCore.Qt.DisplayRole:
+			return text
+		if role == QtCore.Qt.DecorationRole and icon is not None:
+			if isinstance( icon, QtGui.QIcon ):
+				return icon
+			return getIcon( icon )
+		if role == QtCore.Qt.ToolTipRole:
+			return toolTip
+		return None
+
+
+	def dataAt( self, row ):
+		found = self.getRow( row )
+		if found is None:
+			return None
+		return found[1]
+
+
+	# the row of some data, given to the views if it wasn't yet, -1 if it's filtered out
+	def findData( self, data ):
+		for row, fixed in enumerate( self.fixed ):
+			if fixed[1] is data:
+				return row
+		for position, row in enumerate( self.matches ):
+			if self.rows[ row ][1] is data:
+				self.fetchTo( position + 1 )
+				return len( self.fixed ) + position
+		return -1
+
+
+	# the row of an object by its name
+	def findName( self, name ):
+		for row, fixed in enumerate( self.fixed ):
+			if getattr( fixed[1], 'Name', None ) == name:
+				return row
+		for position, row in enumerate( self.matches ):
+			if getattr( self.rows[ row ][1], 'Name', None ) == name:
+				self.fetchTo( position + 1 )
+				return len( self.fixed ) + position
+		return -1
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the selection in a QListView or QComboBox   |
+    |   of an objectModel, by row or by data        |
+    +-----------------------------------------------+
+"""
+def makeListView( parent ):
+	view = QtGui.QListView( parent )
+	view.setModel( objectModel( view ) )
+	# all the rows have the same height, the view needn't ask for each of them
+	view.setUniformItemSizes( True )
+	return view
+
+
+def makeComboBox( parent ):
+	combo = QtGui.QComboBox( parent )
+	combo.setModel( objectModel( combo ) )
+	return combo
+
+
+def selectedRow( view ):
+	if isinstance( view, QtGui.QComboBox ):
+		return view.currentIndex()
+	if view.selectionModel().hasSelection():
+		return view.currentIndex().row()
+	return -1
+
+
+def selectedData( view ):
+	return view.model().dataAt( selectedRow( view ) )
+
+
+def selectRow( view, row ):
+	if isinstance( view, QtGui.QComboBox ):
+		view.setCurrentIndex( max( row, 0 ) )
+	elif row < 0:
+		view.selectionModel().clear()
+	else:
+		index = view.model().index( row )
+		view.setCurrentIndex( index )
+		view.scrollTo( index )
+
+
+def selectName( view, name ):
+	row = view.model().findName( name )
+	selectRow( view, row )
+	return row >= 0
+
+
+# the data of all the selected rows of a QListView with several selected
+def selectedDataList( view ):
+	rows = sorted( index.row() for index in view.selectionModel().selectedRows() )
+	return [ view.model().dataAt( row ) for row in rows ]
+
+
+def selectDataList( view, dataList ):
+	selection = view.selectionModel()
+	for data in dataList:
+		row = view.model().findData( data )
+		if row >= 0:
+			selection.select( view.model().index( row ), selection.Select )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   a search field filtering a view, which      |
+    |   keeps its selection if it's still shown.    |
+    |   If it isn't, changed() is called, like when |
+    |   the user changes the selection              |
+    +-----------------------------------------------+
+"""
+def makeSearchField( parent, view, changed=None ):
+	search = QtGui.QLineEdit( parent )
+	search.setPlaceholderText('Search')
+	search.setToolTip('Only list the objects whose label or name contain these words')
+	search.textChanged.connect( lambda text: filterView( view, text, changed ) )
+	return search
+
+
+def filterView( view, pattern, changed=None ):
+	model = view.model()
+	selected = selectedData( view )
+	view.blockSignals( True )
+	model.setFilter( pattern )
+	row = model.findData( selected ) if selected is not None else -1
+	selectRow( view, row )
+	view.blockSignals( False )
+	if selected is not None and row < 0 and changed:
+		changed()
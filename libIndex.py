@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libIndex.py
+#
+# the attachment index of an Assembly4 Model, stored in the document
+# this file doesn't use the GUI
+
+
+from libAsm4 import *
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the index is an App::FeaturePython placed   |
+    |   in the Model, next to the Constraints group |
+    |                                               |
+    |   Links      : all App::Links in the Model    |
+    |   Datums     : attached Datums in the Model   |
+    |   AttachedTo : 'Parent Assembly' or link name |
+    |   AttachedToLCS : the LCS in that parent      |
+    |   AttachedByLCS : the LCS in the linked Part  |
+    |   Constraint : the constr_* feature's name    |
+    |   Dependents : who is attached to an object   |
+    |                                               |
+    |   and the last solve, saved with the document |
+    |   SolvedInputs : the hash of an object's      |
+    |                  inputs when it was solved    |
+    |   SolvedPlacements : its solved Placement     |
+    +-----------------------------------------------+
+"""
+indexName = 'AssemblyIndex'
+indexMaps = [ 'AttachedTo', 'AttachedToLCS', 'AttachedByLCS', 'Constraint', 'Dependents' ]
+solvedMaps = [ 'SolvedInputs', 'SolvedPlacements' ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |    return the index of the document's Model,  |
+    |     build it the first time it's needed       |
+    +-----------------------------------------------+
+"""
+def getIndex( doc, create=True ):
+	index = doc.getObject( indexName )
+	if index or not create:
+		return index
+	return buildIndex( doc )
+
+
+
+"""
+    +-----------------------------------------------+
+    |       create the empty index in the Model     |
+    +-----------------------------------------------+
+"""
+def createIndex( doc ):
+	model = doc.getObject('Model')
+	if not model:
+		return None
+	index = model.newObject( 'App::FeaturePython', indexName )
+	index.addProperty( 'App::PropertyStringList', 'Links', 'Index' )
+	index.addProperty( 'App::PropertyStringList', 'Datums', 'Index' )
+	for prop in indexMaps:
+		index.addProperty( 'App::PropertyMap', prop, 'Index' )
+	# it's maintained by Assembly4, not by the user
+	for prop in [ 'Links', 'Datums' ] + indexMaps:
+		index.setEditorMode( prop, 1 )
+	addSolvedMaps( index )
+	return index
+
+
+# the indexes made before the solved placements were saved don't have them
+def addSolvedMaps( index ):
+	for prop in solvedMaps:
+		if prop not in index.PropertiesList:
+			index.addProperty( 'App::PropertyMap', prop, 'Solver' )
+			index.setEditorMode( prop, 2 )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   (re)build the whole index from the links,   |
+    |    their constraints and their expressions    |
+    +-----------------------------------------------+
+"""
+def buildIndex( doc ):
+	index = doc.getObject( indexName ) or createIndex( doc )
+	if not index:
+		return None
+	( links, datums, maps ) = scanAttachments( doc )
+	index.Links = links
+	index.Datums = datums
+	for prop in indexMaps:
+		setattr( index, prop, maps[prop] )
+	return index
+
+
+# what the index holds, read from the expressions of all the objects
+def scanAttachments( doc ):
+	links = []
+	datums = []
+	maps = dict( ( prop, {} ) for prop in indexMaps )
+	for obj in doc.Objects:
+		if obj.isDerivedFrom('App::Link'):
+			links.append( obj.Name )
+		elif obj.TypeId not in datumTypes:
+			continue
+		attachment = decodeAttachment( doc, obj )
+		if not attachment:
+			continue
+		if obj.TypeId in datumTypes:
+			datums.append( obj.Name )
+		( maps['AttachedTo'][obj.Name], maps['AttachedToLCS'][obj.Name],
+		  maps['AttachedByLCS'][obj.Name], maps['Constraint'][obj.Name] ) = attachment
+		parent = attachmentParent( attachment )
+		dependents = maps['Dependents'].get( parent )
+		maps['Dependents'][ parent ] = dependents+','+obj.Name if dependents else obj.Name
+	return ( links, datums, maps )
+
+
+
+"""
+    +-----------------------------------------------+
+    |     decode the attachment of an object from   |
+    |          its Placement expression             |
+    |  returns ( attachedTo, attachedToLCS,         |
+    |            attachedByLCS, constraintName )    |
+    +-----------------------------------------------+
+"""
+def decodeAttachment( doc, obj ):
+	expr = getPlacementExpression( obj )
+	if not expr:
+		return None
+	if obj.isDerivedFrom('App::Link'):
+		parsed = parseExpressionPart( expr )
+		if not parsed:
+			return None
+		return ( parsed.attLink, parsed.attLCS, parsed.linkLCS, parsed.constraint )
+	else:
+		parsed = parseExpressionDatum( expr )
+		if not parsed:
+			return None
+		return ( parsed.attLink, parsed.attLCS, '', '' )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the object an attachment depends on: the    |
+    |   parent link, or the LCS in the Model itself |
+    +-----------------------------------------------+
+"""
+def attachmentParent( attachment ):
+	( attachedTo, attachedToLCS, attachedByLCS, constraint ) = attachment
+	if attachedTo == 'Parent Assembly':
+		return attachedToLCS
+	return attachedTo
+
+
+
+"""
+    +-----------------------------------------------+
+    |   set the attachment of an object in the      |
+    |   index, and the reverse dependency edges.    |
+    |   The index is created by the first link, or  |
+    |   the first attached datum                    |
+    +-----------------------------------------------+
+"""
+def setEntry( doc, obj, attachedTo, attachedToLCS, attachedByLCS='', constraint='' ):
+	index = getIndex( doc, create=bool( attachedTo ) or obj.isDerivedFrom('App::Link') )
+	if not index:
+		return
+	name = obj.Name
+	removeDependent( index, name )
+	maps = {}
+	for prop in [ 'AttachedTo', 'AttachedToLCS', 'AttachedByLCS', 'Constraint' ]:
+		maps[prop] = getattr( index, prop )
+	if attachedTo:
+		maps['AttachedTo'][name] = attachedTo
+		maps['AttachedToLCS'][name] = attachedToLCS
+		maps['AttachedByLCS'][name] = attachedByLCS
+		maps['Constraint'][name] = constraint
+		addDependent( index, attachmentParent( ( attachedTo, attachedToLCS, attachedByLCS, constraint ) ), name )
+	else:
+		for prop in maps:
+			maps[prop].pop( name, None )
+	for prop in maps:
+		setattr( index, prop, maps[prop] )
+	# and the list it belongs to
+	if obj.isDerivedFrom('App::Link'):
+		if name not in index.Links:
+			index.Links = index.Links + [ name ]
+	elif attachedTo:
+		if name not in index.Datums:
+			index.Datums = index.Datums + [ name ]
+	elif name in index.Datums:
+		index.Datums = [ datum for datum in index.Datums if datum != name ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |    update the index entry of an object from   |
+    |        its current Placement expression       |
+    +-----------------------------------------------+
+"""
+def updateEntry( doc, obj ):
+	attachment = decodeAttachment( doc, obj )
+	if attachment:
+		setEntry( doc, obj, *attachment )
+	else:
+		setEntry( doc, obj, '', '' )
+
+
+
+"""
+    +-----------------------------------------------+
+    |    remove an object that has been deleted     |
+    +-----------------------------------------------+
+"""
+def removeEntry( doc, name ):
+	index = getIndex( doc, create=False )
+	if not index:
+		return
+	removeDependent( index, name )
+	for prop in [ 'AttachedTo', 'AttachedToLCS', 'AttachedByLCS', 'Constraint' ] + solvedMaps:
+		if prop not in index.PropertiesList:
+			continue
+		entries = getattr( index, prop )
+		if name in entries:
+			del entries[ name ]
+			setattr( index, prop, entries )
+	if name in index.Links:
+		index.Links = [ link for link in index.Links if link != name ]
+	if name in index.Datums:
+		index.Datums = [ datum for datum in index.Datums if datum != name ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |       maintain the reverse dependency edges   |
+    +-----------------------------------------------+
+"""
+def addDependent( index, parent, name ):
+	dependents = index.Dependents
+	names = dependents[ parent ].split(',') if dependents.get( parent ) else []
+	if name not in names:
+		names.append( name )
+		dependents[ parent ] = ','.join( names )
+		index.Dependents = dependents
+
+
+def removeDependent( index, name ):
+	attachedTo = index.AttachedTo
+	if name not in attachedTo:
+		return
+	parent = attachmentParent( ( attachedTo[name], index.AttachedToLCS.get( name, '' ), '', '' ) )
+	dependents = index.Dependents
+	if dependents.get( parent ):
+		names = [ dep for dep in dependents[ parent ].split(',') if dep != name ]
+		if names:
+			dependents[ parent ] = ','.join( names )
+		else:
+			del dependents[ parent ]
+		index.Dependents = dependents
+
+
+
+"""
+    +-----------------------------------------------+
+    |   lookups instead of scans. They don't create |
+    |   the index: without it, like in a part, the  |
+    |   expressions are read instead                |
+    +-----------------------------------------------+
+"""
+# returns ( attachedTo, attachedToLCS, attachedByLCS, constraintName ) or None
+def getAttachment( doc, name ):
+	index = getIndex( doc, create=False )
+	if not index:
+		obj = doc.getObject( name )
+		if not obj or not ( obj.isDerivedFrom('App::Link') or obj.TypeId in datumTypes ):
+			return None
+		return decodeAttachment( doc, obj )
+	attachedTo = index.AttachedTo
+	if name not in attachedTo:
+		return None
+	return ( attachedTo[name], index.AttachedToLCS.get( name, '' ),
+			 index.AttachedByLCS.get( name, '' ), index.Constraint.get( name, '' ) )
+
+
+# the objects attached to an object, and optionally those attached to them
+def getDependents( doc, name, recursive=False ):
+	index = getIndex( doc, create=False )
+	if index:
+		dependents = index.Dependents
+	else:
+		dependents = scanAttachments( doc )[2]['Dependents']
+	result = []
+	pending = [ name ]
+	while pending:
+		parent = pending.pop(0)
+		if not dependents.get( parent ):
+			continue
+		for dep in dependents[ parent ].split(','):
+			if dep not in result:
+				result.append( dep )
+				if recursive:
+					pending.append( dep )
+	return result
+
+
+# the last solve saved with the document, as ( { name: inputs hash }, { name: placement } )
+def getSolved( doc ):
+	index = getIndex( doc, create=False )
+	if not index or solvedMaps[0] not in index.PropertiesList:
+		return ( {}, {} )
+	return ( index.SolvedInputs, index.SolvedPlacements )
+
+
+def setSolved( doc, inputs, placements ):
+	index = getIndex( doc, create=False )
+	if not index:
+		return
+	addSolvedMaps( index )
+	index.SolvedInputs = inputs
+	index.SolvedPlacements = placements
+
+
+# all the App::Links to an App::Part in the Model, deleted links are pruned.
+# Without create, a document without index, like a linked part, doesn't
+# get one: its links are those in its Model
+def getLinkedParts( doc, create=True ):
+	index = getIndex( doc, create )
+	if not index:
+		model = doc.getObject('Model')
+		if create or not model:
+			return []
+		return [ obj for obj in model.Group if obj.isDerivedFrom('App::Link')
+				 and obj.LinkedObject and obj.LinkedObject.isDerivedFrom('App::Part') ]
+	linkedParts = []
+	for name in index.Links:
+		obj = doc.getObject( name )
+		if not obj:
+			removeEntry( doc, name )
+		elif obj.LinkedObject and obj.LinkedObject.isDerivedFrom('App::Part'):
+			linkedParts.append( obj )
+	return linkedParts
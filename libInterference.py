@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libInterference.py
+#
+# find the linked parts of an assembly that intersect each other: a tree
+# of bounding boxes finds the pairs that may, and only those are checked
+# with a boolean common. A check only tests again what moved since the
+# last one
+# this file doesn't use the GUI
+
+
+import FreeCAD as App
+import os, time
+
+import libIndex
+import libShapeCache
+import libSolver
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the last check of each document, to only    |
+    |   test again the links that changed:          |
+    |   { docName: { 'stamps': { link: stamp },     |
+    |                'clashes': { ( a, b ): vol } } |
+    +-----------------------------------------------+
+"""
+lastChecks = {}
+
+# the most boxes in a leaf of the tree
+leafSize = 4
+# a common smaller than this, in mm^3, is only touching
+defaultMinVolume = 1e-3
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the bounding box of a link in the assembly, |
+    |   as ( xmin, ymin, zmin, xmax, ymax, zmax ),  |
+    |   from the box of its part's shape: its       |
+    |   corners are placed, no shape is moved       |
+    +-----------------------------------------------+
+"""
+def getPartShape( part ):
+	if part.Document.FileName:
+		return libShapeCache.getPartShape( part.Document.FileName, part.Name )
+	import Part
+	return Part.getShape( part, transform=False )
+
+
+def placedBox( box, pla ):
+	xs = []
+	ys = []
+	zs = []
+	for x in ( box.XMin, box.XMax ):
+		for y in ( box.YMin, box.YMax ):
+			for z in ( box.ZMin, box.ZMax ):
+				corner = pla.multVec( App.Vector( x, y, z ) )
+				xs.append( corner.x )
+				ys.append( corner.y )
+				zs.append( corner.z )
+	return ( min( xs ), min( ys ), min( zs ), max( xs ), max( ys ), max( zs ) )
+
+
+def boxesOverlap( a, b ):
+	return a[0] <= b[3] and b[0] <= a[3] and a[1] <= b[4] and b[1] <= a[4] and a[2] <= b[5] and b[2] <= a[5]
+
+
+def mergeBoxes( boxes ):
+	return ( min( box[0] for box in boxes ), min( box[1] for box in boxes ), min( box[2] for box in boxes ),
+			 max( box[3] for box in boxes ), max( box[4] for box in boxes ), max( box[5] for box in boxes ) )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   a bounding volume hierarchy: each node is   |
+    |   ( box, left, right, items ), the leaves     |
+    |   have items and no children. It's split at   |
+    |   the median of the longest axis              |
+    +-----------------------------------------------+
+"""
+def buildTree( boxes, items=None ):
+	if items is None:
+		items = list( range( len( boxes ) ) )
+	if not items:
+		return None
+	box = mergeBoxes( [ boxes[ item ] for item in items ] )
+	if len( items ) <= leafSize:
+		return ( box, None, None, items )
+	axis = max( range( 3 ), key=lambda axis: box[ axis+3 ] - box[ axis ] )
+	items = sorted( items, key=lambda item: boxes[ item ][ axis ] + boxes[ item ][ axis+3 ] )
+	middle = len( items ) // 2
+	return ( box, buildTree( boxes, items[:middle] ), buildTree( boxes, items[middle:] ), None )
+
+
+# the items whose box overlaps a box
+def queryTree( tree, boxes, box ):
+	found = []
+	pending = [ tree ] if tree else []
+	while pending:
+		( nodeBox, left, right, items ) = pending.pop()
+		if not boxesOverlap( nodeBox, box ):
+			continue
+		if items is None:
+			pending.append( left )
+			pending.append( right )
+		else:
+			found.extend( item for item in items if boxesOverlap( boxes[ item ], box ) )
+	return found
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the volume common to 2 shapes. In a pool,   |
+    |   the forked processes find the shapes where  |
+    |   they were before the fork. Forking the GUI  |
+    |   with its threads running could deadlock,    |
+    |   there the shapes are tested one by one      |
+    +-----------------------------------------------+
+"""
+poolShapes = []
+
+
+def commonVolume( pair ):
+	( a, b ) = pair
+	try:
+		return poolShapes[ a ].common( poolShapes[ b ] ).Volume
+	except Exception:
+		# a boolean that fails is reported, with no volume
+		return -1.
+
+
+def exactVolumes( shapes, pairs, workers=1 ):
+	global poolShapes
+	poolShapes = shapes
+	try:
+		# only where the processes can be forked, the shapes can't be sent to them
+		if workers > 1 and len( pairs ) > 1 and hasattr( os, 'fork' ) and not App.GuiUp:
+			import multiprocessing
+			with multiprocessing.get_context('fork').Pool( workers ) as pool:
+				return pool.map( commonVolume, pairs, chunksize=max( 1, len( pairs ) // ( 4 * workers ) ) )
+		return [ commonVolume( pair ) for pair in pairs ]
+	finally:
+		poolShapes = []
+
+
+
+"""
+    +-----------------------------------------------+
+    |   what a check found: the clashing pairs      |
+    |   ( a, b, volume ), a volume of -1 when the   |
+    |   boolean failed, and what was done           |
+    +-----------------------------------------------+
+"""
+class interferenceResult(object):
+
+	def __init__( self ):
+		self.clashes = []
+		self.links = 0
+		# the links that moved or changed since the last check
+		self.touched = 0
+		# the pairs whose boxes overlap, and those tested with a boolean
+		self.candidates = 0
+		self.tested = 0
+		self.elapsed = 0.
+
+
+
+"""
+    +-----------------------------------------------+
+    |   check the links of an assembly: the pairs   |
+    |   of links that didn't change since the last  |
+    |   check keep their result, the others are     |
+    |   found with the tree and tested. A link      |
+    |   changes when it moves, or when its part's   |
+    |   shape changes                               |
+    +-----------------------------------------------+
+"""
+def checkAssembly( doc, incremental=True, workers=1, minVolume=defaultMinVolume ):
+	start = time.perf_counter()
+	result = interferenceResult()
+	links = []
+	boxes = []
+	stamps = {}
+	partShapes = {}
+	for link in libIndex.getLinkedParts( doc ):
+		part = link.LinkedObject
+		key = ( part.Document.Name, part.Name )
+		if key not in partShapes:
+			partShapes[ key ] = getPartShape( part )
+		shape = partShapes[ key ]
+		if shape.isNull() or not shape.BoundBox.isValid():
+			continue
+		box = shape.BoundBox
+		links.append( link )
+		boxes.append( placedBox( box, link.Placement ) )
+		# the part's shape is known by its box and its volume
+		stamps[ link.Name ] = ( libSolver.placementKey( link.Placement ), key,
+								( box.XMin, box.YMin, box.ZMin, box.XMax, box.YMax, box.ZMax ), round( shape.Volume, 6 ) )
+	result.links = len( links )
+	last = lastChecks.get( doc.Name ) if incremental else None
+	if last is None:
+		last = { 'stamps': {}, 'clashes': {} }
+	touched = set( name for name in stamps if last['stamps'].get( name ) != stamps[ name ] )
+	result.touched = len( touched )
+	# the results of the pairs that didn't change
+	clashes = dict( ( pair, volume ) for pair, volume in last['clashes'].items()
+					if pair[0] in stamps and pair[1] in stamps and pair[0] not in touched and pair[1] not in touched )
+	# the pairs with a changed link whose boxes overlap
+	tree = buildTree( boxes )
+	candidates = set()
+	for i, link in enumerate( links ):
+		if link.Name not in touched:
+			continue
+		for j in queryTree( tree, boxes, boxes[ i ] ):
+			if j != i:
+				candidates.add( ( min( i, j ), max( i, j ) ) )
+	result.candidates = len( candidates )
+	# a box only overlapping is often not a clash, test them with the real shapes
+	pairs = sorted( candidates )
+	used = sorted( set( i for pair in pairs for i in pair ) )
+	positions = dict( ( i, position ) for position, i in enumerate( used ) )
+	shapes = [ libShapeCache.getLinkShape( links[ i ] ) for i in used ]
+	volumes = exactVolumes( shapes, [ ( positions[ a ], positions[ b ] ) for ( a, b ) in pairs ], workers )
+	result.tested = len( pairs )
+	for ( a, b ), volume in zip( pairs, volumes ):
+		if volume > minVolume or volume < 0:
+			clashes[ tuple( sorted( ( links[ a ].Name, links[ b ].Name ) ) ) ] = volume
+	lastChecks[ doc.Name ] = { 'stamps': stamps, 'clashes': clashes }
+	result.clashes = sorted( ( a, b, volume ) for ( a, b ), volume in clashes.items() )
+	result.elapsed = time.perf_counter() - start
+	return result
+
+
+# the next check of a document tests all the pairs again
+def resetChecks( doc=None ):
+	if doc is None:
+		lastChecks.clear()
+	else:
+		lastChecks.pop( doc.Name, None )
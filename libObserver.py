@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libObserver.py
+#
+# the document observer of the workbench: it keeps the attachment index
+# and the solver's graphs up-to-date, and solves the affected links after
+# an edit if the AutoSolve parameter is set
+# the solver is only imported when it's needed, the workbench starts
+# without it
+
+
+import sys
+import FreeCAD as App
+from PySide import QtCore
+
+from libAsm4 import *
+import libIndex
+
+
+
+"""
+    +-----------------------------------------------+
+    |    the properties that move or re-attach an   |
+    |   object, and those that change the graph     |
+    +-----------------------------------------------+
+"""
+watchedProperties = [ 'Placement', 'AttachmentOffset', 'AttachmentOffsets', 'LinkedObject', 'ExpressionEngine', 'Group',
+					  'Support', 'AttachmentSupport', 'MapMode' ]
+# a sketch or an LCS mapped on an object that moves is solved with it
+structuralProperties = [ 'LinkedObject', 'ExpressionEngine', 'Group', 'Support', 'AttachmentSupport', 'MapMode' ]
+
+# wait this long after the last change before solving, in ms
+autoSolveDelay = 100
+
+observer = None
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the solver and the interference checks are  |
+    |   imported by the commands, or by AutoSolve:  |
+    |   until then they have nothing to forget      |
+    +-----------------------------------------------+
+"""
+def loadedModule( name ):
+	return sys.modules.get( name )
+
+
+def invalidateGraph( doc=None ):
+	libSolver = loadedModule('libSolver')
+	if libSolver:
+		libSolver.invalidateGraph( doc )
+
+
+def loadSolver():
+	import libSolver, libProfiler
+	# timed like the libraries imported by the commands
+	libProfiler.instrument( [] )
+	return libSolver
+
+
+
+"""
+    +-----------------------------------------------+
+    |   collect the changes of all open documents,  |
+    |   and process them once the edit is finished  |
+    +-----------------------------------------------+
+"""
+class assemblyObserver():
+
+	def __init__( self ):
+		# ( document name, object name ) changed since the last solve
+		self.changed = set()
+		# links and datums whose index entry must be updated
+		self.reindex = set()
+		# assemblies to restore from their saved solve, after a document was opened
+		self.restored = set()
+		# our own changes are not edits
+		self.solving = False
+		self.timer = QtCore.QTimer()
+		self.timer.setSingleShot( True )
+		self.timer.timeout.connect( self.flush )
+
+
+	def slotChangedObject( self, obj, prop ):
+		if self.solving or prop not in watchedProperties:
+			return
+		doc = obj.Document
+		if getattr( doc, 'Restoring', False ) or obj.Name == libIndex.indexName:
+			return
+		if prop in structuralProperties:
+			invalidateGraph( doc )
+			if prop != 'Group' and ( obj.isDerivedFrom('App::Link') or obj.TypeId in datumTypes ):
+				self.reindex.add( ( doc.Name, obj.Name ) )
+		# a Placement driven by an expression is computed, it's not an input
+		elif prop == 'Placement' and getPlacementExpression( obj ):
+			return
+		self.changed.add( ( doc.Name, obj.Name ) )
+		self.timer.start( autoSolveDelay )
+
+
+	def slotCreatedObject( self, obj ):
+		if not self.solving:
+			invalidateGraph( obj.Document )
+
+
+	def slotDeletedObject( self, obj ):
+		if self.solving:
+			return
+		doc = obj.Document
+		invalidateGraph( doc )
+		# the index can't be changed while the object is being deleted
+		if obj.isDerivedFrom('App::Link') or obj.TypeId in datumTypes:
+			self.reindex.add( ( doc.Name, obj.Name ) )
+			self.timer.start( autoSolveDelay )
+
+
+	def slotUndoDocument( self, doc ):
+		invalidateGraph( doc )
+
+
+	def slotRedoDocument( self, doc ):
+		invalidateGraph( doc )
+
+
+	def slotDeletedDocument( self, doc ):
+		libSolver = loadedModule('libSolver')
+		if libSolver:
+			libSolver.resetSolver( doc )
+			libSolver.resetStats( doc )
+		libInterference = loadedModule('libInterference')
+		if libInterference:
+			libInterference.resetChecks( doc )
+		self.changed = set( key for key in self.changed if key[0] != doc.Name )
+		self.reindex = set( key for key in self.reindex if key[0] != doc.Name )
+		self.restored.discard( doc.Name )
+
+
+	# a document was opened, or a linked part's document was loaded again:
+	# the graphs may point to the objects it had before, and the assemblies
+	# using it get the placements whose inputs didn't change back from their index
+	def slotFinishRestoreDocument( self, doc ):
+		invalidateGraph()
+		for openDoc in App.listDocuments().values():
+			if libIndex.getIndex( openDoc, create=False ):
+				self.restored.add( openDoc.Name )
+		if self.restored:
+			self.timer.start( autoSolveDelay )
+
+
+	"""
+    +-----------------------------------------------+
+    |   update the index, and solve the assemblies  |
+    |      that depend on the changed objects       |
+    +-----------------------------------------------+
+	"""
+	def flush( self ):
+		( changed, reindex, restored ) = ( self.changed, self.reindex, self.restored )
+		self.changed = set()
+		self.reindex = set()
+		self.restored = set()
+		documents = App.listDocuments()
+		autoSolve = App.ParamGet( paramPath ).GetBool( 'AutoSolve', False )
+		# without AutoSolve, the next solve restores the assemblies by itself
+		libSolver = loadSolver() if autoSolve and ( changed or restored ) else None
+		self.solving = True
+		try:
+			# only what was changed while the documents were closed is solved
+			for docName in restored:
+				doc = documents.get( docName )
+				if doc and libSolver and libSolver.restoreAssembly( doc ):
+					libSolver.solveAssembly( doc )
+			for ( docName, objName ) in reindex:
+				doc = documents.get( docName )
+				if not doc or not libIndex.getIndex( doc, create=False ):
+					continue
+				obj = doc.getObject( objName )
+				if obj:
+					libIndex.updateEntry( doc, obj )
+				else:
+					libIndex.removeEntry( doc, objName )
+			if not changed or not autoSolve:
+				return
+			for doc in documents.values():
+				if libIndex.getIndex( doc, create=False ):
+					libSolver.solveAssembly( doc, changed=changed )
+		finally:
+			self.solving = False
+
+
+
+"""
+    +-----------------------------------------------+
+    |    register the observer, once, when the      |
+    |            workbench is initialized           |
+    +-----------------------------------------------+
+"""
+def startObserver():
+	global observer
+	if observer is None:
+		observer = assemblyObserver()
+		App.addDocumentObserver( observer )
+		# the graphs solved so far were not watched
+		invalidateGraph()
+	return observer
+
+
+def stopObserver():
+	global observer
+	if observer is not None:
+		App.removeDocumentObserver( observer )
+		observer = None
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libProfiler.py
+#
+# opt-in timers and call counters for the commands and the hot helpers
+# of the workbench, set by the Profiling parameter
+# this file doesn't use the GUI
+
+
+import sys, time, json, inspect, platform, functools
+from contextlib import contextmanager
+
+import FreeCAD as App
+
+from libAsm4 import *
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the statistics: { name: [ calls, total,     |
+    |   min, max ] }, times are in seconds          |
+    +-----------------------------------------------+
+"""
+stats = {}
+active = App.ParamGet( paramPath ).GetBool( 'Profiling', False )
+
+# the methods of the commands that are timed, when they exist
+hotMethods = [ 'Activated', 'getPartLCS', 'getLinkDatums', 'onParentList', 'onApply', 'onOK', 'onCancel',
+			   'onLCSclicked', 'onDatumClicked', 'rotAxis', 'onCreateLink', 'fillPartList', 'onScanLibrary', 'onFill',
+			   'flush' ]
+# and the functions of the libraries
+hotFunctions = { 'libSolver':  [ 'solveHierarchy', 'solveAssembly', 'buildGraph', 'sortGraph', 'refreshLinkedDocuments',
+								 'solveRecompute', 'solveDirect', 'composePlacements' ],
+				 'libIndex':   [ 'buildIndex', 'getLinkedParts', 'setEntry', 'updateEntry' ],
+				 'libCatalog': [ 'scanCatalog', 'loadCatalog', 'readPartFile' ],
+				 'libSweep':   [ 'sweep' ],
+				 'libInterference': [ 'checkAssembly', 'exactVolumes' ],
+				 'libGui':     [],
+				 'libObserver': [] }
+
+
+
+def setActive( enable ):
+	global active
+	active = enable
+	App.ParamGet( paramPath ).SetBool( 'Profiling', enable )
+
+
+def reset():
+	stats.clear()
+
+
+def record( name, seconds ):
+	entry = stats.get( name )
+	if entry is None:
+		stats[ name ] = [ 1, seconds, seconds, seconds ]
+	else:
+		entry[0] += 1
+		entry[1] += seconds
+		entry[2] = min( entry[2], seconds )
+		entry[3] = max( entry[3], seconds )
+
+
+# time a block of code: with libProfiler.timer('name'): ...
+@contextmanager
+def timer( name ):
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		record( name, time.perf_counter() - start )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   wrap a function with a timer, that does     |
+    |   nothing more than a test when inactive      |
+    +-----------------------------------------------+
+"""
+def profiled( name, func ):
+	# Qt signals pass their arguments to the slots that accept them,
+	# the wrapper passes on only as many as the function takes
+	code = func.__code__
+	maxArgs = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+	@functools.wraps( func )
+	def wrapper( *args, **kwargs ):
+		if not active:
+			return func( *args[:maxArgs], **kwargs )
+		start = time.perf_counter()
+		try:
+			return func( *args[:maxArgs], **kwargs )
+		finally:
+			record( name, time.perf_counter() - start )
+	wrapper.profiledName = name
+	return wrapper
+
+
+def wrapAttribute( owner, attr, name ):
+	func = vars( owner ).get( attr )
+	if not inspect.isfunction( func ) or hasattr( func, 'profiledName' ):
+		return
+	setattr( owner, attr, profiled( name, func ) )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   install the timers in the command modules   |
+    |   and the libraries, once they're imported    |
+    +-----------------------------------------------+
+"""
+def instrument( moduleNames ):
+	for moduleName in list( moduleNames ) + list( hotFunctions ):
+		module = sys.modules.get( moduleName )
+		if not module:
+			continue
+		for cls in list( vars( module ).values() ):
+			if inspect.isclass( cls ) and cls.__module__ == moduleName:
+				for method in hotMethods:
+					wrapAttribute( cls, method, moduleName+'.'+method )
+		for func in hotFunctions.get( moduleName, [] ):
+			wrapAttribute( module, func, moduleName+'.'+func )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the statistics as records, the slowest      |
+    |   first, and written as JSON or CSV           |
+    +-----------------------------------------------+
+"""
+def getRecords():
+	records = []
+	for name, ( calls, total, fastest, slowest ) in stats.items():
+		records.append( { 'name': name, 'calls': calls, 'total': total, 'mean': total / calls,
+						  'min': fastest, 'max': slowest } )
+	return sorted( records, key=lambda record: record['total'], reverse=True )
+
+
+def writeReport( path, records=None ):
+	if records is None:
+		records = getRecords()
+	if path.lower().endswith('.csv'):
+		columns = [ 'name', 'calls', 'total', 'mean', 'min', 'max' ]
+		with open( path, 'w' ) as out:
+			out.write( ','.join( columns )+'\n' )
+			for record in records:
+				out.write( ','.join( str( record[col] ) for col in columns )+'\n' )
+	else:
+		report = { 'freecad': '.'.join( App.Version()[0:3] ),
+				   'python': platform.python_version(),
+				   'platform': platform.platform(),
+				   'date': time.strftime( '%Y-%m-%dT%H:%M:%S' ),
+				   'results': records }
+		with open( path, 'w' ) as out:
+			json.dump( report, out, indent=1 )
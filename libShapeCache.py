@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libShapeCache.py
+#
+# an on-disk cache of the shapes and meshes of the linked parts, keyed by
+# the content of their files: a part is only rebuilt when its file changes
+# this file doesn't use the GUI
+
+
+import os, array, struct, hashlib
+from collections import OrderedDict
+
+import FreeCAD as App
+
+from libAsm4 import *
+import libIndex
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the cache is a directory of files named     |
+    |   after the SHA-1 of the part's file and of   |
+    |   the files it links, and the part's name:    |
+    |     <hash>_<part>.brep         the shape      |
+    |     <hash>_<part>_<dev>.mesh   its mesh       |
+    |   the most recent ones are also kept in       |
+    |   memory, shared by all the links to a part   |
+    +-----------------------------------------------+
+"""
+cacheDirName = 'Assembly4_shapes'
+# the size of the cache on disk, in MB, is in the ShapeCacheSize parameter
+defaultCacheSize = 500
+# how many shapes and meshes are kept in memory
+memorySize = 64
+meshMagic = b'A4MS'
+
+# { path: ( mtime, size, hash ) }, files are hashed only when they change
+fileHashes = {}
+# { path: ( mtime, size, linked files ) }, read again only when they change
+fileLinks = {}
+shapes = OrderedDict()
+meshes = OrderedDict()
+
+
+def getCacheDir():
+	# FreeCAD v0.19 has a cache directory, older ones only the user's directory
+	if hasattr( App, 'getUserCachePath' ):
+		base = App.getUserCachePath()
+	else:
+		base = App.getUserAppDataDir()
+	path = os.path.join( base, cacheDirName )
+	if not os.path.isdir( path ):
+		os.makedirs( path )
+	return path
+
+
+def fileHash( path ):
+	stat = os.stat( path )
+	known = fileHashes.get( path )
+	if known and known[0] == stat.st_mtime and known[1] == stat.st_size:
+		return known[2]
+	sha = hashlib.sha1()
+	with open( path, 'rb' ) as partFile:
+		for block in iter( lambda: partFile.read( 1 << 20 ), b'' ):
+			sha.update( block )
+	fileHashes[ path ] = ( stat.st_mtime, stat.st_size, sha.hexdigest() )
+	return sha.hexdigest()
+
+
+# the hash of a file and of all the files it links, at any depth: a
+# sub-assembly changes when one of its parts does
+def contentHash( path, visiting=None ):
+	visiting = set() if visiting is None else visiting
+	visiting.add( os.path.abspath( path ) )
+	stat = os.stat( path )
+	known = fileLinks.get( path )
+	if known and known[0] == stat.st_mtime and known[1] == stat.st_size:
+		linkedFiles = known[2]
+	else:
+		linkedFiles = readLinkedFiles( path )
+		fileLinks[ path ] = ( stat.st_mtime, stat.st_size, linkedFiles )
+	hashes = [ fileHash( path ) ]
+	for linked in linkedFiles:
+		if linked in visiting:
+			continue
+		# a missing file is part of the content too
+		if os.path.exists( linked ):
+			hashes.append( contentHash( linked, visiting ) )
+		else:
+			hashes.append( 'missing:'+linked )
+	if len( hashes ) == 1:
+		return hashes[0]
+	return hashlib.sha1( ' '.join( hashes ).encode('utf-8') ).hexdigest()
+
+
+def remember( memo, key, value ):
+	memo[ key ] = value
+	memo.move_to_end( key )
+	while len( memo ) > memorySize:
+		memo.popitem( last=False )
+	return value
+
+
+
+"""
+    +-----------------------------------------------+
+    |   build the shape of a part from its file:    |
+    |   its document is opened, or completely       |
+    |   loaded, and closed with the documents it    |
+    |   opened if it wasn't open                    |
+    +-----------------------------------------------+
+"""
+def findDocument( path ):
+	for doc in App.listDocuments().values():
+		if doc.FileName and os.path.abspath( doc.FileName ) == os.path.abspath( path ):
+			return doc
+	return None
+
+
+def buildPartShape( path, partName ):
+	import Part
+	doc = findDocument( path )
+	opened = doc is None
+	openDocs = set( App.listDocuments().keys() )
+	if opened:
+		doc = App.openDocument( path )
+	else:
+		doc = loadFully( doc )
+	try:
+		part = doc.getObject( partName )
+		if not part:
+			raise KeyError( 'no '+partName+' in '+path )
+		# without the part's own Placement, a link replaces it with its own
+		return Part.getShape( part, transform=False )
+	finally:
+		if opened:
+			for name in list( App.listDocuments().keys() ):
+				if name not in openDocs:
+					App.closeDocument( name )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the shape of an App::Part of a file, read   |
+    |   from the cache, or built and then cached    |
+    +-----------------------------------------------+
+"""
+def getPartShape( path, partName='Model' ):
+	import Part
+	# an open and completely loaded document may have unsaved changes,
+	# its shape is already there anyway
+	doc = findDocument( path )
+	if doc and not isPartial( doc ) and doc.getObject( partName ):
+		return Part.getShape( doc.getObject( partName ), transform=False )
+	key = contentHash( path )+'_'+partName
+	if key in shapes:
+		shapes.move_to_end( key )
+		return shapes[ key ]
+	brepPath = os.path.join( getCacheDir(), key+'.brep' )
+	shape = None
+	if os.path.exists( brepPath ):
+		try:
+			shape = Part.read( brepPath )
+			touchFile( brepPath )
+		except Part.OCCError:
+			App.Console.PrintWarning( 'Assembly4 : bad shape in the cache, '+brepPath+'\n' )
+	if shape is None:
+		shape = buildPartShape( path, partName )
+		writeFile( brepPath, shape.exportBrep )
+		pruneCache()
+	return remember( shapes, key, shape )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the mesh of an App::Part of a file, as      |
+    |   ( points, facets ) like Shape.tessellate()  |
+    |   deviation is the tessellation's tolerance   |
+    +-----------------------------------------------+
+"""
+def getPartMesh( path, partName='Model', deviation=0.1 ):
+	doc = findDocument( path )
+	if doc and not isPartial( doc ) and doc.getObject( partName ):
+		return getPartShape( path, partName ).tessellate( deviation )
+	key = contentHash( path )+'_'+partName+'_'+str( deviation )
+	if key in meshes:
+		meshes.move_to_end( key )
+		return meshes[ key ]
+	meshPath = os.path.join( getCacheDir(), key+'.mesh' )
+	mesh = readMesh( meshPath ) if os.path.exists( meshPath ) else None
+	if mesh is not None:
+		touchFile( meshPath )
+	else:
+		mesh = getPartShape( path, partName ).tessellate( deviation )
+		writeFile( meshPath, lambda tmpPath: writeMesh( tmpPath, mesh ) )
+		pruneCache()
+	return remember( meshes, key, mesh )
+
+
+# the points as doubles and the facets as ints, after a small header
+def writeMesh( path, mesh ):
+	( points, facets ) = mesh
+	coords = array.array( 'd', [ coord for point in points for coord in ( point.x, point.y, point.z ) ] )
+	indices = array.array( 'i', [ index for facet in facets for index in facet ] )
+	with open( path, 'wb' ) as meshFile:
+		meshFile.write( meshMagic + struct.pack( '<II', len( points ), len( facets ) ) )
+		coords.tofile( meshFile )
+		indices.tofile( meshFile )
+
+
+def readMesh( path ):
+	coords = array.array( 'd' )
+	indices = array.array( 'i' )
+	with open( path, 'rb' ) as meshFile:
+		header = meshFile.read( len( meshMagic ) + 8 )
+		if len( header ) != len( meshMagic ) + 8 or not header.startswith( meshMagic ):
+			return None
+		( pointCount, facetCount ) = struct.unpack( '<II', header[ len( meshMagic ): ] )
+		try:
+			coords.fromfile( meshFile, 3 * pointCount )
+			indices.fromfile( meshFile, 3 * facetCount )
+		except EOFError:
+			return None
+	points = [ App.Vector( *coords[ i:i+3 ] ) for i in range( 0, len( coords ), 3 ) ]
+	facets = [ tuple( indices[ i:i+3 ] ) for i in range( 0, len( indices ), 3 ) ]
+	return ( points, facets )
+
+
+# write a new file and rename it, never leave a partial file,
+# the batch workers may be writing the same one
+def writeFile( path, write ):
+	tmpPath = path+'.'+str( os.getpid() )+'.tmp'
+	write( tmpPath )
+	os.replace( tmpPath, path )
+
+
+# the access times aren't kept on every file system, a file read from
+# the cache gets a new modification time to be pruned last
+def touchFile( path ):
+	try:
+		os.utime( path )
+	except OSError:
+		pass
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the shape and mesh of a link, placed in the |
+    |   assembly, from the cache of its part. An    |
+    |   unsaved part has no file to be cached by    |
+    +-----------------------------------------------+
+"""
+def getLinkShape( link ):
+	part = link.LinkedObject
+	if not part.Document.FileName:
+		import Part
+		return Part.getShape( link )
+	shape = getPartShape( part.Document.FileName, part.Name ).copy()
+	shape.Placement = link.Placement
+	return shape
+
+
+def getLinkMesh( link, deviation=0.1 ):
+	import Mesh
+	part = link.LinkedObject
+	if not part.Document.FileName:
+		mesh = Mesh.Mesh( getLinkShape( link ).tessellate( deviation ) )
+	else:
+		mesh = Mesh.Mesh( getPartMesh( part.Document.FileName, part.Name, deviation ) )
+		mesh.transform( link.Placement.toMatrix() )
+	return mesh
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the whole assembly, as one compound or one  |
+    |   mesh, from the linked parts' caches and the |
+    |         shapes of the Model's own objects     |
+    +-----------------------------------------------+
+"""
+# the bodies and Part features of the Model itself, but not its datums and sketches
+def getModelShapes( doc ):
+	import Part
+	result = []
+	for obj in doc.getObject('Model').Group:
+		if obj.isDerivedFrom('Part::Datum') or obj.isDerivedFrom('Part::Part2DObject'):
+			continue
+		if obj.isDerivedFrom('PartDesign::Body') or obj.isDerivedFrom('Part::Feature'):
+			shape = Part.getShape( obj )
+			if not shape.isNull():
+				result.append( shape )
+	return result
+
+
+def getAssemblyShape( doc ):
+	import Part
+	linkShapes = [ getLinkShape( link ) for link in libIndex.getLinkedParts( doc ) ]
+	return Part.makeCompound( [ shape for shape in linkShapes if not shape.isNull() ] + getModelShapes( doc ) )
+
+
+def getAssemblyMesh( doc, deviation=0.1 ):
+	import Mesh
+	mesh = Mesh.Mesh()
+	for link in libIndex.getLinkedParts( doc ):
+		mesh.addMesh( getLinkMesh( link, deviation ) )
+	for shape in getModelShapes( doc ):
+		mesh.addMesh( Mesh.Mesh( shape.tessellate( deviation ) ) )
+	return mesh
+
+
+
+"""
+    +-----------------------------------------------+
+    |   keep the cache under its size, the least    |
+    |   recently used files go first, by their      |
+    |   modification time                           |
+    +-----------------------------------------------+
+"""
+def pruneCache( maxSize=None ):
+	if maxSize is None:
+		maxSize = App.ParamGet( paramPath ).GetInt( 'ShapeCacheSize', defaultCacheSize )
+	cacheDir = getCacheDir()
+	files = []
+	for fileName in os.listdir( cacheDir ):
+		path = os.path.join( cacheDir, fileName )
+		try:
+			stat = os.stat( path )
+		except OSError:
+			continue
+		files.append( ( stat.st_mtime, stat.st_size, path ) )
+	total = sum( size for ( used, size, path ) in files )
+	for ( used, size, path ) in sorted( files ):
+		if total <= maxSize * 1024 * 1024:
+			break
+		try:
+			os.remove( path )
+		except OSError:
+			pass
+		total -= size
+
+
+def clearCache():
+	shapes.clear()
+	meshes.clear()
+	fileHashes.clear()
+	fileLinks.clear()
+	pruneCache( 0 )
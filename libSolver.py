@@ -0,0 +1,892 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libSolver.py
+#
+# dependency-ordered, incremental solver for Assembly4 Models
+# this file doesn't use the GUI
+
+
+import FreeCAD as App
+import time, hashlib
+from collections import deque
+
+from libAsm4 import *
+import libIndex
+import libConstraints
+import libProfiler
+
+# the direct solver composes the placements with NumPy if it's available,
+# it's only imported by the first direct solve
+numpy = None
+numpyChecked = False
+
+
+def loadNumpy():
+	global numpy, numpyChecked
+	if not numpyChecked:
+		numpyChecked = True
+		try:
+			import numpy
+		except ImportError:
+			numpy = None
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the input signatures of the last solve,     |
+    |   per document: { docName: { objName: sig } } |
+    +-----------------------------------------------+
+"""
+solvedSignatures = {}
+
+# the graphs of the last solves, with their order and the objects their
+# nodes depend on, per document. They are only reused by the incremental
+# solves of the document observer, which drops them when the documents change
+solvedGraphs = {}
+
+# the statistics of the solves, per node of the graph, to find the
+# expensive ones: { docName: { objName: { 'constraint', 'chain',
+# 'dependents', 'recomputes', 'last', 'total' } } }, times in seconds
+solveStats = {}
+
+# the sub-assemblies solved by the hierarchical solves, per document:
+# { docName: ( stamp, subStamps ) }, the stamp of its solved Model and
+# those of its own sub-assemblies when it was solved
+solvedAssemblies = {}
+
+
+
+"""
+    +-----------------------------------------------+
+    |        a node of the attachment graph:        |
+    |    an App::Link or a Datum whose Placement    |
+    |       is driven by the ExpressionEngine,      |
+    |   or an object without expression that moves  |
+    |   with them, like a sketch or an LCS mapped   |
+    |   on it, that FreeCAD recomputes itself       |
+    +-----------------------------------------------+
+"""
+class solverNode(object):
+
+	def __init__( self, obj, expr ):
+		self.obj = obj
+		self.expr = expr
+		# names of the objects in the same document this node depends on
+		self.parents = []
+		# the parent link, None when attached to the parent assembly
+		self.attLink = None
+		# the LCS it's attached to, in the parent link or in the Model
+		self.attLCS = None
+		# the constraint feature and the LCS in the linked part, for App::Links only
+		self.constr = None
+		self.linkLCS = None
+		# the objects a node without expression depends on
+		self.depends = []
+
+
+	# ( object, property ) pairs whose values define the Placement
+	def inputs( self ):
+		if self.expr is None:
+			return [ ( obj, 'Placement' ) for obj in self.depends if hasattr( obj, 'Placement' ) ]
+		inputs = [ ( self.attLCS, 'Placement' ) ]
+		if self.attLink:
+			inputs.append( ( self.attLink, 'Placement' ) )
+		if self.obj.isDerivedFrom('App::Link'):
+			inputs.append( ( self.constr, 'AttachmentOffset' ) )
+			inputs.append( ( self.linkLCS, 'Placement' ) )
+		return inputs
+
+
+	# the values of all the inputs of the node. If none of them changed
+	# since the last solve, the node doesn't need to be recomputed
+	def signature( self ):
+		values = [ self.expr ]
+		for ( obj, prop ) in self.inputs():
+			if obj is None:
+				values.append( None )
+			else:
+				values.append( placementKey( getattr( obj, prop ) ) )
+		return tuple( values )
+
+
+
+"""
+    +-----------------------------------------------+
+    |  a hashable version of an App.Placement, the  |
+    |  App.Placement itself can't be compared well  |
+    +-----------------------------------------------+
+"""
+def placementKey( pla ):
+	base = pla.Base
+	return ( base.x, base.y, base.z ) + tuple( pla.Rotation.Q )
+
+
+# the same, as text to be saved in the index, and back
+def placementString( pla ):
+	return ' '.join( repr( value ) for value in placementKey( pla ) )
+
+
+def parsePlacement( text ):
+	values = [ float( value ) for value in text.split() ]
+	return App.Placement( App.Vector( *values[:3] ), App.Rotation( *values[3:] ) )
+
+
+# a signature as a short text, the same across sessions
+def signatureHash( signature ):
+	return hashlib.sha1( repr( signature ).encode('utf-8') ).hexdigest()
+
+
+
+"""
+    +-----------------------------------------------+
+    |    find an object in the document of the      |
+    |          App::Part linked by a link           |
+    +-----------------------------------------------+
+"""
+def getLinkedObject( link, objName ):
+	if not link or not link.LinkedObject:
+		return None
+	return link.LinkedObject.Document.getObject( objName )
+
+
+
+"""
+    +-----------------------------------------------+
+    |      build the attachment graph of a Model    |
+    |   from its attachment index: the links, the   |
+    |      datums, their LCS and constraints        |
+    +-----------------------------------------------+
+"""
+def buildGraph( doc ):
+	graph = {}
+	index = libIndex.getIndex( doc )
+	if not index:
+		return graph
+	# read the index only once
+	attachedTo    = index.AttachedTo
+	attachedToLCS = index.AttachedToLCS
+	attachedByLCS = index.AttachedByLCS
+	constraints   = index.Constraint
+	links = set( index.Links )
+	for name in index.Links + index.Datums:
+		obj = doc.getObject( name )
+		if not obj or not attachedTo.get( name ):
+			continue
+		expr = getPlacementExpression( obj )
+		if not expr:
+			continue
+		node = solverNode( obj, expr )
+		parent = attachedTo[ name ]
+		if parent == 'Parent Assembly':
+			# attached to an LCS of the Model itself
+			node.parents.append( attachedToLCS[ name ] )
+			node.attLCS = doc.getObject( attachedToLCS[ name ] )
+		else:
+			# attached to an LCS in a sister part
+			node.parents.append( parent )
+			node.attLink = doc.getObject( parent )
+			node.attLCS = getLinkedObject( node.attLink, attachedToLCS[ name ] )
+		# a linked part also has an AttachmentOffset and an LCS of its own
+		if name in links:
+			node.constr = libConstraints.getConstraint( doc, constraints.get( name, '' ) )
+			node.linkLCS = getLinkedObject( obj, attachedByLCS[ name ] )
+		graph[ name ] = node
+	addDependentObjects( doc, graph )
+	# only keep the dependencies that are themselves in the graph
+	for node in graph.values():
+		node.parents = [ name for name in node.parents if name in graph ]
+	return graph
+
+
+
+# the objects of the document that depend on the nodes, at any depth,
+# are nodes too: they must be recomputed after the nodes they depend on,
+# and before the nodes attached to them. The Model is recomputed last
+def addDependentObjects( doc, graph ):
+	pending = deque( node.obj for node in graph.values() )
+	while pending:
+		obj = pending.popleft()
+		for dependent in obj.InList:
+			if dependent.Document != doc or dependent.Name in graph or dependent.Name == 'Model':
+				continue
+			node = solverNode( dependent, None )
+			node.depends = [ dep for dep in dependent.OutList if dep.Document == doc ]
+			node.parents = [ dep.Name for dep in node.depends ]
+			graph[ dependent.Name ] = node
+			pending.append( dependent )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   sort the graph such that every node comes   |
+    |       after all the nodes it depends on       |
+    +-----------------------------------------------+
+"""
+def graphChildren( graph ):
+	children = dict( ( name, [] ) for name in graph )
+	for name, node in graph.items():
+		for parent in node.parents:
+			children[ parent ].append( name )
+	return children
+
+
+def sortGraph( graph ):
+	# Kahn's algorithm
+	children = graphChildren( graph )
+	pending = dict( ( name, len( node.parents ) ) for name, node in graph.items() )
+	# keep the document order for nodes at the same level
+	ready = deque( name for name in graph if pending[ name ] == 0 )
+	order = []
+	while ready:
+		name = ready.popleft()
+		order.append( name )
+		for child in children[ name ]:
+			pending[ child ] -= 1
+			if pending[ child ] == 0:
+				ready.append( child )
+	# whatever is left is part of a circular dependency
+	if len( order ) < len( graph ):
+		done = set( order )
+		looped = [ name for name in graph if name not in done ]
+		App.Console.PrintWarning( 'Assembly4 : circular dependency between '+', '.join( looped )+'\n' )
+		order.extend( looped )
+	return order
+
+
+# the length of the chain of attachments from the assembly to each node,
+# 1 for the nodes attached to the Model
+def chainLengths( graph, order ):
+	chains = {}
+	for name in order:
+		chains[ name ] = 1 + max( [ chains.get( parent, 0 ) for parent in graph[ name ].parents ] + [ 0 ] )
+	return chains
+
+
+# the number of nodes that move with each node. An object without
+# expression can depend on several nodes, it's counted under each
+def countDependents( graph, order ):
+	dependents = dict( ( name, 0 ) for name in order )
+	for name in reversed( order ):
+		for parent in graph[ name ].parents:
+			dependents[ parent ] += 1 + dependents[ name ]
+	return dependents
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the nodes that depend on an object, keyed   |
+    |      by ( document name, object name )        |
+    +-----------------------------------------------+
+"""
+def graphInputs( graph ):
+	inputs = {}
+	for name, node in graph.items():
+		inputs.setdefault( ( node.obj.Document.Name, name ), [] ).append( name )
+		for ( obj, prop ) in node.inputs():
+			if obj is not None:
+				inputs.setdefault( ( obj.Document.Name, obj.Name ), [] ).append( name )
+	return inputs
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the nodes depending on the changed objects, |
+    |          and all the nodes below them         |
+    +-----------------------------------------------+
+"""
+def affectedNodes( graph, inputs, changed ):
+	children = graphChildren( graph )
+	affected = set()
+	pending = deque()
+	for key in changed:
+		pending.extend( inputs.get( key, [] ) )
+	while pending:
+		name = pending.popleft()
+		if name not in affected:
+			affected.add( name )
+			pending.extend( children[ name ] )
+	return affected
+
+
+
+"""
+    +-----------------------------------------------+
+    |      is an object marked for recomputation    |
+    +-----------------------------------------------+
+"""
+def isTouched( obj ):
+	return 'Touched' in obj.State
+
+
+
+"""
+    +-----------------------------------------------+
+    |   recompute one object, timed per type when   |
+    |             profiling is active               |
+    +-----------------------------------------------+
+"""
+def recomputeObject( obj ):
+	if libProfiler.active:
+		with libProfiler.timer( 'recompute '+obj.TypeId ):
+			return obj.recompute()
+	return obj.recompute()
+
+
+
+"""
+    +-----------------------------------------------+
+    |    recompute the touched objects of the part  |
+    |   documents that are linked in the assembly   |
+    +-----------------------------------------------+
+"""
+def linkedDocuments( doc, create=True ):
+	linkedDocs = []
+	for obj in libIndex.getLinkedParts( doc, create ):
+		linked = obj.LinkedObject
+		if linked.Document != doc and linked.Document not in linkedDocs:
+			linkedDocs.append( linked.Document )
+	return linkedDocs
+
+
+def refreshLinkedDocuments( doc ):
+	for linkedDoc in linkedDocuments( doc ):
+		# a document recompute only recomputes what has been touched
+		for obj in linkedDoc.Objects:
+			if isTouched( obj ):
+				linkedDoc.recompute()
+				break
+
+
+
+"""
+    +-----------------------------------------------+
+    |     the ExpressionEngine solver: recompute    |
+    |   each node whose inputs changed, in order    |
+    +-----------------------------------------------+
+"""
+def solveRecompute( graph, order, lastSignatures, full=False, candidates=None, timings=None ):
+	signatures = {}
+	updated = []
+	recomputed = set()
+	for name in order:
+		# only the candidates can have changed
+		if candidates is not None and name not in candidates:
+			if name in lastSignatures:
+				signatures[ name ] = lastSignatures[ name ]
+			continue
+		node = graph[ name ]
+		signature = node.signature()
+		# an object without expression can change without moving, like a
+		# sketch: it's recomputed whenever one of its parents was
+		if full or isTouched( node.obj ) or lastSignatures.get( name ) != signature \
+				or ( node.expr is None and any( parent in recomputed for parent in node.parents ) ):
+			start = time.perf_counter()
+			recomputeObject( node.obj )
+			if timings is not None:
+				timings[ name ] = time.perf_counter() - start
+			updated.append( node.obj )
+			recomputed.add( name )
+		signatures[ name ] = signature
+	return ( updated, signatures )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the direct solver: read the same chain as   |
+    |   the expressions from the constraints, and   |
+    |   compose the placements ourselves, one       |
+    |   dependency level of the graph at a time.    |
+    |   The objects without expression are          |
+    |   recomputed by FreeCAD in their level, from  |
+    |   the placements of the levels before         |
+    +-----------------------------------------------+
+"""
+def solveDirect( doc, graph, order, lastSignatures, full=False, candidates=None, timings=None ):
+	# the nodes whose inputs changed, and everything downstream of them
+	dirty = set()
+	depth = chainLengths( graph, order )
+	for name in order:
+		node = graph[ name ]
+		if candidates is not None and name not in candidates:
+			continue
+		if full or isTouched( node.obj ) or any( parent in dirty for parent in node.parents ) \
+				or lastSignatures.get( name ) != node.signature():
+			dirty.add( name )
+	levels = {}
+	for name in order:
+		if name in dirty:
+			levels.setdefault( depth[ name ], [] ).append( name )
+	# the placements are written in one transaction, unless the caller has
+	# one open: opening another one would commit the caller's
+	transaction = not doc.HasPendingTransaction
+	if transaction:
+		doc.openTransaction( 'Solve Assembly' )
+	# compose the placements level by level, each level depending only on the previous ones
+	solved = {}
+	written = set()
+	recomputed = []
+	for level in sorted( levels ):
+		start = time.perf_counter()
+		names = []
+		chains = []
+		objects = [ name for name in levels[ level ] if graph[ name ].expr is None ]
+		if objects:
+			# they are recomputed from the placements already solved
+			writePlacements( graph, solved, written )
+			for name in objects:
+				objStart = time.perf_counter()
+				recomputeObject( graph[ name ].obj )
+				recomputed.append( name )
+				if timings is not None:
+					timings[ name ] = time.perf_counter() - objStart
+		for name in levels[ level ]:
+			if graph[ name ].expr is None:
+				continue
+			chain = placementChain( graph[ name ], solved )
+			if chain:
+				names.append( name )
+				chains.append( chain )
+			else:
+				App.Console.PrintWarning( 'Assembly4 : can\'t solve '+name+', broken attachment\n' )
+		for name, pla in zip( names, composePlacements( chains ) ):
+			solved[ name ] = pla
+		# a level is composed in one go, its nodes share its time
+		if timings is not None and names:
+			elapsed = ( time.perf_counter() - start ) / len( names )
+			for name in names:
+				timings[ name ] = elapsed
+	# write the other placements back in one go
+	writePlacements( graph, solved, written )
+	if transaction:
+		doc.commitTransaction()
+	# the expressions would give the same result, no need to re-evaluate them
+	signatures = {}
+	updated = []
+	recomputed = set( recomputed )
+	for name in order:
+		node = graph[ name ]
+		if name in solved:
+			node.obj.purgeTouched()
+			updated.append( node.obj )
+			signatures[ name ] = node.signature()
+		elif name in recomputed:
+			updated.append( node.obj )
+			signatures[ name ] = node.signature()
+		elif name in lastSignatures:
+			signatures[ name ] = lastSignatures[ name ]
+	return ( updated, signatures )
+
+
+
+# write the solved placements that are not yet in the document
+def writePlacements( graph, solved, written ):
+	for name, pla in solved.items():
+		if name not in written:
+			graph[ name ].obj.Placement = pla
+			written.add( name )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the 4 placements A, B, C, D of a node such  |
+    |      that its Placement is A * B * C * D^-1   |
+    |    links: Link * LCS * AttachmentOffset * LCS |
+    |    datums: Link * LCS                         |
+    |   offsets replaces some AttachmentOffsets,    |
+    |   by link name, like for a sweep              |
+    +-----------------------------------------------+
+"""
+def placementChain( node, solved, offsets=None ):
+	if node.attLCS is None:
+		return None
+	identity = App.Placement()
+	if node.attLink:
+		linkPla = solved.get( node.attLink.Name, node.attLink.Placement )
+	else:
+		linkPla = identity
+	# an LCS of the Model can itself be an imported datum, solved before
+	if not node.attLink and node.attLCS.Name in solved:
+		lcsPla = solved[ node.attLCS.Name ]
+	else:
+		lcsPla = node.attLCS.Placement
+	if node.obj.isDerivedFrom('App::Link'):
+		if node.constr is None or node.linkLCS is None:
+			return None
+		if offsets and node.obj.Name in offsets:
+			offset = offsets[ node.obj.Name ]
+		else:
+			offset = node.constr.AttachmentOffset
+		return ( linkPla, lcsPla, offset, node.linkLCS.Placement )
+	return ( linkPla, lcsPla, identity, identity )
+
+
+
+"""
+    +-----------------------------------------------+
+    |     compute A * B * C * D^-1 for a batch of   |
+    |      placement chains, as 4x4 matrices if     |
+    |            NumPy is available                 |
+    +-----------------------------------------------+
+"""
+def composePlacements( chains ):
+	if not chains:
+		return []
+	loadNumpy()
+	if numpy is None:
+		return [ a.multiply( b ).multiply( c ).multiply( d.inverse() ) for ( a, b, c, d ) in chains ]
+	mats = numpy.array( [ [ pla.toMatrix().A for pla in chain ] for chain in chains ] ).reshape( len( chains ), 4, 4, 4 )
+	# D is a rigid transformation: its inverse is ( R^T, -R^T.t )
+	rot = mats[ :, 3, :3, :3 ]
+	inv = numpy.zeros( ( len( chains ), 4, 4 ) )
+	inv[ :, :3, :3 ] = rot.transpose( 0, 2, 1 )
+	inv[ :, :3, 3 ] = -numpy.einsum( 'nji,nj->ni', rot, mats[ :, 3, :3, 3 ] )
+	inv[ :, 3, 3 ] = 1.
+	result = numpy.einsum( 'nij,njk->nik', mats[ :, 0 ], mats[ :, 1 ] )
+	result = numpy.einsum( 'nij,njk->nik', result, mats[ :, 2 ] )
+	result = numpy.einsum( 'nij,njk->nik', result, inv )
+	return [ App.Placement( App.Matrix( *mat.flatten().tolist() ) ) for mat in result ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |        solve the assembly in a document:      |
+    |   update, in dependency order, only the       |
+    |    links and datums whose inputs changed      |
+    |              since the last solve             |
+    |                                               |
+    |   direct=True bypasses the ExpressionEngine,  |
+    |   by default it's read from the preferences   |
+    |                                               |
+    |   changed is a set of ( document name, object |
+    |   name ) from the document observer: only the |
+    |   nodes depending on them are looked at, if   |
+    |    the graph of the last solve is still valid |
+    +-----------------------------------------------+
+"""
+def solveAssembly( doc, full=False, direct=None, changed=None ):
+	# the compact constraint table is read only once for the whole solve
+	with libConstraints.frozen( doc ):
+		if direct is None:
+			direct = App.ParamGet( paramPath ).GetBool( 'DirectSolver', False )
+		cached = None
+		if changed is not None and not full:
+			cached = solvedGraphs.get( doc.Name )
+		if cached:
+			( graph, order, inputs ) = cached
+			candidates = affectedNodes( graph, inputs, changed )
+			if not candidates:
+				return []
+			# the changed objects that are not solved by us, those in the linked parts first
+			for ( docName, objName ) in sorted( changed, key=lambda key: key[0] == doc.Name ):
+				changedDoc = App.listDocuments().get( docName )
+				obj = changedDoc.getObject( objName ) if changedDoc else None
+				if not obj or not isTouched( obj ):
+					continue
+				if changedDoc != doc:
+					changedDoc.recompute()
+				elif objName not in graph:
+					recomputeObject( obj )
+		else:
+			candidates = None
+			# first bring the linked parts up-to-date
+			refreshLinkedDocuments( doc )
+			# a full solve also re-reads the attachments from the expressions
+			if full:
+				libIndex.buildIndex( doc )
+			graph = buildGraph( doc )
+			# then the objects in the assembly that are not solved by us,
+			# like LCS attached with a MapMode
+			for obj in doc.TopologicalSortedObjects:
+				if obj.Name not in graph and isTouched( obj ):
+					recomputeObject( obj )
+			# and now the attachment graph
+			order = sortGraph( graph )
+			solvedGraphs[ doc.Name ] = ( graph, order, graphInputs( graph ) )
+		lastSignatures = solvedSignatures.get( doc.Name )
+		# the first solve since the document was opened starts from the
+		# placements saved with it, only the objects whose inputs changed are solved
+		if lastSignatures is None and not full:
+			lastSignatures = restoreSolved( doc, graph, order )
+		lastSignatures = lastSignatures or {}
+		timings = {}
+		if direct:
+			( updated, signatures ) = solveDirect( doc, graph, order, lastSignatures, full, candidates, timings )
+		else:
+			( updated, signatures ) = solveRecompute( graph, order, lastSignatures, full, candidates, timings )
+		solvedSignatures[ doc.Name ] = signatures
+		storeSolved( doc, graph, signatures, updated, rebuilt=candidates is None )
+		updateStats( doc, graph, order, timings, rebuilt=candidates is None )
+		# finally update the parent assembly
+		model = doc.getObject('Model')
+		if model:
+			model.recompute()
+		return updated
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the solved placements saved in the index,   |
+    |   with the hash of the inputs they were       |
+    |   solved from. When the inputs are the same   |
+    |   after the document is opened, the saved     |
+    |   placement is still right: it's restored     |
+    |   and the object isn't solved again           |
+    +-----------------------------------------------+
+"""
+def restoreSolved( doc, graph, order ):
+	( hashes, placements ) = libIndex.getSolved( doc )
+	signatures = {}
+	if not hashes:
+		return signatures
+	# in order, the inputs of a node can be the restored placements of its parents
+	for name in order:
+		node = graph[ name ]
+		signature = node.signature()
+		if hashes.get( name ) != signatureHash( signature ):
+			continue
+		# an object without expression was saved with the document as it was solved
+		if node.expr is None:
+			node.obj.purgeTouched()
+			signatures[ name ] = signature
+			continue
+		if name not in placements:
+			continue
+		pla = parsePlacement( placements[ name ] )
+		if placementKey( node.obj.Placement ) != placementKey( pla ):
+			node.obj.Placement = pla
+		node.obj.purgeTouched()
+		signatures[ name ] = signature
+	return signatures
+
+
+# only the objects solved again, or not saved yet, are hashed
+def storeSolved( doc, graph, signatures, updated, rebuilt=True ):
+	( hashes, placements ) = libIndex.getSolved( doc )
+	saved = bool( hashes )
+	solved = set( obj.Name for obj in updated )
+	changed = False
+	for name, signature in signatures.items():
+		if name in hashes and name not in solved:
+			continue
+		digest = signatureHash( signature )
+		# only the placements driven by an expression are saved
+		hasPlacement = graph[ name ].expr is not None
+		if hashes.get( name ) != digest or ( hasPlacement and name not in placements ):
+			hashes[ name ] = digest
+			if hasPlacement:
+				placements[ name ] = placementString( graph[ name ].obj.Placement )
+			changed = True
+	# forget the objects that are not in the graph anymore
+	if rebuilt:
+		for name in [ name for name in hashes if name not in graph ]:
+			del hashes[ name ]
+			placements.pop( name, None )
+			changed = True
+	# nothing solved now nor before, the document isn't modified
+	if changed and ( solved or saved ):
+		libIndex.setSolved( doc, hashes, placements )
+
+
+# after a document was opened, or one of its linked documents reloaded:
+# restore what can be, returns how many objects still have to be solved
+def restoreAssembly( doc ):
+	with libConstraints.frozen( doc ):
+		graph = buildGraph( doc )
+		order = sortGraph( graph )
+		signatures = restoreSolved( doc, graph, order )
+	solvedSignatures[ doc.Name ] = signatures
+	return len( order ) - len( signatures )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the sub-assemblies of an assembly: the      |
+    |   documents of its linked parts that are      |
+    |   Asm4 Models with links themselves, each     |
+    |   only once. A partially loaded one is not    |
+    |   solved, its shapes come from its file. The  |
+    |   linked documents are only read: a part      |
+    |   file doesn't get an index                   |
+    +-----------------------------------------------+
+"""
+def isAssembly( part ):
+	doc = part.Document
+	# every Asm4 part has a Model and its Constraints, an assembly also has links
+	if part.Name != 'Model' or doc.getObject('Constraints') is None:
+		return False
+	if libIndex.getIndex( doc, create=False ):
+		return True
+	return any( obj.isDerivedFrom('App::Link') for obj in part.Group )
+
+
+def subAssemblies( doc ):
+	subDocs = []
+	for linkedDoc in linkedDocuments( doc, create=False ):
+		model = linkedDoc.getObject('Model')
+		if model and isAssembly( model ) and not isPartial( linkedDoc ):
+			subDocs.append( linkedDoc )
+	return subDocs
+
+
+# all the sub-assemblies at any depth, each before the assemblies that
+# link it and only once however many times it's linked, the assembly
+# itself last: [ ( doc, subDocs ) ]
+def assemblyOrder( doc ):
+	order = []
+	visited = set()
+	pending = [ ( doc, None ) ]
+	while pending:
+		( current, subDocs ) = pending.pop()
+		# a document is added once all its sub-assemblies are
+		if subDocs is not None:
+			order.append( ( current, subDocs ) )
+			continue
+		if current.Name in visited:
+			continue
+		visited.add( current.Name )
+		subDocs = subAssemblies( current )
+		pending.append( ( current, subDocs ) )
+		for subDoc in reversed( subDocs ):
+			if subDoc.Name not in visited:
+				pending.append( ( subDoc, None ) )
+	return order
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the stamp of a solved sub-assembly: what    |
+    |   the assemblies linking it see, the          |
+    |   placements of the objects in its Model,     |
+    |   and the stamps of its own sub-assemblies    |
+    +-----------------------------------------------+
+"""
+def assemblyStamp( doc, subStamps ):
+	placements = []
+	model = doc.getObject('Model')
+	if model:
+		for obj in model.Group:
+			if hasattr( obj, 'Placement' ):
+				placements.append( ( obj.Name, placementKey( obj.Placement ) ) )
+	return signatureHash( ( placements, subStamps ) )
+
+
+# a sub-assembly is still solved if nothing was edited in it, nor in the
+# parts it links, and its own sub-assemblies are as they were
+def isSolved( doc, subStamps ):
+	last = solvedAssemblies.get( doc.Name )
+	if not last or last[1] != subStamps or doc.Name not in solvedSignatures:
+		return False
+	for checkedDoc in [ doc ] + linkedDocuments( doc, create=False ):
+		for obj in checkedDoc.Objects:
+			if isTouched( obj ):
+				return False
+	return True
+
+
+
+"""
+    +-----------------------------------------------+
+    |   solve an assembly and its sub-assemblies,   |
+    |   bottom-up: each sub-assembly is solved      |
+    |   once, and not at all if it didn't change    |
+    |   since it was last solved, so that the time  |
+    |   depends on the number of sub-assemblies,    |
+    |   not on the number of their instances        |
+    +-----------------------------------------------+
+"""
+def solveHierarchy( doc, full=False, direct=None ):
+	updated = []
+	stamps = {}
+	for ( subDoc, subDocs ) in assemblyOrder( doc ):
+		subStamps = tuple( ( linked.Name, stamps[ linked.Name ] ) for linked in subDocs if linked.Name in stamps )
+		# the assembly itself is always solved, incrementally
+		if subDoc == doc or full or not isSolved( subDoc, subStamps ):
+			updated += solveAssembly( subDoc, full, direct )
+		stamps[ subDoc.Name ] = assemblyStamp( subDoc, subStamps )
+		solvedAssemblies[ subDoc.Name ] = ( stamps[ subDoc.Name ], subStamps )
+	return updated
+
+
+
+"""
+    +-----------------------------------------------+
+    |   forget the last solve, the next one starts  |
+    |     from the placements saved in the index    |
+    +-----------------------------------------------+
+"""
+def resetSolver( doc=None ):
+	invalidateGraph( doc )
+	if doc is None:
+		solvedSignatures.clear()
+		solvedAssemblies.clear()
+	else:
+		solvedSignatures.pop( doc.Name, None )
+		solvedAssemblies.pop( doc.Name, None )
+
+
+# the structure of the document changed, the next solve rebuilds its graph
+def invalidateGraph( doc=None ):
+	if doc is None:
+		solvedGraphs.clear()
+	else:
+		solvedGraphs.pop( doc.Name, None )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   record the recompute times of a solve, the  |
+    |   chain lengths are only computed again when  |
+    |             the graph was rebuilt             |
+    +-----------------------------------------------+
+"""
+def updateStats( doc, graph, order, timings, rebuilt=True ):
+	stats = solveStats.get( doc.Name )
+	if stats is None or rebuilt:
+		chains = chainLengths( graph, order )
+		dependents = countDependents( graph, order )
+		previous = stats or {}
+		stats = {}
+		for name in order:
+			node = graph[ name ]
+			entry = previous.get( name ) or { 'recomputes': 0, 'last': 0., 'total': 0. }
+			entry['constraint'] = libConstraints.referenceOf( node.constr ) if node.constr else ''
+			entry['chain'] = chains[ name ]
+			entry['dependents'] = dependents[ name ]
+			stats[ name ] = entry
+		solveStats[ doc.Name ] = stats
+	for name, seconds in timings.items():
+		entry = stats.get( name )
+		if entry:
+			entry['recomputes'] += 1
+			entry['last'] = seconds
+			entry['total'] += seconds
+
+
+def resetStats( doc=None ):
+	if doc is None:
+		solveStats.clear()
+	else:
+		solveStats.pop( doc.Name, None )
+
+
+# the statistics of a document as records, the most expensive first
+def getStats( doc ):
+	records = []
+	for name, entry in solveStats.get( doc.Name, {} ).items():
+		record = dict( entry )
+		record['name'] = name
+		record['mean'] = entry['total'] / entry['recomputes'] if entry['recomputes'] else 0.
+		records.append( record )
+	return sorted( records, key=lambda record: record['total'], reverse=True )
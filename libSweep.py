@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# libSweep.py
+#
+# sweep the AttachmentOffset of some links across a range, to check the
+# motion of a mechanism: the placements of every frame are computed by
+# the direct solver, only for the links and datums that move. The objects
+# that FreeCAD recomputes, like a sketch and the LCS mapped on it, are
+# recomputed for each frame
+# this file doesn't use the GUI
+
+
+import FreeCAD as App
+import array, json, time
+
+import libSolver
+import libConstraints
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the parameters of an AttachmentOffset that  |
+    |   can be driven: its position, in mm, and its |
+    |   rotation as yaw-pitch-roll, in degrees,     |
+    |   like in FreeCAD's Placement editor          |
+    +-----------------------------------------------+
+"""
+parameters = [ 'x', 'y', 'z', 'yaw', 'pitch', 'roll' ]
+
+# a placement is recorded as x, y, z and its quaternion
+recordSize = 7
+
+
+def setParameter( pla, parameter, value ):
+	pla = App.Placement( pla )
+	if parameter in [ 'x', 'y', 'z' ]:
+		base = App.Vector( pla.Base )
+		setattr( base, parameter, value )
+		pla.Base = base
+	else:
+		angles = list( pla.Rotation.toEuler() )
+		angles[ parameters.index( parameter ) - 3 ] = value
+		pla.Rotation = App.Rotation( *angles )
+	return pla
+
+
+
+"""
+    +-----------------------------------------------+
+    |   a driver moves one parameter of the         |
+    |   AttachmentOffset of a link, linearly from   |
+    |   start to end over the frames                |
+    +-----------------------------------------------+
+"""
+class sweepDriver(object):
+
+	def __init__( self, linkName, parameter, start, end ):
+		if parameter not in parameters:
+			raise ValueError( 'unknown parameter '+parameter+', use one of '+', '.join( parameters ) )
+		self.linkName = linkName
+		self.parameter = parameter
+		self.start = float( start )
+		self.end = float( end )
+
+
+	def value( self, frame, frames ):
+		if frames < 2:
+			return self.start
+		return self.start + ( self.end - self.start ) * frame / ( frames - 1 )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the result of a sweep: the placements of    |
+    |   the objects that move, for every frame, in  |
+    |   one flat array of doubles                   |
+    +-----------------------------------------------+
+"""
+class sweepRecord(object):
+
+	def __init__( self, docName, names, drivers, frames ):
+		self.docName = docName
+		self.names = names
+		self.drivers = drivers
+		self.frames = frames
+		self.values = array.array( 'd' )
+		# the placements before the sweep, to go back to them
+		self.rest = {}
+		# the objects recomputed by FreeCAD for each frame, in order
+		self.recomputed = []
+		# how long the solves took, in seconds
+		self.elapsed = 0.
+
+
+	def fps( self ):
+		if not self.elapsed:
+			return 0.
+		return self.frames / self.elapsed
+
+
+	def getPlacement( self, frame, name ):
+		first = ( frame * len( self.names ) + self.names.index( name ) ) * recordSize
+		values = self.values[ first:first + recordSize ]
+		return App.Placement( App.Vector( *values[:3] ), App.Rotation( *values[3:] ) )
+
+
+	# { name: Placement } of a frame
+	def getFrame( self, frame ):
+		first = frame * len( self.names ) * recordSize
+		placements = {}
+		for i, name in enumerate( self.names ):
+			values = self.values[ first + i * recordSize:first + ( i + 1 ) * recordSize ]
+			placements[ name ] = App.Placement( App.Vector( *values[:3] ), App.Rotation( *values[3:] ) )
+		return placements
+
+
+	# as a NumPy array of ( frames, objects, 7 ), if NumPy is available
+	def toArray( self ):
+		import numpy
+		return numpy.frombuffer( self.values, dtype=numpy.float64 ).reshape( self.frames, len( self.names ), recordSize )
+
+
+
+"""
+    +-----------------------------------------------+
+    |   compute the placements of all the frames:   |
+    |   the graph is built once, and each frame     |
+    |   only composes the placements of the driven  |
+    |   links and of what's attached to them, with  |
+    |   the offsets of the frame. If a sketch or an |
+    |   LCS mapped on it moves with them, the       |
+    |   placements are written in the document for  |
+    |   FreeCAD to recompute it, and put back after |
+    |   the last frame                              |
+    +-----------------------------------------------+
+"""
+def sweep( doc, drivers, frames ):
+	with libConstraints.frozen( doc ):
+		graph = libSolver.buildGraph( doc )
+		order = libSolver.sortGraph( graph )
+		offsets = {}
+		for driver in drivers:
+			node = graph.get( driver.linkName )
+			if node is None or node.constr is None:
+				raise ValueError( driver.linkName+' is not an attached link' )
+			offsets[ driver.linkName ] = node.constr.AttachmentOffset
+	# the driven links and all the objects attached to them, by dependency level
+	inputs = libSolver.graphInputs( graph )
+	affected = libSolver.affectedNodes( graph, inputs, [ ( doc.Name, name ) for name in offsets ] )
+	affected = [ name for name in order if name in affected ]
+	depth = libSolver.chainLengths( graph, order )
+	levels = {}
+	for name in affected:
+		levels.setdefault( depth[ name ], [] ).append( name )
+	# only the objects that have a Placement are recorded
+	names = [ name for name in affected if hasattr( graph[ name ].obj, 'Placement' ) ]
+	record = sweepRecord( doc.Name, names, drivers, frames )
+	record.recomputed = [ name for name in affected if graph[ name ].expr is None ]
+	for name in names:
+		record.rest[ name ] = graph[ name ].obj.Placement
+	start = time.perf_counter()
+	try:
+		for frame in range( frames ):
+			frameOffsets = dict( offsets )
+			for driver in drivers:
+				frameOffsets[ driver.linkName ] = setParameter( frameOffsets[ driver.linkName ], driver.parameter,
+																driver.value( frame, frames ) )
+			solved = {}
+			written = set()
+			for level in sorted( levels ):
+				objects = [ name for name in levels[ level ] if graph[ name ].expr is None ]
+				if objects:
+					# they are recomputed from the placements of this frame
+					libSolver.writePlacements( graph, solved, written )
+					for name in objects:
+						libSolver.recomputeObject( graph[ name ].obj )
+				solvable = []
+				chains = []
+				for name in levels[ level ]:
+					if graph[ name ].expr is None:
+						continue
+					chain = libSolver.placementChain( graph[ name ], solved, frameOffsets )
+					if chain:
+						solvable.append( name )
+						chains.append( chain )
+				for name, pla in zip( solvable, libSolver.composePlacements( chains ) ):
+					solved[ name ] = pla
+			# a broken attachment stays where it is
+			for name in names:
+				if graph[ name ].expr is None:
+					pla = graph[ name ].obj.Placement
+				else:
+					pla = solved.get( name, record.rest[ name ] )
+				record.values.extend( libSolver.placementKey( pla ) )
+	finally:
+		if record.recomputed:
+			restoreRest( doc, record )
+	record.elapsed = time.perf_counter() - start
+	return record
+
+
+
+"""
+    +-----------------------------------------------+
+    |   show a frame in the document, and go back   |
+    |   to the placements before the sweep. The     |
+    |   expressions aren't evaluated, the next      |
+    |   solve puts the links back where they were.  |
+    |   The recomputed objects are recomputed from  |
+    |   the placements put back                     |
+    +-----------------------------------------------+
+"""
+def applyFrame( doc, record, frame ):
+	for name, pla in record.getFrame( frame ).items():
+		obj = doc.getObject( name )
+		if obj:
+			obj.Placement = pla
+
+
+def restoreRest( doc, record ):
+	for name, pla in record.rest.items():
+		obj = doc.getObject( name )
+		if obj and name not in record.recomputed:
+			obj.Placement = pla
+	for name in record.recomputed:
+		obj = doc.getObject( name )
+		if obj:
+			libSolver.recomputeObject( obj )
+	for name in list( record.rest ) + record.recomputed:
+		obj = doc.getObject( name )
+		if obj:
+			obj.purgeTouched()
+
+
+
+"""
+    +-----------------------------------------------+
+    |   write a sweep as CSV, one line per frame    |
+    |   and object, or as JSON with the drivers     |
+    +-----------------------------------------------+
+"""
+def writeSweep( path, record ):
+	columns = [ 'x', 'y', 'z', 'q0', 'q1', 'q2', 'q3' ]
+	if path.lower().endswith('.csv'):
+		with open( path, 'w' ) as out:
+			out.write( ','.join( [ 'frame', 'object' ] + columns )+'\n' )
+			for frame in range( record.frames ):
+				for i, name in enumerate( record.names ):
+					first = ( frame * len( record.names ) + i ) * recordSize
+					values = record.values[ first:first + recordSize ]
+					out.write( ','.join( [ str( frame ), name ] + [ repr( value ) for value in values ] )+'\n' )
+	else:
+		report = { 'document': record.docName,
+				   'frames': record.frames,
+				   'drivers': [ { 'link': driver.linkName, 'parameter': driver.parameter,
+								  'start': driver.start, 'end': driver.end } for driver in record.drivers ],
+				   'objects': record.names,
+				   'columns': columns,
+				   'placements': record.values.tolist() }
+		with open( path, 'w' ) as out:
+			json.dump( report, out )
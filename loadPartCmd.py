@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# loadPartCmd.py
+#
+# load completely the partially loaded parts of an assembly
+
+
+import FreeCADGui as Gui
+import FreeCAD as App
+
+from libAsm4 import *
+
+
+
+class loadPart:
+	"My tool object"
+
+	def GetResources(self):
+		return {"MenuText": "Load linked Part completely",
+				"ToolTip": "Load the whole document of the selected linked parts, or of all of them, to edit it",
+				"Pixmap" : os.path.join( iconPath , 'Link_Part.svg')
+				}
+
+
+	def IsActive(self):
+		# is there a partially loaded document ?
+		for doc in App.listDocuments().values():
+			if isPartial( doc ):
+				return(True)
+		return(False)
+
+
+	def Activated(self):
+		# the selected links, or all the partially loaded documents
+		links = [ obj for obj in Gui.Selection.getSelection() if obj.isDerivedFrom('App::Link') ]
+		if links:
+			docs = [ link.LinkedObject.Document for link in links if link.LinkedObject ]
+		else:
+			docs = list( App.listDocuments().values() )
+		for fileName in set( doc.FileName for doc in docs if isPartial( doc ) ):
+			App.openDocument( fileName )
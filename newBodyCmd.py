@@ -67,7 +67,3 @@ class newBody:
 			return App.ActiveDocument.getObject('Model')
 		else:
 			return(False)
-
-
-# add the command to the workbench
-Gui.addCommand( 'newBodyCmd', newBody() )
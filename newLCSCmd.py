@@ -70,6 +70,3 @@ class newLCS:
 		else:
 			return(False)
 		
-
-# add the command to the workbench
-Gui.addCommand( 'newLCSCmd', newLCS() )
@@ -36,10 +36,8 @@ class newModel:
 		self.activeDoc = App.activeDocument()
 		# check whether there is already Model in the document
 		if not self.checkModel():
-			# create a new App::Part called 'Model'
-			self.activeDoc.Tip = self.activeDoc.addObject('App::Part','Model')
-			self.activeDoc.getObject('Model').newObject('App::DocumentObjectGroup','Constraints')
-			self.activeDoc.getObject('Model').newObject('PartDesign::CoordinateSystem','LCS_0')
+			# create a new App::Part called 'Model', with its Constraints, LCS_0 and index
+			makeModel( self.activeDoc )
 
 
 	def checkModel(self):
@@ -55,7 +53,3 @@ class newModel:
 			return(True)
 		else:
 			return(False)
-
-
-# add the command to the workbench
-Gui.addCommand( 'newModelCmd', newModel() )
@@ -36,7 +36,3 @@ class newPart:
 		text,ok = QtGui.QInputDialog.getText(None,'Create new Part','Enter new Part name :                                        ', text = partName)
 		if ok and text:
 			App.activeDocument().addObject('App::Part',text)
-
-
-# add the command to the workbench
-Gui.addCommand( 'newPartCmd', newPart() )
@@ -69,5 +69,3 @@ class newPlane:
 			return(False)
 		
 		
-# add the command to the workbench
-Gui.addCommand( 'newPlaneCmd', newPlane() )
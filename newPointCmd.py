@@ -69,5 +69,3 @@ class newPoint:
 			return(False)
 		
 		
-# add the command to the workbench
-Gui.addCommand( 'newPointCmd', newPoint() )
@@ -67,8 +67,3 @@ class newSketch:
 			return App.ActiveDocument.getObject('Model')
 		else:
 			return(False)
-
-
-# add the command to the workbench
-Gui.addCommand( 'newSketchCmd', newSketch() )
-
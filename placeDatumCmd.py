@@ -10,6 +10,8 @@ import FreeCAD as App
 import Part, math, re
 
 from libAsm4 import *
+import libIndex
+import libGui
 
 
 
@@ -25,6 +27,7 @@ class placeDatum( QtGui.QDialog ):
 	def __init__(self):
 		super(placeDatum,self).__init__()
 		self.selectedDatum = []
+		self.session = None
 
 
 	def GetResources(self):
@@ -68,6 +71,9 @@ class placeDatum( QtGui.QDialog ):
 		self.drawUI()
 		self.show()
 
+		# all the changes until OK or Cancel are one undo step
+		self.session = libGui.editSession( self.activeDoc, 'Place '+self.selectedDatum.Name )
+
 
 		# check if the datum object is already mapped to something
 		# TODO : make a warning and confirmation dialog with "Cancel" and "OK" buttons
@@ -76,57 +82,32 @@ class placeDatum( QtGui.QDialog ):
 			self.selectedDatum.MapMode = 'Deactivated'
 
 
-		# We get all the App::Link parts in the assembly 
-		self.asmParts = []
-		# the first item is "Select linked Part" therefore we add an empty object
-		self.asmParts.append( [] )
-		# find all the linked parts in the assembly
-		for obj in self.activeDoc.findObjects("App::Link"):
-			if obj.LinkedObject.isDerivedFrom('App::Part'):
-				# add it to our tree table if it's a link to an App::Part ...
-				self.asmParts.append( obj )
-				# ... and add to the drop-down combo box with the assembly tree's parts
-				objIcon = obj.LinkedObject.ViewObject.Icon
-				self.parentList.addItem( objIcon, obj.Name, obj)
-
-
-		# get and store the current expression engine:
-		self.old_EE = ''
-		old_EE = self.selectedDatum.ExpressionEngine
-		if old_EE:
-			( pla, self.old_EE ) = old_EE[0]
-
-		# decode the old ExpressionEngine
-		# if the decode is unsuccessful, old_Expression is set to False
-		# and old_attPart and old_attLCS are set to 'None'
+		# We get all the App::Link parts in the assembly, after "Select linked Part"
+		# the combo-box gets its rows when they're shown
+		self.parentList.blockSignals( True )
+		self.parentList.model().setObjects( libIndex.getLinkedParts( self.activeDoc ),
+			[ ( 'Select linked Part', None, None, None ) ] )
+		self.parentList.setCurrentIndex( 0 )
+		self.parentList.blockSignals( False )
+
+
+		# look-up the old attachment in the assembly's index
 		old_Parent = ''
-		old_ParentPart = ''
 		old_attLCS = ''
-		( old_Parent, old_ParentPart, old_attLCS ) = splitExpressionDatum( self.old_EE )
+		attachment = libIndex.getAttachment( self.activeDoc, self.selectedDatum.Name )
+		if attachment:
+			( old_Parent, old_attLCS, attachedByLCS, constrName ) = attachment
 		#self.expression.setText( 'old_Parent = '+ old_Parent )
 
 
 		# find the oldPart in the part list...
-		oldPart = self.parentList.findText( old_Parent )
-		# if not found
-		if oldPart == -1:
-			self.parentList.setCurrentIndex( 0 )
-		else:
-			self.parentList.setCurrentIndex( oldPart )
-			# this should have triggered self.getPartLCS() to fill the LCS list
+		libGui.selectName( self.parentList, old_Parent )
+		# this should have triggered self.getPartLCS() to fill the LCS list
 
 
-		# find the oldLCS in the list of LCS of the linked part...
-		lcs_found = []
-		lcs_found = self.attLCSlist.findItems( old_attLCS, QtCore.Qt.MatchExactly )
-		if lcs_found:
-			# ... and select it
-			self.attLCSlist.setCurrentItem( lcs_found[0] )
-		else:
-			# may-be it was renamed, see if we can find it as (name)
-			lcs_found = self.attLCSlist.findItems( '('+old_attLCS+')', QtCore.Qt.MatchContains )
-			if lcs_found:
-				self.attLCSlist.setCurrentItem( lcs_found[0] )
+		# find the oldLCS in the list of LCS of the linked part, by its name
+		# even if it was renamed, and select it
+		libGui.selectName( self.attLCSlist, old_attLCS )
 
 
 
@@ -153,8 +134,8 @@ class placeDatum( QtGui.QDialog ):
 		# get the name of the part to attach to:
 		# it's either the top level part name ('Model')
 		# or the provided link's name.
-		if self.parentList.currentIndex() > 0:
-			parent = self.asmParts[ self.parentList.currentIndex() ]
+		parent = libGui.selectedData( self.parentList )
+		if parent:
 			a_Link = parent.Name
 			a_Part = parent.LinkedObject.Document.Name
 		else:
@@ -163,11 +144,10 @@ class placeDatum( QtGui.QDialog ):
 
 
 		# the attachment LCS's name in the parent
-		# check that something is selected in the QlistWidget
-		if self.attLCSlist.selectedItems():
-			a_LCS = self.attLCStable[ self.attLCSlist.currentRow() ].Name
-		else:
-			a_LCS = None
+		# check that something is selected in the list
+		a_LCS = libGui.selectedData( self.attLCSlist )
+		if a_LCS:
+			a_LCS = a_LCS.Name
 
 		# check that all of them have something in
 		# constrName has been checked at the beginning
@@ -182,8 +162,10 @@ class placeDatum( QtGui.QDialog ):
 			self.expression.setText( expr )
 			# load the built expression into the Expression field of the constraint
 			self.activeDoc.getObject( self.selectedDatum.Name ).setExpression( 'Placement', expr )
-			# recompute the object to apply the placement:
-			self.selectedDatum.recompute()
+			# and keep the assembly's index up-to-date
+			libIndex.setEntry( self.activeDoc, self.selectedDatum, a_Link, a_LCS )
+			# recompute the object to apply the placement, once the UI is idle
+			self.session.touch( self.selectedDatum )
 			# highlight the selected LCS in its new position
 			Gui.Selection.clearSelection()
 			Gui.Selection.addSelection( self.activeDoc.Name, 'Model', self.selectedDatum.Name +'.')
@@ -211,15 +193,7 @@ class placeDatum( QtGui.QDialog ):
     +-----------------------------------------------+
 	"""
 	def getPartLCS( self, part ):
-		partLCS = [ ]
-		# parse all objects in the part (they return strings)
-		for objName in part.getSubObjects():
-			# get the proper objects
-			# all object names end with a "." , this needs to be removed
-			obj = part.getObject( objName[0:-1] )
-			if obj.TypeId == 'PartDesign::CoordinateSystem' or obj.TypeId == 'PartDesign::Point':
-				partLCS.append( obj )
-		return partLCS
+		return getPartDatums( part )
 
 
 	"""
@@ -228,30 +202,22 @@ class placeDatum( QtGui.QDialog ):
     +------------------------------------------------+
 	"""
 	def onParentList(self):
-		# clear the LCS list
-		self.attLCSlist.clear()
 		self.attLCStable = []
 		# clear the selection in the GUI window
 		Gui.Selection.clearSelection()
-		# the current text in the combo-box is the link's name...
-		parentName = self.parentList.currentText()
-		parentPart = self.activeDoc.getObject( parentName )
+		# the selected object in the combo-box is the link
+		parentPart = libGui.selectedData( self.parentList )
 		if parentPart:
 			# we get the LCS from the linked part
-			self.attLCStable = self.getPartLCS( parentPart.LinkedObject )
+			self.attLCStable = self.getPartLCS( loadLinkedPart( parentPart ) )
 			self.parentDoc.setText( parentPart.LinkedObject.Document.Name )
 			# highlight the selected part:
 			Gui.Selection.addSelection( parentPart.Document.Name, 'Model', parentPart.Name+'.' )
-		# build the list
-		for lcs in self.attLCStable:
-			newItem = QtGui.QListWidgetItem()
-			# if the LCS has been renamed, we show both the label and the (name)
-			if lcs.Name == lcs.Label:
-				newItem.setText( lcs.Name )
-			else:
-				newItem.setText( lcs.Label + ' (' +lcs.Name+ ')' )
-			newItem.setIcon( lcs.ViewObject.Icon )
-			self.attLCSlist.addItem( newItem )
+		# build the list, which is cleared with its search field
+		self.attLCSsearch.blockSignals( True )
+		self.attLCSsearch.clear()
+		self.attLCSsearch.blockSignals( False )
+		self.attLCSlist.model().setObjects( self.attLCStable )
 		return
 
 
@@ -268,11 +234,12 @@ class placeDatum( QtGui.QDialog ):
 		# clear the selection in the GUI window
 		Gui.Selection.clearSelection()
 		# check that something is selected
-		if self.attLCSlist.selectedItems():
+		a_LCS = libGui.selectedData( self.attLCSlist )
+		if a_LCS:
 			# get the linked part where the selected LCS is
-			a_Part = self.parentList.currentText()
+			a_Part = libGui.selectedData( self.parentList ).Name
 			# LCS in the linked part
-			a_LCS = self.attLCStable[ self.attLCSlist.currentRow() ].Name
+			a_LCS = a_LCS.Name
 			# Gui.Selection.addSelection('asm_Test','Model','Lego_3001.LCS_h2x1.')
 			# Gui.Selection.addSelection('asm_Test','Model','LCS_0.')
 			Gui.Selection.addSelection( self.activeDoc.Name, 'Model', a_Part+'.'+a_LCS+'.')
@@ -286,10 +253,8 @@ class placeDatum( QtGui.QDialog ):
     +-----------------------------------------------+
 	"""
 	def onCancel(self):
-		# restore previous expression if it existed
-		if self.old_EE:
-			self.selectedDatum.setExpression('Placement', self.old_EE )
-		self.selectedDatum.recompute()
+		# restore the previous expression, MapMode and index entry
+		self.session.abort()
 		# highlight the selected LCS in its new position
 		Gui.Selection.clearSelection()
 		Gui.Selection.addSelection( self.activeDoc.Name, 'Model', self.selectedDatum.Name +'.')
@@ -304,10 +269,23 @@ class placeDatum( QtGui.QDialog ):
 	"""
 	def onOK(self):
 		self.onApply()
+		self.session.commit()
 		self.close()
 
 
 
+	"""
+    +-----------------------------------------------+
+    |   closing the window keeps the changes made   |
+    +-----------------------------------------------+
+	"""
+	def closeEvent( self, event ):
+		if self.session:
+			self.session.commit()
+		super(placeDatum,self).closeEvent( event )
+
+
+
 	"""
     +-----------------------------------------------+
     |                  confirm Box                  |
@@ -391,30 +369,36 @@ class placeDatum( QtGui.QDialog ):
 		self.lscName.move(170,18)
 
 		# combobox showing all available App::Link
-		self.parentList = QtGui.QComboBox(self)
+		self.parentList = libGui.makeComboBox(self)
 		self.parentList.move(10,80)
 		self.parentList.setMinimumSize(350, 1)
-		# initialize with an explanation
-		self.parentList.addItem( 'Select linked Part' )
+		# search the linked parts by label or name
+		self.parentSearch = libGui.makeSearchField( self, self.parentList, self.onParentList )
+		self.parentSearch.setMinimumSize(350, 1)
+		self.parentSearch.move(10,48)
 
 		# label
 		self.parentLabel = QtGui.QLabel(self)
 		self.parentLabel.setText("Linked Part :")
-		self.parentLabel.move(10,120)
+		self.parentLabel.move(10,115)
 		# the document containing the linked object
 		self.parentDoc = QtGui.QLineEdit(self)
 		self.parentDoc.setReadOnly(True)
 		self.parentDoc.setMinimumSize(300, 1)
-		self.parentDoc.move(30,150)
+		self.parentDoc.move(30,140)
 		# label
 		self.labelRight = QtGui.QLabel(self)
 		self.labelRight.setText("Select LCS in linked Part :")
-		self.labelRight.move(10,200)
-		# The list of all attachment LCS in the assembly is a QListWidget
+		self.labelRight.move(10,180)
+		# The list of all attachment LCS in the assembly
 		# it is populated only when the parent combo-box is activated
-		self.attLCSlist = QtGui.QListWidget(self)
+		self.attLCSlist = libGui.makeListView(self)
 		self.attLCSlist.move(10,240)
 		self.attLCSlist.setMinimumSize(350, 200)
+		# search the LCS by label or name
+		self.attLCSsearch = libGui.makeSearchField( self, self.attLCSlist )
+		self.attLCSsearch.setMinimumSize(350, 1)
+		self.attLCSsearch.move(10,207)
 
 		# Expression
 		#
@@ -451,7 +435,7 @@ class placeDatum( QtGui.QDialog ):
 		self.ApplyButton.clicked.connect(self.onApply)
 		self.OKButton.clicked.connect(self.onOK)
 		self.parentList.currentIndexChanged.connect( self.onParentList )
-		self.attLCSlist.itemClicked.connect( self.onDatumClicked )
+		self.attLCSlist.clicked.connect( self.onDatumClicked )
 
 
 	"""
@@ -490,12 +474,3 @@ class placeDatum( QtGui.QDialog ):
 			return(False)
 		# now we should be safe
 		return( selectedObj )
-
-
-
-"""
-    +-----------------------------------------------+
-    |       add the command to the workbench        |
-    +-----------------------------------------------+
-"""
-Gui.addCommand( 'placeDatumCmd', placeDatum() )
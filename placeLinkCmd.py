@@ -10,6 +10,9 @@ import FreeCAD as App
 import Part, math, re
 
 from libAsm4 import *
+import libIndex
+import libConstraints
+import libGui
 
 
 
@@ -26,6 +29,7 @@ class placeLink( QtGui.QDialog ):
 		super(placeLink,self).__init__()
 		self.selectedLink = []
 		self.attLCStable = []
+		self.session = None
 
 
 	def GetResources(self):
@@ -70,113 +74,66 @@ class placeLink( QtGui.QDialog ):
 		# the parent (top-level) assembly is the App::Part called Model (hard-coded)
 		# What would happen if there are 2 App::Part ?
 		self.parentAssembly = self.activeDoc.Model
-		# Initialize the assembly tree with the Parrent Assembly as first element
-		# all the parts in the assembly, except the selected link
-		self.asmParts = []
-		# the first item is "Select attachment Parent" therefore we add an empty object
-		self.asmParts.append( [] )
-		self.asmParts.append( self.parentAssembly )
-		# Add it as first element to the drop-down combo-box
-		parentIcon = self.parentAssembly.ViewObject.Icon
-		self.parentList.addItem( parentIcon, 'Parent Assembly', self.parentAssembly )
-
-		# find all the linked parts in the assembly
-		for obj in self.activeDoc.findObjects("App::Link"):
-			# add it to our list if it's a link to an App::Part ...
-			if obj.LinkedObject.isDerivedFrom('App::Part'):
-				# ... except if it's the selected link itself
-				if obj != self.selectedLink:
-					self.asmParts.append( obj )
-					# add to the drop-down combo box with the assembly tree's parts
-					objIcon = obj.LinkedObject.ViewObject.Icon
-					self.parentList.addItem( objIcon, obj.Name, obj)
+		# the first items are "Select attachment Parent" and the Parent Assembly,
+		# then all the linked parts in the assembly, except the selected link
+		# the combo-box gets its rows when they're shown
+		self.parentList.blockSignals( True )
+		self.parentList.model().setObjects( self.getAllLinkedParts(),
+			[ ( 'Select attachment Parent', None, None, None ),
+			  ( 'Parent Assembly', self.parentAssembly, self.parentAssembly, None ) ] )
+		self.parentList.setCurrentIndex( 0 )
+		self.parentList.blockSignals( False )
 
 
 		# find all the LCS in the selected link
-		self.partLCStable = self.getPartLCS( self.selectedLink.LinkedObject )
+		# if it's partially loaded, the part is going to be edited: load it completely
+		self.partLCStable = self.getPartLCS( loadLinkedPart( self.selectedLink ) )
 		# build the list
-		for lcs in self.partLCStable:
-			newItem = QtGui.QListWidgetItem()
-			if lcs.Name == lcs.Label:
-				newItem.setText( lcs.Name )
-			else:
-				newItem.setText( lcs.Label + ' (' +lcs.Name+ ')' )
-			#newItem.setIcon( lcs.ViewObject.Icon )
-			#self.lcsIcon = lcs.ViewObject.Icon
-			self.partLCSlist.addItem(newItem)
+		self.partLCSlist.model().setObjects( self.partLCStable )
 
 
-		self.old_AO = []
 		self.constrFeature = []
 		self.old_Parent = ''
 		# name of the constraints object for the link
 		self.constrName = constraintPrefix + self.selectedLink.Name
-		# check whether it exists
-		constraint = self.activeDoc.getObject('Constraints').getObject( self.constrName )
+		# check whether it exists, as a feature or as a row of the ConstraintTable
+		constraint = libConstraints.getLinkConstraint( self.activeDoc, self.selectedLink )
 		if constraint:
 			self.constrFeature = constraint
-			# get and store the current AttachmentOffset
-			self.old_AO = self.constrFeature.AttachmentOffset
 			# get and store the current attachment parent
 			self.old_Parent = self.constrFeature.AttachedTo
 
-		self.old_EE = ''
-		# get and store the current expression engine:
-		old_EE = self.selectedLink.ExpressionEngine
-		if old_EE:
-			( pla, self.old_EE ) = old_EE[0]
+		# all the changes until OK or Cancel are one undo step
+		self.session = libGui.editSession( self.activeDoc, 'Place '+self.selectedLink.Name )
 
 		# for debugging, use this field to print text
 		#self.expression.setText( self.old_attPart )
 
 
-		# decode the old ExpressionEngine
+		# look-up the old attachment in the assembly's index
 		old_Parent = ''
-		old_ParentPart = ''
 		old_attLCS = ''
-		constrName = ''
-		linkedPart = ''
 		old_linkLCS = ''
-		# if the decode is unsuccessful, old_Expression is set to False and the other things are set to 'None'
-		( old_Parent, old_ParentPart, old_attLCS, constrName, linkedPart, old_linkLCS ) = splitExpressionPart( self.old_EE, self.old_Parent )
+		attachment = libIndex.getAttachment( self.activeDoc, self.selectedLink.Name )
+		if attachment:
+			( old_Parent, old_attLCS, old_linkLCS, constrName ) = attachment
 
 
-		# find the old LCS in the list of LCS of the linked part...
-		# MatchExactly, MatchContains, MatchEndsWith ...
-		lcs_found = []
-		lcs_found = self.partLCSlist.findItems( old_linkLCS, QtCore.Qt.MatchExactly )
-		if lcs_found:
-			# ... and select it
-			self.partLCSlist.setCurrentItem( lcs_found[0] )
-		else:
-			# may-be it was renamed, see if we can find it as (name)
-			lcs_found = self.partLCSlist.findItems( '('+old_linkLCS+')', QtCore.Qt.MatchContains )
-			if lcs_found:
-				self.partLCSlist.setCurrentItem( lcs_found[0] )
+		# find the old LCS in the list of LCS of the linked part, by its name
+		# even if it was renamed, and select it
+		libGui.selectName( self.partLCSlist, old_linkLCS )
 
 
 		# find the oldPart in the part list...
-		oldPart = self.parentList.findText( old_Parent )
-		# if not found
-		if oldPart == -1:
-			self.parentList.setCurrentIndex( 0 )
+		if old_Parent == 'Parent Assembly':
+			libGui.selectRow( self.parentList, 1 )
 		else:
-			self.parentList.setCurrentIndex( oldPart )
-			# this should have triggered self.getPartLCS() to fill the LCS list
+			libGui.selectName( self.parentList, old_Parent )
+		# this should have triggered self.getPartLCS() to fill the LCS list
 
 
 		# find the oldLCS in the old parent Part (actually the App::Link)...
-		#self.oldLCS = self.attLCSlist.findItems( self.old_attLCS, QtCore.Qt.CaseSensitive )
-		lcs_found = []
-		lcs_found = self.attLCSlist.findItems( old_attLCS, QtCore.Qt.MatchExactly )
-		if lcs_found:
-			# ... and select it
-			self.attLCSlist.setCurrentItem( lcs_found[0] )
-		else:
-			# may-be it was renamed, see if we can find it as (name)
-			lcs_found = self.attLCSlist.findItems( '('+old_attLCS+')', QtCore.Qt.MatchContains )
-			if lcs_found:
-				self.attLCSlist.setCurrentItem( lcs_found[0] )
+		libGui.selectName( self.attLCSlist, old_attLCS )
 
 
 		# the widget is shown and not executed to allow it to stay on top
@@ -191,51 +148,8 @@ class placeLink( QtGui.QDialog ):
     +-----------------------------------------------+
 	"""
 	def makeConstrFeature( self ):
-		# get the name of the App::Link
-		linkName = self.selectedLink.Name
-		# the name of the constraint:
-		constrName = constraintPrefix + linkName
 		# if it exists, return the existing constrFeature
-		# TODO : check that it's of the correct type ?
-		if self.activeDoc.getObject('Constraints').getObject( constrName ):
-			return self.activeDoc.getObject('Constraints').getObject( constrName )
-		# if it didn't exist, create it ...
-		constrFeature = self.activeDoc.getObject('Constraints').newObject( 'App::FeaturePython', constrName )
-		#self.expression.setText( constrName +' does not exist, creating' )
-		#self.expression.setText( constrName +' has been created' )
-		# ...and create the property fields
-		#
-		# Store the type of solver to use
-		constrFeature.addProperty( 'App::PropertyString', 'Solver' )
-		constrFeature.Solver = 'ExpressionEngine'
-		# Store the type of the constraint
-		constrFeature.addProperty( 'App::PropertyString', 'ConstraintType' )
-		constrFeature.ConstraintType = 'AttachmentByLCS'
-		# Enabled ?
-		constrFeature.addProperty( 'App::PropertyBool', 'Enabled' )
-		constrFeature.Enabled = True
-		# store the name of the inserted Part's instance
-		constrFeature.addProperty( 'App::PropertyString', 'Instance', 'Attachment' )
-		constrFeature.Instance = linkName
-		# store the name of the LCS in the assembly where the link is attached to
-		constrFeature.addProperty( 'App::PropertyString', 'AttachedByLCS', 'Attachment' )
-		# store the name of the part where the link is attached to
-		constrFeature.addProperty( 'App::PropertyString', 'AttachedTo', 'Attachment' )
-		# store the name of the LCS in the assembly where the link is attached to
-		constrFeature.addProperty( 'App::PropertyString', 'AttachedToLCS', 'Attachment' )
-		# add an App::Placement that will be the offset between attachment and link LCS
-		constrFeature.addProperty( 'App::PropertyPlacement', 'AttachmentOffset', 'Attachment' )
-		# store the name of the App::Link this constraint refers-to
-		constrFeature.addProperty( 'App::PropertyString', 'LinkName', 'Information' )
-		constrFeature.LinkName = linkName
-		# store the name of the linked document (only for information)
-		constrFeature.addProperty( 'App::PropertyString', 'LinkedPart', 'Information' )
-		constrFeature.LinkedPart = self.selectedLink.LinkedObject.Document.Name
-		# store the name of the linked file (only for information)
-		constrFeature.addProperty( 'App::PropertyString', 'LinkedFile', 'Information' )
-		constrFeature.LinkedFile = self.selectedLink.LinkedObject.Document.FileName
-		# return
-		return constrFeature
+		return libConstraints.makeConstraint( self.activeDoc, self.selectedLink )
 
 
 
@@ -250,11 +164,11 @@ class placeLink( QtGui.QDialog ):
 	def onApply( self ):
 		# get the instance to attach to:
 		# it's either the top level assembly or a sister App::Link
-		if self.parentList.currentText() == 'Parent Assembly':
+		parent = libGui.selectedData( self.parentList )
+		if parent == self.parentAssembly:
 			a_Link = 'Parent Assembly'
 			a_Part = None
-		elif self.parentList.currentIndex() > 1:
-			parent = self.asmParts[ self.parentList.currentIndex() ]
+		elif parent:
 			a_Link = parent.Name
 			a_Part = parent.LinkedObject.Document.Name
 		else:
@@ -263,12 +177,10 @@ class placeLink( QtGui.QDialog ):
 
 
 		# the attachment LCS's name in the parent
-		# check that something is selected in the QlistWidget
-		if self.attLCSlist.selectedItems():
-			#a_LCS = self.attLCSlist.selectedItems()[0].text()
-			a_LCS = self.attLCStable[ self.attLCSlist.currentRow() ].Name
-		else:
-			a_LCS = None
+		# check that something is selected in the list
+		a_LCS = libGui.selectedData( self.attLCSlist )
+		if a_LCS:
+			a_LCS = a_LCS.Name
 
 
 		# the linked App::Part's name
@@ -277,12 +189,10 @@ class placeLink( QtGui.QDialog ):
 		c_Name = self.constrName
 
 		# the LCS's name in the linked part to be used for its attachment
-		# check that something is selected in the QlistWidget
-		if self.partLCSlist.selectedItems():
-			#l_LCS = self.partLCSlist.selectedItems()[0].text()
-			l_LCS = self.partLCStable[ self.partLCSlist.currentRow() ].Name
-		else:
-			l_LCS = None
+		# check that something is selected in the list
+		l_LCS = libGui.selectedData( self.partLCSlist )
+		if l_LCS:
+			l_LCS = l_LCS.Name
 		#self.expression.setText( '***'+ l_LCS +'***' )
 
 		# check that all of them have something in
@@ -299,19 +209,13 @@ class placeLink( QtGui.QDialog ):
 			#
 			# expr = ParentLink.Placement * ParentPart#LCS.Placement * constr_LinkName.AttachmentOffset * LinkedPart#LCS.Placement ^ -1'			
 			# expr = LCS_in_the_assembly.Placement * constr_LinkName.AttachmentOffset * LinkedPart#LCS.Placement ^ -1'			
-			expr = makeExpressionPart( a_Link, a_Part, a_LCS, c_Name, l_Part, l_LCS )
+			# it also fills the constraint feature and the assembly's index
+			expr = attachLink( self.activeDoc, self.selectedLink, a_Link, a_Part, a_LCS, l_LCS )
 			# this can be skipped when this method becomes stable
 			self.expression.setText( expr )
-			# fill the constraint feature. Create it if it doesn't exist:
 			self.constrFeature = self.makeConstrFeature()
-			# store the part where we're attached to in the constraints object
-			self.constrFeature.AttachedByLCS = '#'+l_LCS
-			self.constrFeature.AttachedTo = a_Link
-			self.constrFeature.AttachedToLCS = '#'+a_LCS
-			# load the expression into the link's Expression Engine
-			self.selectedLink.setExpression('Placement', expr )
-			# recompute the object to apply the placement:
-			self.selectedLink.recompute()
+			# recompute the object to apply the placement, once the UI is idle
+			self.session.touch( self.selectedLink )
 		return
 
 
@@ -323,13 +227,11 @@ class placeLink( QtGui.QDialog ):
 	"""
 	def getAllLinkedParts(self):
 		allLinkedParts = []
-		for obj in self.activeDoc.findObjects("App::Link"):
-			# add it to our list if it's a link to an App::Part ...
-			if obj.LinkedObject.isDerivedFrom('App::Part'):
-				# ... except if it's the selected link itself, because
-				# we don't want to place the new link relative to itself !
-				if obj != self.selectedLink:
-					allLinkedParts.append( obj )
+		for obj in libIndex.getLinkedParts( self.activeDoc ):
+			# add it to our list, except if it's the selected link itself, because
+			# we don't want to place the new link relative to itself !
+			if obj != self.selectedLink:
+				allLinkedParts.append( obj )
 		return allLinkedParts
 
 
@@ -340,15 +242,7 @@ class placeLink( QtGui.QDialog ):
     +-----------------------------------------------+
 	"""
 	def getPartLCS( self, part ):
-		partLCS = [ ]
-		# parse all objects in the part (they return strings)
-		for objName in part.getSubObjects():
-			# get the proper objects
-			# all object names end with a "." , this needs to be removed
-			obj = part.getObject( objName[0:-1] )
-			if obj.TypeId == 'PartDesign::CoordinateSystem':
-				partLCS.append( obj )
-		return partLCS
+		return getPartDatums( part, [ 'PartDesign::CoordinateSystem' ] )
 
 
 
@@ -358,40 +252,29 @@ class placeLink( QtGui.QDialog ):
     +------------------------------------------------+
 	"""
 	def onParentList(self):
-		# clear the LCS list
-		self.attLCSlist.clear()
 		self.attLCStable = []
 		# clear the selection in the GUI window
 		Gui.Selection.clearSelection()
-		# the current text in the combo-box is the link's name...
-		parentName = self.parentList.currentText()
-		# partLCS = []
-		# ... or it's 'Parent Assembly' then the parent is the 'Model' root App::Part
-		if parentName =='Parent Assembly':
-			parentPart = self.activeDoc.getObject( 'Model' )
+		# the selected object in the combo-box is the link...
+		parentPart = libGui.selectedData( self.parentList )
+		# ... or it's the 'Model' root App::Part of the Parent Assembly
+		if parentPart == self.parentAssembly:
 			# we get the LCS directly in the root App::Part 'Model'
 			self.attLCStable = self.getPartLCS( parentPart )
 			self.parentDoc.setText( parentPart.Document.Name )
 		# a sister object is an App::Link
 		# the .LinkedObject is an App::Part
-		else:
-			parentPart = self.activeDoc.getObject( parentName )
-			if parentPart:
-				# we get the LCS from the linked part
-				self.attLCStable = self.getPartLCS( parentPart.LinkedObject )
-				self.parentDoc.setText( parentPart.LinkedObject.Document.Name )
-				# highlight the selected part:
-				Gui.Selection.addSelection( parentPart.Document.Name, 'Model', parentPart.Name+'.' )
-		# build the list
-		for lcs in self.attLCStable:
-			newItem = QtGui.QListWidgetItem()
-			if lcs.Name == lcs.Label:
-				newItem.setText( lcs.Name )
-			else:
-				newItem.setText( lcs.Label + ' (' +lcs.Name+ ')' )
-			newItem.setIcon( lcs.ViewObject.Icon )
-			self.attLCSlist.addItem( newItem )
-			#self.attLCStable.append(lcs)
+		elif parentPart:
+			# we get the LCS from the linked part
+			self.attLCStable = self.getPartLCS( loadLinkedPart( parentPart ) )
+			self.parentDoc.setText( parentPart.LinkedObject.Document.Name )
+			# highlight the selected part:
+			Gui.Selection.addSelection( parentPart.Document.Name, 'Model', parentPart.Name+'.' )
+		# build the list, which is cleared with its search field
+		self.attLCSsearch.blockSignals( True )
+		self.attLCSsearch.clear()
+		self.attLCSsearch.blockSignals( False )
+		self.attLCSlist.model().setObjects( self.attLCStable )
 		return
 
 
@@ -406,21 +289,20 @@ class placeLink( QtGui.QDialog ):
 		# clear the selection in the GUI window
 		Gui.Selection.clearSelection()
 		# LCS of the linked part
-		if self.partLCSlist.selectedItems():
-			#p_LCS = self.partLCSlist.selectedItems()[0].text()
-			p_LCS = self.partLCStable[ self.partLCSlist.currentRow() ].Name
-			Gui.Selection.addSelection( self.activeDoc.Name, 'Model', self.selectedLink.Name+'.'+p_LCS+'.')
+		p_LCS = libGui.selectedData( self.partLCSlist )
+		if p_LCS:
+			Gui.Selection.addSelection( self.activeDoc.Name, 'Model', self.selectedLink.Name+'.'+p_LCS.Name+'.')
 		# LCS in the parent
-		if self.attLCSlist.selectedItems():
-			#a_LCS = self.attLCSlist.selectedItems()[0].text()
-			a_LCS = self.attLCStable[ self.attLCSlist.currentRow() ].Name
+		a_LCS = libGui.selectedData( self.attLCSlist )
+		if a_LCS:
+			a_LCS = a_LCS.Name
 			# get the part where the selected LCS is
-			a_Part = self.parentList.currentText()
+			a_Part = libGui.selectedData( self.parentList )
 			# parent assembly and sister part need a different treatment
-			if a_Part == 'Parent Assembly':
+			if a_Part == self.parentAssembly:
 				linkDot = ''
 			else:
-				linkDot = a_Part+'.'
+				linkDot = a_Part.Name+'.'
 			Gui.Selection.addSelection( self.activeDoc.Name, 'Model', linkDot+a_LCS+'.')
 		return
 
@@ -433,12 +315,8 @@ class placeLink( QtGui.QDialog ):
     +-----------------------------------------------+
 	"""
 	def onCancel(self):
-		# restore previous values
-		if self.old_AO:
-			self.constrFeature.AttachmentOffset = self.old_AO
-		if self.old_EE:
-			self.selectedLink.setExpression( 'Placement', self.old_EE )
-		self.selectedLink.recompute()
+		# restore previous values, with the index and the constraint
+		self.session.abort()
 		self.close()
 
 
@@ -450,8 +328,8 @@ class placeLink( QtGui.QDialog ):
 	"""
 	def rotAxis( self, plaRotAxis ):
 		constrAO = self.constrFeature.AttachmentOffset
-		self.constrFeature.AttachmentOffset = plaRotAxis.multiply( constrAO )
-		self.selectedLink.recompute()
+		self.session.set( self.constrFeature, 'AttachmentOffset', plaRotAxis.multiply( constrAO ) )
+		self.session.touch( self.selectedLink )
 		return
 
 	def onRotX(self):
@@ -479,10 +357,23 @@ class placeLink( QtGui.QDialog ):
 	"""
 	def onOK(self):
 		self.onApply()
+		self.session.commit()
 		self.close()
 
 
 
+	"""
+    +-----------------------------------------------+
+    |   closing the window keeps the changes made   |
+    +-----------------------------------------------+
+	"""
+	def closeEvent( self, event ):
+		if self.session:
+			self.session.commit()
+		super(placeLink,self).closeEvent( event )
+
+
+
 	"""
     +-----------------------------------------------+
     |     defines the UI, only static elements      |
@@ -525,12 +416,16 @@ class placeLink( QtGui.QDialog ):
 		# label
 		self.labelLeft = QtGui.QLabel(self)
 		self.labelLeft.setText("Select LCS in Part :")
-		self.labelLeft.move(10,160)
-		# The list of all LCS in the part is a QListWidget
-		self.partLCSlist = QtGui.QListWidget(self)
-		self.partLCSlist.move(10,190)
-		self.partLCSlist.setMinimumSize(100, 250)
+		self.labelLeft.move(10,165)
+		# The list of all LCS in the part, filled when it's shown
+		self.partLCSlist = libGui.makeListView(self)
+		self.partLCSlist.move(10,222)
+		self.partLCSlist.setMinimumSize(250, 218)
 		self.partLCSlist.setToolTip('Select a coordinate system from the list')
+		# search the LCS by label or name
+		self.partLCSsearch = libGui.makeSearchField( self, self.partLCSlist )
+		self.partLCSsearch.setMinimumSize(250, 1)
+		self.partLCSsearch.move(10,190)
 
 		# Assembly, Right side
 		#
@@ -539,32 +434,38 @@ class placeLink( QtGui.QDialog ):
 		self.slectedLabel.setText("Select Part to attach to:")
 		self.slectedLabel.move(280,20)
 		# combobox showing all available App::Link
-		self.parentList = QtGui.QComboBox(self)
-		self.parentList.move(280,50)
+		self.parentList = libGui.makeComboBox(self)
+		self.parentList.move(280,78)
 		self.parentList.setMinimumSize(250, 1)
 		self.parentList.setToolTip('Choose the part in which the attachment\ncoordinate system is to be found')
-		# the parent assembly is hardcoded, and made the first real element
-		self.parentList.addItem('Select attachment Parent')
+		# search the parts by label or name
+		self.parentSearch = libGui.makeSearchField( self, self.parentList, self.onParentList )
+		self.parentSearch.setMinimumSize(250, 1)
+		self.parentSearch.move(280,45)
 
 		# label
 		self.parentLabel = QtGui.QLabel(self)
 		self.parentLabel.setText("Parent Document :")
-		self.parentLabel.move(280,90)
+		self.parentLabel.move(280,112)
 		# the document containing the linked object
 		self.parentDoc = QtGui.QLineEdit(self)
 		self.parentDoc.setReadOnly(True)
 		self.parentDoc.setMinimumSize(200, 1)
-		self.parentDoc.move(305,120)
+		self.parentDoc.move(305,135)
 		# label
 		self.labelRight = QtGui.QLabel(self)
 		self.labelRight.setText("Select LCS in Parent :")
-		self.labelRight.move(280,160)
-		# The list of all attachment LCS in the assembly is a QListWidget
+		self.labelRight.move(280,165)
+		# The list of all attachment LCS in the assembly
 		# it is populated only when the parent combo-box is activated
-		self.attLCSlist = QtGui.QListWidget(self)
-		self.attLCSlist.move(280,190)
-		self.attLCSlist.setMinimumSize(250, 250)
+		self.attLCSlist = libGui.makeListView(self)
+		self.attLCSlist.move(280,222)
+		self.attLCSlist.setMinimumSize(250, 218)
 		self.attLCSlist.setToolTip('Select a coordinate system from the list')
+		# search the LCS by label or name
+		self.attLCSsearch = libGui.makeSearchField( self, self.attLCSlist )
+		self.attLCSsearch.setMinimumSize(250, 1)
+		self.attLCSsearch.move(280,190)
 
 		# Expression
 		#
@@ -670,12 +571,3 @@ class placeLink( QtGui.QDialog ):
 		#	return( selectedObj )
 		# now we should be safe
 		return( selectedObj )
-
-
-
-"""
-    +-----------------------------------------------+
-    |       add the command to the workbench        |
-    +-----------------------------------------------+
-"""
-Gui.addCommand( 'placeLinkCmd', placeLink() )
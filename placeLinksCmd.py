@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# placeLinksCmd.py
+#
+# place many linked parts at once, like fasteners on a series of holes
+
+
+from PySide import QtGui, QtCore
+import FreeCADGui as Gui
+import FreeCAD as App
+import re
+
+from libAsm4 import *
+import libIndex
+import libSolver
+import libGui
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the columns of the table, one row per link  |
+    +-----------------------------------------------+
+"""
+columns = [ 'Link', 'LCS in Link', 'Attach to', 'LCS in Parent' ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class placeLinks( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(placeLinks,self).__init__()
+		self.selectedLinks = []
+
+
+	def GetResources(self):
+		return {"MenuText": "Place several linked Parts",
+				"ToolTip": "Attach all the selected links in one go, for example on a series of LCS",
+				"Pixmap" : os.path.join( iconPath , 'Place_Link.svg')
+				}
+
+
+	def IsActive(self):
+		# is there an active document with an Asm4 Model ?
+		if App.ActiveDocument and App.ActiveDocument.getObject('Model'):
+			# are several links selected ?
+			links = [ obj for obj in Gui.Selection.getSelection() if obj.isDerivedFrom('App::Link') ]
+			if len( links ) > 1:
+				return True
+		return False
+
+
+	"""
+    +-----------------------------------------------+
+    |                 the real stuff                |
+    +-----------------------------------------------+
+	"""
+	def Activated(self):
+		# get the current active document to avoid errors if user changes tab
+		self.activeDoc = App.activeDocument()
+		self.selectedLinks = [ obj for obj in Gui.Selection.getSelection()
+							   if obj.isDerivedFrom('App::Link') and obj.LinkedObject ]
+		# the links that can be attached to
+		self.parents = dict( ( obj.Name, obj ) for obj in libIndex.getLinkedParts( self.activeDoc ) )
+
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+
+		# the Parent Assembly, then the other links, the combo-box gets its rows when they're shown
+		model = self.activeDoc.getObject('Model')
+		self.parentList.model().setObjects( [ self.parents[ name ] for name in sorted( self.parents, key=naturalKey )
+											  if self.parents[ name ] not in self.selectedLinks ],
+											[ ( 'Parent Assembly', model, model, None ) ] )
+		self.parentList.setCurrentIndex( 0 )
+
+		# one row per selected link, with its current attachment if it has one
+		self.linkTable.setRowCount( len( self.selectedLinks ) )
+		for row, link in enumerate( self.selectedLinks ):
+			attachment = libIndex.getAttachment( self.activeDoc, link.Name )
+			if attachment:
+				( attachedTo, attachedToLCS, attachedByLCS, constrName ) = attachment
+			else:
+				( attachedTo, attachedToLCS, attachedByLCS ) = ( '', '', 'LCS_0' )
+			item = QtGui.QTableWidgetItem( link.Name )
+			item.setFlags( item.flags() & ~QtCore.Qt.ItemIsEditable )
+			self.linkTable.setItem( row, 0, item )
+			for col, text in [ ( 1, attachedByLCS ), ( 2, attachedTo ), ( 3, attachedToLCS ) ]:
+				self.linkTable.setItem( row, col, QtGui.QTableWidgetItem( text ) )
+
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   the LCS of the chosen parent that match     |
+    |   the pattern, paired with the links in the   |
+    |           order of the table                  |
+    +-----------------------------------------------+
+	"""
+	def onFill( self ):
+		parent = libGui.selectedData( self.parentList )
+		if parent is None:
+			self.message.setText( 'Choose the part to attach to' )
+			return
+		if parent.isDerivedFrom('App::Link'):
+			parentName = parent.Name
+			part = parent.LinkedObject
+		else:
+			parentName = 'Parent Assembly'
+			part = parent
+		try:
+			targets = matchNames( [ lcs.Name for lcs in self.getPartLCS( part ) ], self.patternInput.text() )
+		except re.error as err:
+			self.message.setText( 'Invalid pattern : '+str( err ) )
+			return
+		linkLCS = self.linkLCSInput.text()
+		for row in range( min( len( targets ), self.linkTable.rowCount() ) ):
+			if linkLCS:
+				self.linkTable.item( row, 1 ).setText( linkLCS )
+			self.linkTable.item( row, 2 ).setText( parentName )
+			self.linkTable.item( row, 3 ).setText( targets[ row ] )
+		self.message.setText( str( len( targets ) )+' LCS found for '+str( self.linkTable.rowCount() )+' links' )
+
+
+
+	"""
+    +-----------------------------------------------+
+    |           get all the LCS in a part           |
+    +-----------------------------------------------+
+	"""
+	def getPartLCS( self, part ):
+		return getPartDatums( part, [ 'PartDesign::CoordinateSystem' ] )
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   check all the rows, then attach all the     |
+    |   links in one transaction and solve once     |
+    +-----------------------------------------------+
+	"""
+	def onApply( self ):
+		attachments = []
+		errors = []
+		# the names of the LCS of each part, looked-up only once
+		partLCS = {}
+		def hasLCS( part, name ):
+			if part.FullName not in partLCS:
+				partLCS[ part.FullName ] = set( lcs.Name for lcs in self.getPartLCS( part ) )
+			return name in partLCS[ part.FullName ]
+		for row, link in enumerate( self.selectedLinks ):
+			( l_LCS, a_Link, a_LCS ) = [ self.linkTable.item( row, col ).text().strip() for col in [ 1, 2, 3 ] ]
+			if a_Link == 'Parent Assembly':
+				a_Part = None
+				parentPart = self.activeDoc.getObject('Model')
+			elif a_Link in self.parents and self.parents[ a_Link ] != link:
+				a_Part = self.parents[ a_Link ].LinkedObject.Document.Name
+				parentPart = self.parents[ a_Link ].LinkedObject
+			else:
+				errors.append( link.Name+' : unknown parent "'+a_Link+'"' )
+				continue
+			if not hasLCS( parentPart, a_LCS ):
+				errors.append( link.Name+' : no LCS "'+a_LCS+'" in '+a_Link )
+			elif not hasLCS( link.LinkedObject, l_LCS ):
+				errors.append( link.Name+' : no LCS "'+l_LCS+'" in the linked part' )
+			else:
+				attachments.append( ( link, a_Link, a_Part, a_LCS, l_LCS ) )
+		if errors:
+			self.message.setText( 'Problem in selections :\n'+'\n'.join( errors[0:5] ) )
+			return False
+		# all in one undo step, and only one recompute at the end
+		self.activeDoc.openTransaction( 'Place '+str( len( attachments ) )+' links' )
+		try:
+			for ( link, a_Link, a_Part, a_LCS, l_LCS ) in attachments:
+				attachLink( self.activeDoc, link, a_Link, a_Part, a_LCS, l_LCS )
+			libSolver.solveAssembly( self.activeDoc )
+		except Exception:
+			# undo the links placed so far, the next edits aren't part of it
+			self.activeDoc.abortTransaction()
+			raise
+		self.activeDoc.commitTransaction()
+		self.message.setText( str( len( attachments ) )+' links placed' )
+		return True
+
+
+
+	"""
+    +-----------------------------------------------+
+    |                 OK and Cancel                 |
+    +-----------------------------------------------+
+	"""
+	def onOK(self):
+		if self.onApply():
+			self.close()
+
+
+	def onCancel(self):
+		self.close()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Place linked Parts')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(600, 640)
+		self.resize(600,640)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# the table of the selected links and their attachments
+		self.linkTable = QtGui.QTableWidget( 0, len( columns ), self )
+		self.linkTable.setHorizontalHeaderLabels( columns )
+		self.linkTable.horizontalHeader().setStretchLastSection( True )
+		self.linkTable.move(10,20)
+		self.linkTable.setMinimumSize(580, 360)
+		self.linkTable.setToolTip('The attachment of each link, the cells can be edited')
+
+		# fill the table from a pattern
+		self.fillLabel = QtGui.QLabel(self)
+		self.fillLabel.setText("Attach to :")
+		self.fillLabel.move(10,400)
+		self.parentList = libGui.makeComboBox(self)
+		self.parentList.move(120,395)
+		self.parentList.setMinimumSize(200, 1)
+		self.parentList.setToolTip('The part in which the target LCS are to be found')
+		# search the parts by label or name
+		self.parentSearch = libGui.makeSearchField( self, self.parentList )
+		self.parentSearch.setMinimumSize(200, 1)
+		self.parentSearch.move(340,395)
+
+		self.patternLabel = QtGui.QLabel(self)
+		self.patternLabel.setText("LCS pattern :")
+		self.patternLabel.move(10,440)
+		self.patternInput = QtGui.QLineEdit(self)
+		self.patternInput.setText('LCS_.*')
+		self.patternInput.setMinimumSize(200, 1)
+		self.patternInput.move(120,435)
+		self.patternInput.setToolTip('A regular expression matching the names of the target LCS,\nthey are given to the links in natural order')
+
+		self.linkLCSLabel = QtGui.QLabel(self)
+		self.linkLCSLabel.setText("LCS in Links :")
+		self.linkLCSLabel.move(10,480)
+		self.linkLCSInput = QtGui.QLineEdit(self)
+		self.linkLCSInput.setText('LCS_0')
+		self.linkLCSInput.setMinimumSize(200, 1)
+		self.linkLCSInput.move(120,475)
+		self.linkLCSInput.setToolTip('The LCS by which all the links are attached,\nleave empty to keep the current ones')
+
+		self.fillButton = QtGui.QPushButton('Fill table', self)
+		self.fillButton.setAutoDefault(False)
+		self.fillButton.move(340, 475)
+
+		# messages
+		self.message = QtGui.QLabel(self)
+		self.message.setMinimumSize(580, 80)
+		self.message.setAlignment( QtCore.Qt.AlignTop )
+		self.message.move(10,515)
+
+		# Buttons
+		self.CancelButton = QtGui.QPushButton('Cancel', self)
+		self.CancelButton.setAutoDefault(False)
+		self.CancelButton.move(10, 600)
+
+		self.ApplyButton = QtGui.QPushButton('Apply', self)
+		self.ApplyButton.setAutoDefault(False)
+		self.ApplyButton.move(400, 600)
+
+		self.OKButton = QtGui.QPushButton('OK', self)
+		self.OKButton.setAutoDefault(True)
+		self.OKButton.move(500, 600)
+		self.OKButton.setDefault(True)
+
+		# Actions
+		self.fillButton.clicked.connect(self.onFill)
+		self.CancelButton.clicked.connect(self.onCancel)
+		self.ApplyButton.clicked.connect(self.onApply)
+		self.OKButton.clicked.connect(self.onOK)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# profileReportCmd.py
+#
+# show the timings collected by libProfiler, and export them
+
+
+from PySide import QtGui, QtCore
+
+from libAsm4 import *
+import libProfiler
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the columns of the table, and the factor    |
+    |       from seconds to the shown unit          |
+    +-----------------------------------------------+
+"""
+columns = [ ( 'name', 'Function', None ), ( 'calls', 'Calls', None ), ( 'total', 'Total (s)', 1. ),
+			( 'mean', 'Mean (ms)', 1000. ), ( 'min', 'Min (ms)', 1000. ), ( 'max', 'Max (ms)', 1000. ) ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class profileReport( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(profileReport,self).__init__()
+
+
+	def GetResources(self):
+		return {"MenuText": "Profiling report",
+				"ToolTip": "Show where the time goes in the Assembly4 commands",
+				"Pixmap" : os.path.join( iconPath , 'Solver.svg')
+				}
+
+
+	def IsActive(self):
+		return(True)
+
+
+	def Activated(self):
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+		self.enableCheck.setChecked( libProfiler.active )
+		self.onRefresh()
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   fill the table, sortable by any column      |
+    +-----------------------------------------------+
+	"""
+	def onRefresh(self):
+		records = libProfiler.getRecords()
+		self.table.setSortingEnabled( False )
+		self.table.setRowCount( len( records ) )
+		for row, record in enumerate( records ):
+			for col, ( key, title, factor ) in enumerate( columns ):
+				item = QtGui.QTableWidgetItem()
+				if factor is None:
+					item.setData( QtCore.Qt.DisplayRole, record[ key ] )
+				else:
+					item.setData( QtCore.Qt.DisplayRole, round( record[ key ] * factor, 3 ) )
+				item.setFlags( item.flags() & ~QtCore.Qt.ItemIsEditable )
+				self.table.setItem( row, col, item )
+		self.table.setSortingEnabled( True )
+		self.table.resizeColumnsToContents()
+
+
+	def onEnable( self, state ):
+		libProfiler.setActive( self.enableCheck.isChecked() )
+
+
+	def onReset(self):
+		libProfiler.reset()
+		self.onRefresh()
+
+
+	def onExport(self):
+		path = QtGui.QFileDialog.getSaveFileName( self, 'Export the timings', 'asm4_profile.json',
+												  'JSON (*.json);;CSV (*.csv)' )[0]
+		if path:
+			libProfiler.writeReport( path )
+
+
+	def onClose(self):
+		self.close()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Assembly4 profiling')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(640, 480)
+		self.resize(640,480)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# the timings
+		self.table = QtGui.QTableWidget( 0, len( columns ), self )
+		self.table.setHorizontalHeaderLabels( [ title for ( key, title, factor ) in columns ] )
+		self.table.move(10,40)
+		self.table.setMinimumSize(620, 380)
+
+		# profiling on or off, it's remembered in the preferences
+		self.enableCheck = QtGui.QCheckBox( 'Enable profiling', self )
+		self.enableCheck.move(10,10)
+		self.enableCheck.setToolTip('Time the Assembly4 commands and the solver, at a small cost')
+
+		# Buttons
+		self.refreshButton = QtGui.QPushButton('Refresh', self)
+		self.refreshButton.move(10, 440)
+		self.resetButton = QtGui.QPushButton('Reset', self)
+		self.resetButton.move(120, 440)
+		self.exportButton = QtGui.QPushButton('Export', self)
+		self.exportButton.setToolTip('Save the timings as JSON, or as CSV')
+		self.exportButton.move(230, 440)
+		self.closeButton = QtGui.QPushButton('Close', self)
+		self.closeButton.setDefault(True)
+		self.closeButton.move(540, 440)
+
+		# Actions
+		self.enableCheck.stateChanged.connect(self.onEnable)
+		self.refreshButton.clicked.connect(self.onRefresh)
+		self.resetButton.clicked.connect(self.onReset)
+		self.exportButton.clicked.connect(self.onExport)
+		self.closeButton.clicked.connect(self.onClose)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# solveStatsCmd.py
+#
+# show, per linked part and datum, what the solves of the assembly cost
+
+
+from PySide import QtGui, QtCore
+import FreeCADGui as Gui
+import FreeCAD as App
+
+from libAsm4 import *
+import libSolver
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the columns of the table, and the factor    |
+    |       from seconds to the shown unit          |
+    +-----------------------------------------------+
+"""
+columns = [ ( 'name', 'Object', None ), ( 'constraint', 'Constraint', None ), ( 'chain', 'Chain length', None ),
+			( 'dependents', 'Dependents', None ), ( 'recomputes', 'Recomputes', None ),
+			( 'last', 'Last (ms)', 1000. ), ( 'mean', 'Mean (ms)', 1000. ), ( 'total', 'Total (ms)', 1000. ) ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class solveStats( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(solveStats,self).__init__()
+
+
+	def GetResources(self):
+		return {"MenuText": "Solver statistics",
+				"ToolTip": "Show the time spent on each linked part and datum by the solves of the assembly",
+				"Pixmap" : os.path.join( iconPath , 'Solver.svg')
+				}
+
+
+	def IsActive(self):
+		if App.ActiveDocument and App.ActiveDocument.getObject('Model'):
+			return(True)
+		return(False)
+
+
+	def Activated(self):
+		# get the current active document to avoid errors if user changes tab
+		self.activeDoc = App.activeDocument()
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+		self.onRefresh()
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   fill the table, sortable by any column      |
+    +-----------------------------------------------+
+	"""
+	def onRefresh(self):
+		records = libSolver.getStats( self.activeDoc )
+		self.table.setSortingEnabled( False )
+		self.table.setRowCount( len( records ) )
+		for row, record in enumerate( records ):
+			for col, ( key, title, factor ) in enumerate( columns ):
+				item = QtGui.QTableWidgetItem()
+				if factor is None:
+					item.setData( QtCore.Qt.DisplayRole, record[ key ] )
+				else:
+					item.setData( QtCore.Qt.DisplayRole, round( record[ key ] * factor, 3 ) )
+				item.setFlags( item.flags() & ~QtCore.Qt.ItemIsEditable )
+				self.table.setItem( row, col, item )
+		self.table.setSortingEnabled( True )
+		self.table.resizeColumnsToContents()
+		if not records:
+			self.message.setText( 'No statistics yet, solve the assembly first' )
+		else:
+			self.message.setText( str( len( records ) )+' objects' )
+
+
+	# solve the whole assembly again, to time every object
+	def onSolve(self):
+		libSolver.solveAssembly( self.activeDoc, full=True )
+		self.onRefresh()
+
+
+	def onReset(self):
+		libSolver.resetStats( self.activeDoc )
+		self.onRefresh()
+
+
+	# select the objects of the selected rows, to find them in the 3D view
+	def onSelect(self):
+		Gui.Selection.clearSelection()
+		for row in set( index.row() for index in self.table.selectedIndexes() ):
+			obj = self.activeDoc.getObject( self.table.item( row, 0 ).text() )
+			if obj:
+				Gui.Selection.addSelection( obj )
+
+
+	def onClose(self):
+		self.close()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Assembly4 solver statistics')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(740, 480)
+		self.resize(740,480)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# the statistics
+		self.table = QtGui.QTableWidget( 0, len( columns ), self )
+		self.table.setHorizontalHeaderLabels( [ title for ( key, title, factor ) in columns ] )
+		self.table.setSelectionBehavior( QtGui.QAbstractItemView.SelectRows )
+		self.table.move(10,10)
+		self.table.setMinimumSize(720, 400)
+
+		# messages
+		self.message = QtGui.QLabel(self)
+		self.message.setMinimumSize(720, 20)
+		self.message.move(10,415)
+
+		# Buttons
+		self.refreshButton = QtGui.QPushButton('Refresh', self)
+		self.refreshButton.move(10, 440)
+		self.solveButton = QtGui.QPushButton('Solve all', self)
+		self.solveButton.setToolTip('Recompute every object of the assembly, to time them all')
+		self.solveButton.move(120, 440)
+		self.resetButton = QtGui.QPushButton('Reset', self)
+		self.resetButton.move(230, 440)
+		self.selectButton = QtGui.QPushButton('Select', self)
+		self.selectButton.setToolTip('Select the objects of the selected rows')
+		self.selectButton.move(340, 440)
+		self.closeButton = QtGui.QPushButton('Close', self)
+		self.closeButton.setDefault(True)
+		self.closeButton.move(640, 440)
+
+		# Actions
+		self.refreshButton.clicked.connect(self.onRefresh)
+		self.solveButton.clicked.connect(self.onSolve)
+		self.resetButton.clicked.connect(self.onReset)
+		self.selectButton.clicked.connect(self.onSelect)
+		self.closeButton.clicked.connect(self.onClose)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# sweepCmd.py
+#
+# drive the AttachmentOffset of some links across a range, and play the
+# motion of the assembly back or export it
+
+
+from PySide import QtGui, QtCore
+import FreeCADGui as Gui
+import FreeCAD as App
+
+from libAsm4 import *
+import libIndex
+import libSweep
+
+
+
+"""
+    +-----------------------------------------------+
+    |   the columns of the table, one row per       |
+    |                   driver                      |
+    +-----------------------------------------------+
+"""
+columns = [ 'Link', 'Parameter', 'Start', 'End' ]
+
+
+
+"""
+    +-----------------------------------------------+
+    |                  main class                   |
+    +-----------------------------------------------+
+"""
+class sweep( QtGui.QDialog ):
+	"My tool object"
+
+
+	def __init__(self):
+		super(sweep,self).__init__()
+		self.record = None
+
+
+	def GetResources(self):
+		return {"MenuText": "Sweep the constraints",
+				"ToolTip": "Move the AttachmentOffset of some links across a range, and play the motion back",
+				"Pixmap" : os.path.join( iconPath , 'Place_Link.svg')
+				}
+
+
+	def IsActive(self):
+		if App.ActiveDocument and App.ActiveDocument.getObject('Model'):
+			return(True)
+		return(False)
+
+
+	def Activated(self):
+		# get the current active document to avoid errors if user changes tab
+		self.activeDoc = App.activeDocument()
+		self.record = None
+		# the links that have an AttachmentOffset to drive
+		self.links = []
+		for link in libIndex.getLinkedParts( self.activeDoc ):
+			attachment = libIndex.getAttachment( self.activeDoc, link.Name )
+			if attachment and attachment[3]:
+				self.links.append( link.Name )
+		# draw the GUI, objects are defined later down
+		self.drawUI()
+		# a driver for each selected link
+		for obj in Gui.Selection.getSelection():
+			if obj.Name in self.links:
+				self.addDriver( obj.Name )
+		# the widget is shown and not executed to allow it to stay on top
+		self.show()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   the drivers: a link, which parameter of its |
+    |   AttachmentOffset, and the range             |
+    +-----------------------------------------------+
+	"""
+	def addDriver( self, linkName=None ):
+		row = self.driverTable.rowCount()
+		self.driverTable.insertRow( row )
+		linkCombo = QtGui.QComboBox()
+		linkCombo.addItems( self.links )
+		if linkName:
+			linkCombo.setCurrentIndex( self.links.index( linkName ) )
+		self.driverTable.setCellWidget( row, 0, linkCombo )
+		parameterCombo = QtGui.QComboBox()
+		parameterCombo.addItems( libSweep.parameters )
+		# turning is the most common motion
+		parameterCombo.setCurrentIndex( libSweep.parameters.index('yaw') )
+		self.driverTable.setCellWidget( row, 1, parameterCombo )
+		self.driverTable.setItem( row, 2, QtGui.QTableWidgetItem('0') )
+		self.driverTable.setItem( row, 3, QtGui.QTableWidgetItem('360') )
+
+
+	def onAddDriver(self):
+		if not self.links:
+			self.message.setText( 'There is no attached link to drive' )
+			return
+		self.addDriver()
+
+
+	def onRemoveDriver(self):
+		for row in sorted( set( index.row() for index in self.driverTable.selectedIndexes() ), reverse=True ):
+			self.driverTable.removeRow( row )
+
+
+	def getDrivers( self ):
+		drivers = []
+		for row in range( self.driverTable.rowCount() ):
+			drivers.append( libSweep.sweepDriver( self.driverTable.cellWidget( row, 0 ).currentText(),
+												  self.driverTable.cellWidget( row, 1 ).currentText(),
+												  self.driverTable.item( row, 2 ).text(),
+												  self.driverTable.item( row, 3 ).text() ) )
+		return drivers
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   compute all the frames, the document is     |
+    |   as it was until they are played             |
+    +-----------------------------------------------+
+	"""
+	def onCompute(self):
+		self.onStop()
+		self.restore()
+		try:
+			drivers = self.getDrivers()
+			if not drivers:
+				self.message.setText( 'Add a driver first' )
+				return
+			self.record = libSweep.sweep( self.activeDoc, drivers, self.framesSpin.value() )
+		except ValueError as err:
+			self.message.setText( str( err ) )
+			return
+		self.frameSlider.setMaximum( self.record.frames - 1 )
+		self.frameSlider.setValue( 0 )
+		self.message.setText( str( self.record.frames )+' frames of '+str( len( self.record.names ) )+' objects in '
+							  +str( round( self.record.elapsed, 3 ) )+' s ('+str( int( self.record.fps() ) )+' frames/s)' )
+		self.onFrame( 0 )
+
+
+	def onFrame( self, frame ):
+		if self.record:
+			libSweep.applyFrame( self.activeDoc, self.record, frame )
+
+
+	# put the links back where they were before the sweep
+	def restore( self ):
+		if self.record:
+			libSweep.restoreRest( self.activeDoc, self.record )
+
+
+
+	"""
+    +-----------------------------------------------+
+    |   play the frames in a loop, at the chosen    |
+    |                 frame rate                    |
+    +-----------------------------------------------+
+	"""
+	def onPlay(self):
+		if not self.record:
+			self.onCompute()
+		if self.record:
+			self.timer.start( int( 1000 / self.fpsSpin.value() ) )
+
+
+	def onStop(self):
+		self.timer.stop()
+
+
+	def onTick(self):
+		self.frameSlider.setValue( ( self.frameSlider.value() + 1 ) % self.record.frames )
+
+
+	def onExport(self):
+		if not self.record:
+			self.message.setText( 'Compute the sweep first' )
+			return
+		path = QtGui.QFileDialog.getSaveFileName( self, 'Export the sweep', 'asm4_sweep.json',
+												  'JSON (*.json);;CSV (*.csv)' )[0]
+		if path:
+			libSweep.writeSweep( path, self.record )
+
+
+	def onClose(self):
+		self.close()
+
+
+	def closeEvent( self, event ):
+		self.onStop()
+		self.restore()
+		self.record = None
+		event.accept()
+
+
+
+	"""
+    +-----------------------------------------------+
+    |     defines the UI, only static elements      |
+    +-----------------------------------------------+
+	"""
+	def drawUI(self):
+		# Our main window will be a QDialog
+		self.setWindowTitle('Assembly4 sweep')
+		self.setWindowIcon( QtGui.QIcon( os.path.join( iconPath , 'FreeCad.svg' ) ) )
+		self.setMinimumSize(600, 440)
+		self.resize(600,440)
+		self.setModal(False)
+		# make this dialog stay above the others, always visible
+		self.setWindowFlags( QtCore.Qt.WindowStaysOnTopHint )
+
+		# the drivers
+		self.driverLabel = QtGui.QLabel(self)
+		self.driverLabel.setText("Driven AttachmentOffsets, angles in degrees :")
+		self.driverLabel.move(10,15)
+		self.driverTable = QtGui.QTableWidget( 0, len( columns ), self )
+		self.driverTable.setHorizontalHeaderLabels( columns )
+		self.driverTable.horizontalHeader().setStretchLastSection( True )
+		self.driverTable.move(10,40)
+		self.driverTable.setMinimumSize(580, 160)
+		self.addButton = QtGui.QPushButton('Add driver', self)
+		self.addButton.setAutoDefault(False)
+		self.addButton.move(10, 210)
+		self.removeButton = QtGui.QPushButton('Remove driver', self)
+		self.removeButton.setAutoDefault(False)
+		self.removeButton.move(120, 210)
+
+		# the frames
+		self.framesLabel = QtGui.QLabel(self)
+		self.framesLabel.setText("Frames :")
+		self.framesLabel.move(10,260)
+		self.framesSpin = QtGui.QSpinBox(self)
+		self.framesSpin.setRange( 2, 100000 )
+		self.framesSpin.setValue( 60 )
+		self.framesSpin.move(90,255)
+		self.fpsLabel = QtGui.QLabel(self)
+		self.fpsLabel.setText("Frames per second :")
+		self.fpsLabel.move(200,260)
+		self.fpsSpin = QtGui.QSpinBox(self)
+		self.fpsSpin.setRange( 1, 120 )
+		self.fpsSpin.setValue( 25 )
+		self.fpsSpin.move(340,255)
+		self.computeButton = QtGui.QPushButton('Compute', self)
+		self.computeButton.setAutoDefault(False)
+		self.computeButton.move(490, 255)
+
+		# the frame shown
+		self.frameSlider = QtGui.QSlider( QtCore.Qt.Horizontal, self )
+		self.frameSlider.setMinimum( 0 )
+		self.frameSlider.setMaximum( 0 )
+		self.frameSlider.setMinimumSize(580, 20)
+		self.frameSlider.move(10,300)
+
+		# messages
+		self.message = QtGui.QLabel(self)
+		self.message.setMinimumSize(580, 20)
+		self.message.move(10,335)
+
+		# Buttons
+		self.playButton = QtGui.QPushButton('Play', self)
+		self.playButton.setAutoDefault(False)
+		self.playButton.move(10, 390)
+		self.stopButton = QtGui.QPushButton('Stop', self)
+		self.stopButton.setAutoDefault(False)
+		self.stopButton.move(120, 390)
+		self.exportButton = QtGui.QPushButton('Export', self)
+		self.exportButton.setAutoDefault(False)
+		self.exportButton.setToolTip('Save the placements of all the frames as JSON, or as CSV')
+		self.exportButton.move(230, 390)
+		self.closeButton = QtGui.QPushButton('Close', self)
+		self.closeButton.setToolTip('Put the links back where they were, and close')
+		self.closeButton.setDefault(True)
+		self.closeButton.move(490, 390)
+
+		# the playback
+		self.timer = QtCore.QTimer( self )
+
+		# Actions
+		self.addButton.clicked.connect(self.onAddDriver)
+		self.removeButton.clicked.connect(self.onRemoveDriver)
+		self.computeButton.clicked.connect(self.onCompute)
+		self.frameSlider.valueChanged.connect(self.onFrame)
+		self.playButton.clicked.connect(self.onPlay)
+		self.stopButton.clicked.connect(self.onStop)
+		self.exportButton.clicked.connect(self.onExport)
+		self.closeButton.clicked.connect(self.onClose)
+		self.timer.timeout.connect(self.onTick)
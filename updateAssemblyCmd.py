@@ -10,6 +10,7 @@ import FreeCAD as App
 import Part, math, re
 
 from libAsm4 import *
+import libSolver
 
 
 
@@ -40,13 +41,7 @@ class updateAssembly:
 		# get the current active document to avoid errors if user changes tab
 		self.activeDoc = App.activeDocument()
 
-		# find all the linked parts in the assembly...
-		for obj in self.activeDoc.findObjects():
-			# ... and update it
-			obj.recompute()
-		# finally uodate the parent assembly
-		self.activeDoc.Model.recompute()
-
-
-# add the command to the workbench
-Gui.addCommand( 'updateAssemblyCmd', updateAssembly() )
+		# solve first the linked sub-assemblies that changed, each only once,
+		# then recompute, in dependency order, only the linked parts and datums
+		# whose attachment changed since the last solve, and then the Model
+		libSolver.solveHierarchy( self.activeDoc )